@@ -0,0 +1,184 @@
+"""
+Price alert engine for Crypto Trading Calculator
+
+Levels are kept per symbol in a sorted price array. On every tick the engine
+bisects the (previous, current] price interval, so finding all k crossed levels
+costs O(log n + k) no matter how many alerts are armed.
+"""
+
+import bisect
+import itertools
+import threading
+import time
+
+
+class Alert:
+    __slots__ = ('id', 'symbol', 'price', 'kind', 'direction', 'note', 'once')
+
+    def __init__(self, id, symbol, price, kind='level', direction='any', note='', once=True):
+        self.id = id
+        self.symbol = symbol
+        self.price = price
+        self.kind = kind            # 'sl', 'tp', 'entry', 'level'
+        self.direction = direction  # 'up', 'down' or 'any'
+        self.note = note
+        self.once = once
+
+    def __repr__(self):
+        return f"Alert({self.symbol} {self.kind} @ {self.price:g})"
+
+
+class AlertEvent:
+    __slots__ = ('alert', 'price', 'prev_price', 'direction', 'ts')
+
+    def __init__(self, alert, price, prev_price, direction, ts):
+        self.alert = alert
+        self.price = price
+        self.prev_price = prev_price
+        self.direction = direction
+        self.ts = ts
+
+    def message(self):
+        a = self.alert
+        arrow = '↑' if self.direction == 'up' else '↓'
+        note = f" ({a.note})" if a.note else ''
+        return f"{a.symbol} {a.kind.upper()} {a.price:g} crossed {arrow} at {self.price:g}{note}"
+
+
+class Notifier:
+    """Base notifier; subclasses override notify(event)"""
+
+    def notify(self, event):
+        raise NotImplementedError
+
+
+class CallbackNotifier(Notifier):
+    def __init__(self, fn):
+        self.fn = fn
+
+    def notify(self, event):
+        self.fn(event)
+
+
+class LogNotifier(Notifier):
+    def __init__(self, path):
+        self.path = path
+
+    def notify(self, event):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event.ts))} | {event.message()}\n")
+
+
+class WebhookNotifier(Notifier):
+    """POST {"text": message, ...} to a webhook (Slack/Discord/Telegram bridges)"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def notify(self, event):
+        import requests
+        a = event.alert
+        requests.post(self.url, json={'text': event.message(), 'symbol': a.symbol, 'kind': a.kind,
+                                      'level': a.price, 'price': event.price}, timeout=self.timeout)
+
+
+class AlertEngine:
+    def __init__(self, notifiers=None):
+        self.notifiers = list(notifiers or [])
+        self._prices = {}   # symbol -> sorted [price]
+        self._alerts = {}   # symbol -> [Alert] parallel to _prices
+        self._by_id = {}
+        self._last = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def add_notifier(self, notifier):
+        if callable(notifier) and not isinstance(notifier, Notifier):
+            notifier = CallbackNotifier(notifier)
+        self.notifiers.append(notifier)
+        return notifier
+
+    def add(self, symbol, price, kind='level', direction='any', note='', once=True):
+        alert = Alert(next(self._ids), symbol, float(price), kind, direction, note, once)
+        with self._lock:
+            prices = self._prices.setdefault(symbol, [])
+            alerts = self._alerts.setdefault(symbol, [])
+            i = bisect.bisect_right(prices, alert.price)
+            prices.insert(i, alert.price)
+            alerts.insert(i, alert)
+            self._by_id[alert.id] = alert
+        return alert.id
+
+    def add_trade(self, symbol, entry, stop_loss, take_profits=(), note=''):
+        """Arm SL and TP alerts for a planned trade; returns their ids"""
+        long = stop_loss < entry
+        ids = [self.add(symbol, stop_loss, 'sl', 'down' if long else 'up', note)]
+        for tp in take_profits:
+            ids.append(self.add(symbol, tp, 'tp', 'up' if long else 'down', note))
+        return ids
+
+    def remove(self, alert_id):
+        with self._lock:
+            alert = self._by_id.pop(alert_id, None)
+            if alert is None:
+                return False
+            prices, alerts = self._prices[alert.symbol], self._alerts[alert.symbol]
+            lo = bisect.bisect_left(prices, alert.price)
+            hi = bisect.bisect_right(prices, alert.price)
+            for i in range(lo, hi):
+                if alerts[i] is alert:
+                    del prices[i], alerts[i]
+                    break
+            return True
+
+    def levels(self, symbol):
+        return list(self._alerts.get(symbol, ()))
+
+    def symbols(self):
+        """Symbols with at least one armed alert (what a price feed needs to watch)"""
+        return [s for s, p in self._prices.items() if p]
+
+    def on_tick(self, symbol, price, ts=None):
+        """Feed one price; fires and returns the AlertEvents for every crossed level"""
+        with self._lock:
+            prev = self._last.get(symbol)
+            self._last[symbol] = price
+            prices = self._prices.get(symbol)
+            if prev is None or not prices or price == prev:
+                return []
+            if price > prev:
+                direction = 'up'
+                lo, hi = bisect.bisect_right(prices, prev), bisect.bisect_right(prices, price)
+            else:
+                direction = 'down'
+                lo, hi = bisect.bisect_left(prices, price), bisect.bisect_left(prices, prev)
+            if lo == hi:
+                return []
+            alerts = self._alerts[symbol]
+            ts = time.time() if ts is None else ts
+            fired, keep_p, keep_a = [], [], []
+            for i in range(lo, hi):
+                a = alerts[i]
+                if a.direction in ('any', direction):
+                    fired.append(AlertEvent(a, price, prev, direction, ts))
+                    if a.once:
+                        self._by_id.pop(a.id, None)
+                        continue
+                keep_p.append(prices[i])
+                keep_a.append(a)
+            prices[lo:hi] = keep_p
+            alerts[lo:hi] = keep_a
+        for ev in fired:
+            self._dispatch(ev)
+        return fired
+
+    def _dispatch(self, event):
+        for n in self.notifiers:
+            try:
+                n.notify(event)
+            except Exception as e:
+                print(f"Alert notifier error: {e}")
@@ -3,11 +3,61 @@ API Manager for Crypto Trading Calculator
 Handles connections to multiple exchanges
 """
 
+import time
+import json
+import threading
 import requests
 from datetime import datetime
+from urllib.parse import urlsplit, quote
 
-class APIManager:
+from metrics import FETCH_LATENCY, FETCH_TOTAL, PRICE_CACHE
+
+class PriceCache:
+    """Last price per (exchange, symbol), shared by every APIManager in the process"""
     def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, exchange, symbol, max_age):
+        entry = self._data.get((exchange, symbol))
+        if entry and time.monotonic() - entry[0] <= max_age:
+            return entry[1]
+        return None
+
+    def put(self, exchange, symbol, price):
+        with self._lock:
+            self._data[(exchange, symbol)] = (time.monotonic(), price)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+price_cache = PriceCache()
+
+# Seconds before an exchange request gives up
+HTTP_TIMEOUT = 10
+
+# Returned by APIManager._daemon_call when no daemon answered
+_NO_DAEMON = object()
+
+# exchange -> (header, kind, limit): 'used' headers count consumed weight, 'remaining' count what is left
+RATE_HEADERS = {
+    'Binance': ('X-MBX-USED-WEIGHT-1M', 'used', 6000),
+    'MEXC': ('X-MBX-USED-WEIGHT-1M', 'used', 500),
+    'Bybit': ('X-Bapi-Limit-Status', 'remaining', 'X-Bapi-Limit'),
+    'Gate.io': ('X-Gate-RateLimit-Requests-Remain', 'remaining', 'X-Gate-RateLimit-Limit'),
+}
+
+class APIManager:
+    def __init__(self, cache_ttl=2.0, cache=None, use_daemon=True):
+        self.cache_ttl = cache_ttl
+        self.cache = cache if cache is not None else price_cache
+        # Ask a running price_daemon first; direct fetching is the fallback
+        self.use_daemon = use_daemon
+        # When set (e.g. "http://127.0.0.1:8765"), every request goes to this host instead
+        self.base_url_override = None
+        # exchange -> fraction of the rate limit still available (from response headers)
+        self.rate_headroom = {}
         self.exchanges = {
             'Binance': 'https://api.binance.com/api/v3/ticker/price?symbol=',
             'Bybit': 'https://api.bybit.com/v2/public/tickers?symbol=',
@@ -29,7 +79,7 @@ class APIManager:
             
             # DeFi Tokens
             'AAVEUSDT', 'MKRUSDT', 'COMPUSDT', 'SNXUSDT', 'CRVUSDT',
-            'SUSHIUSDT', '1INCHUSDT', 'YFIUSDT', 'BALUSDT', 'UMAUMA',
+            'SUSHIUSDT', '1INCHUSDT', 'YFIUSDT', 'BALUSDT', 'UMAUSDT',
             'BANDUSDT', 'LRCUSDT', 'KSMUSDT', 'CAKEUSDT', 'LUNAUSDT',
             
             # Layer 1 Blockchains
@@ -43,26 +93,26 @@ class APIManager:
             
             # Meme Coins
             'SHIBUSDT', 'PEPEUSDT', 'FLOKIUSDT', 'BONKUSDT', 'WIFUSDT',
-            'DOGENUSDT', 'SATSUSDT', 'RATSUSDT', 'MEMEUSDT', 'NEIRO',
-            'TRUMPUSDT', 'MYROUSH', 'BOMEUSDT', 'MEWUSDT', 'MOGUSD',
+            'DOGENUSDT', 'SATSUSDT', 'RATSUSDT', 'MEMEUSDT', 'NEIROUSDT',
+            'TRUMPUSDT', 'MYROUSDT', 'BOMEUSDT', 'MEWUSDT', 'MOGUSDT',
             
             # Gaming & Metaverse
             'AXSUSDT', 'SANDUSDT', 'MANAUSDT', 'ENJUSDT', 'GALAUSDT',
-            'IMXUSDT', 'GMTUSDT', 'APEUSD T', 'BLZUSDT', 'ALICEUSDT',
+            'IMXUSDT', 'GMTUSDT', 'APEUSDT', 'BLZUSDT', 'ALICEUSDT',
             'TLMUSDT', 'YGGUSDT', 'SLPUSDT', 'PAXGUSDT', 'RONINUSDT',
-            'PIXELUSDT', 'BEAMU SDT', 'WAXPUSDT', 'ILVUSDT', 'XETAUSDT',
+            'PIXELUSDT', 'BEAMUSDT', 'WAXPUSDT', 'ILVUSDT', 'XETAUSDT',
             
             # AI & Big Data
-            'AGIXUSDT', 'FETUSDT', 'OCEANUSDT', 'RNDRTU SDT', 'GRTUSDT',
+            'AGIXUSDT', 'FETUSDT', 'OCEANUSDT', 'RNDRUSDT', 'GRTUSDT',
             'NMRUSDT', 'RLCUSDT', 'IQUSDT', 'AIUSDT', 'PHBUSDT',
-            'CTXCUSDT', 'VITEUSDT', 'COTIUSDT', 'ATAUSH', 'NKNUS DT',
+            'CTXCUSDT', 'VITEUSDT', 'COTIUSDT', 'ATAUSDT', 'NKNUSDT',
             
             # NFT Tokens
-            'BLURUSH', 'LOOKSUSDT', 'X2Y2USDT', 'SUPERUSDT', 'RAREUSDT',
+            'BLURUSDT', 'LOOKSUSDT', 'X2Y2USDT', 'SUPERUSDT', 'RAREUSDT',
             'THETAUSDT', 'CHZUSDT', 'NFTUSDT', 'AUCTIONUSDT', 'DEWUSDT',
             
             # Exchange Tokens
-            'BNBUSDT', 'CROUS DT', 'FTTUSDT', 'OKBUSDT', 'HTUSDT',
+            'BNBUSDT', 'CROUSDT', 'FTTUSDT', 'OKBUSDT', 'HTUSDT',
             'KCSUSDT', 'GTUSDT', 'MXUSDT', 'BTTUSDT', 'WBETHUSDT',
             
             # Stablecoins & Wrapped
@@ -70,47 +120,126 @@ class APIManager:
             'WBTCUSDT', 'WETHUSDT', 'STETHUSDT', 'FRAXUSDT', 'USTCUSDT',
             
             # Oracle & Data
-            'LINKUSDT', 'BANDUSDT', 'TRBUS DT', 'DIAUSDT', 'APIUSDT',
+            'LINKUSDT', 'BANDUSDT', 'TRBUSDT', 'DIAUSDT', 'APIUSDT',
             
             # Privacy Coins
             'XMRUSDT', 'ZECUSDT', 'DASHUSDT', 'SCRTUSDT', 'XVGUSDT',
             
             # Storage & Infrastructure
             'FILUSDT', 'ARUSDT', 'STORJUSDT', 'IOTXUSDT', 'BTTUSDT',
-            'SCUSDT', 'ANKRUSDT', 'CKBUSDT', 'BLZUSDT', 'CELRUS DT',
+            'SCUSDT', 'ANKRUSDT', 'CKBUSDT', 'BLZUSDT', 'CELRUSDT',
             
             # Real World Assets
-            'ONDOUSDT', 'RIOUSH', 'TRUSDT', 'GOLDUSDT', 'PAXGUSDT',
+            'ONDOUSDT', 'RIOUSDT', 'TRUSDT', 'GOLDUSDT', 'PAXGUSDT',
             
             # Social & Content
-            'STEEMUSDT', 'HIVEUSD T', 'MASKUSDT', 'RALLYUSDT', 'CHZUSDT',
+            'STEEMUSDT', 'HIVEUSDT', 'MASKUSDT', 'RALLYUSDT', 'CHZUSDT',
             
             # New Trending (2024-2025)
-            'JUPUSDT', 'WUSDT', 'PYTHUSDT', 'DYMUSH', 'ALTUSDT',
+            'JUPUSDT', 'WUSDT', 'PYTHUSDT', 'DYMUSDT', 'ALTUSDT',
             'TIAUSDT', 'XAIUSDT', 'ACEUSDT', 'NFPUSDT', 'AIUSDT',
             'PORTALUSDT', 'PDAUSDT', 'BOMEUSDT', 'ETHFIUSDT', 'ENAUSDT',
             
             # Additional Popular
             'CELOUSDT', 'WAVESUSDT', 'ONTUSDT', 'RVNUSDT', 'KAVAUSDT',
             'ZILUSDT', 'ICXUSDT', 'IOSTUSDT', 'OMGUSDT', 'OGNUSDT',
-            'LSKUSDT', 'ZENUSDT', 'QTUMUS DT', 'BATUSDT', 'REPUSDT',
+            'LSKUSDT', 'ZENUSDT', 'QTUMUSDT', 'BATUSDT', 'REPUSDT',
         ]
+        # Categories overlap; keep first occurrence only and sort once
+        self.symbols = list(dict.fromkeys(self.symbols))
+        self._sorted_symbols = sorted(self.symbols)
         
-    def get_available_symbols(self):
-        """Return list of available trading symbols"""
-        return sorted(self.symbols)
+    def _http_get(self, url, exchange, endpoint, timeout=HTTP_TIMEOUT):
+        """requests.get with latency/outcome metrics per exchange and endpoint"""
+        if self.base_url_override:
+            parts = urlsplit(url)
+            url = self.base_url_override + url[len(f"{parts.scheme}://{parts.netloc}"):]
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, timeout=timeout)
+        except Exception:
+            FETCH_TOTAL.inc(exchange=exchange, endpoint=endpoint, outcome='error')
+            raise
+        finally:
+            FETCH_LATENCY.observe(time.perf_counter() - start, exchange=exchange, endpoint=endpoint)
+        outcome = 'ok' if response.status_code == 200 else 'http_error'
+        FETCH_TOTAL.inc(exchange=exchange, endpoint=endpoint, outcome=outcome)
+        self._track_rate_limit(exchange, response)
+        return response
+
+    def _track_rate_limit(self, exchange, response):
+        spec = RATE_HEADERS.get(exchange)
+        headers = getattr(response, 'headers', None)
+        if not spec or not headers or headers.get(spec[0]) is None:
+            return
+        header, kind, limit = spec
+        try:
+            value = float(headers[header])
+            limit = float(headers.get(limit, 0) if isinstance(limit, str) else limit)
+        except (TypeError, ValueError):
+            return
+        if limit > 0:
+            left = limit - value if kind == 'used' else value
+            self.rate_headroom[exchange] = max(0.0, min(1.0, left / limit))
+
+    def _daemon(self):
+        """price_daemon client, or None when disabled or pointed at a stand-in host"""
+        if not self.use_daemon or self.base_url_override:
+            return None
+        import price_daemon
+        return price_daemon.get_client()
+
+    def get_available_symbols(self, exchange=None, index=None):
+        """
+        Return list of available trading symbols
+        With a loaded symbol_info.SymbolIndex, only symbols trading on exchange are kept
+        """
+        if exchange and index is not None and index.loaded(exchange):
+            return [s for s in self._sorted_symbols if index.is_valid(exchange, s)]
+        return list(self._sorted_symbols)
     
-    def get_price(self, exchange, symbol):
+    def get_price(self, exchange, symbol, max_age=None):
         """
         Get current price for symbol from specified exchange
+        Prices younger than max_age (default cache_ttl) seconds come from the shared cache
         Returns: float price or None if error
         """
+        max_age = self.cache_ttl if max_age is None else max_age
+        if max_age > 0:
+            cached = self.cache.get(exchange, symbol, max_age)
+            if cached is not None:
+                PRICE_CACHE.inc(outcome='hit')
+                return cached
+            PRICE_CACHE.inc(outcome='miss')
+        price = self._daemon_call('get_price', exchange, symbol, max_age)
+        if price is _NO_DAEMON:
+            price = self._fetch_price(exchange, symbol)
+        if price is not None:
+            self.cache.put(exchange, symbol, price)
+        return price
+
+    def _daemon_call(self, method, *args):
+        """Call a PriceDaemonClient method; _NO_DAEMON when there is no daemon to ask"""
+        client = self._daemon()
+        if client is None:
+            return _NO_DAEMON
+        from price_daemon import DaemonUnavailable
+        try:
+            result = getattr(client, method)(*args)
+        except DaemonUnavailable:
+            return _NO_DAEMON
+        headroom = client.rate_headroom.get(args[0]) if args else None
+        if headroom is not None:
+            self.rate_headroom[args[0]] = headroom
+        return result
+
+    def _fetch_price(self, exchange, symbol):
         try:
             if exchange not in self.exchanges:
                 return None
             
             url = self.exchanges[exchange] + symbol
-            response = requests.get(url, timeout=10)
+            response = self._http_get(url, exchange, 'price')
             
             if response.status_code == 200:
                 data = response.json()
@@ -139,20 +268,82 @@ class APIManager:
                     if 'data' in data and 'ticker' in data['data']:
                         return float(data['data']['ticker']['last'])
         except Exception as e:
+            if not isinstance(e, requests.RequestException):
+                FETCH_TOTAL.inc(exchange=exchange, endpoint='price', outcome='parse_error')
             print(f"Error fetching price from {exchange}: {e}")
             return None
         
         return None
     
+    def get_prices(self, exchange, symbols, max_age=None):
+        """
+        Prices for several symbols on one exchange with a single request where the exchange allows it
+        Returns: {symbol: price} (symbols that couldn't be priced are left out)
+        """
+        max_age = self.cache_ttl if max_age is None else max_age
+        out, missing = {}, []
+        for sym in dict.fromkeys(symbols):
+            cached = self.cache.get(exchange, sym, max_age) if max_age > 0 else None
+            if cached is not None:
+                out[sym] = cached
+            else:
+                missing.append(sym)
+        if len(missing) <= 1:
+            for sym in missing:
+                price = self.get_price(exchange, sym, max_age)
+                if price is not None:
+                    out[sym] = price
+            return out
+        fetched = self._daemon_call('get_prices', exchange, missing, max_age)
+        if fetched is _NO_DAEMON:
+            fetched = self._fetch_prices(exchange, missing)
+        for sym, price in fetched.items():
+            if price is not None:
+                self.cache.put(exchange, sym, price)
+                out[sym] = price
+        return out
+
+    def _fetch_prices(self, exchange, symbols):
+        from screener import BULK_ENDPOINTS
+        from symbol_info import normalize
+        try:
+            if exchange == 'Binance':
+                # Explicit symbol list: request weight stays at 4 however many symbols are asked for
+                url = "https://api.binance.com/api/v3/ticker/price?symbols=" + quote(json.dumps(list(symbols), separators=(',', ':')))
+                r = self._http_get(url, exchange, 'prices')
+                if r.status_code == 400:
+                    # One unknown symbol fails the whole batch; price them one by one instead
+                    return {s: self._fetch_price(exchange, s) for s in symbols}
+                if r.status_code != 200:
+                    return {}
+                return {d['symbol']: float(d['price']) for d in r.json()}
+            if exchange not in BULK_ENDPOINTS:
+                return {s: self._fetch_price(exchange, s) for s in symbols}
+            url, parse = BULK_ENDPOINTS[exchange]
+            r = self._http_get(url, exchange, 'prices')
+            if r.status_code != 200:
+                return {}
+            wanted = {normalize(s): s for s in symbols}
+            return {wanted[n]: row[1] for row in parse(r.json())
+                    if (n := normalize(row[0])) in wanted and row[1] == row[1]}
+        except Exception as e:
+            if not isinstance(e, requests.RequestException):
+                FETCH_TOTAL.inc(exchange=exchange, endpoint='prices', outcome='parse_error')
+            print(f"Error fetching prices from {exchange}: {e}")
+            return {}
+
     def get_24h_stats(self, exchange, symbol):
         """
         Get 24h statistics (high, low, volume, change)
         Returns: dict with stats or None
         """
+        stats = self._daemon_call('get_24h_stats', exchange, symbol)
+        if stats is not _NO_DAEMON:
+            return stats
         try:
             if exchange == 'Binance':
                 url = f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}"
-                response = requests.get(url, timeout=10)
+                response = self._http_get(url, exchange, '24h')
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -163,6 +354,8 @@ class APIManager:
                         'change': float(data['priceChangePercent'])
                     }
         except Exception as e:
+            if not isinstance(e, requests.RequestException):
+                FETCH_TOTAL.inc(exchange=exchange, endpoint='24h', outcome='parse_error')
             print(f"Error fetching 24h stats: {e}")
             return None
         
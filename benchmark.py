@@ -0,0 +1,311 @@
+"""
+Offline benchmark suite for Crypto Trading Calculator
+
+Measures the hot paths (sizing math, history storage, JSON load, price fetch
+against a local mock exchange, chart rendering, trade memory footprint, paper
+trading tick throughput) and stores the results as JSON so runs from different
+versions can be compared.
+
+Usage:
+    python benchmark.py -o bench.json
+    python benchmark.py --quick -o new.json --compare bench.json --threshold 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime
+
+# Charts must render without a display
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+QUICK_SIZES = (1_000, 10_000)
+
+
+def measure(fn, repeat=5, number=1):
+    """Run fn number times per round, repeat rounds; seconds per call"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - start) / number)
+    return {
+        'median': statistics.median(runs),
+        'min': min(runs),
+        'mean': statistics.fmean(runs),
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+def _fake_trades(n, seed=42, months=12):
+    """n trades spread over the last `months` months, the current one included"""
+    rnd = random.Random(seed)
+    syms = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'BNBUSDT', 'XRPUSDT']
+    now = datetime.now()
+    periods = [(m // 12, m % 12 + 1) for m in range(now.year * 12 + now.month - months, now.year * 12 + now.month)]
+    return [
+        {"d": "{:04d}-{:02d}-{:02d} 12:00".format(*periods[i % months], 1 + i % min(28, now.day)), "sym": syms[i % 5],
+         "p": round(rnd.uniform(50, 5000), 2), "r": round(rnd.uniform(1, 50), 2)}
+        for i in range(n)
+    ]
+
+
+def bench_calc(results, quick=False):
+    from sizing import calc_position
+    n = 10_000 if quick else 100_000
+    rnd = random.Random(1)
+    setups = [(1000.0, 1.0, e, e * rnd.uniform(0.9, 0.99), 10.0)
+              for e in (rnd.uniform(1, 100_000) for _ in range(n))]
+
+    def run():
+        for s in setups:
+            calc_position(*s)
+    r = measure(run, repeat=5)
+    r['per_call'] = r['median'] / n
+    results['calc.calc_position'] = r
+
+
+def bench_history(results, sizes, workdir):
+    from main import History
+    from trade_history import TradeHistory
+    today = datetime.now().strftime("%Y-%m-%d %H:%M")
+    for n in sizes:
+        path = os.path.join(workdir, f"history_{n}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(_fake_trades(n), f)
+        adds = 3 if n >= 1_000_000 else 5
+
+        # First open moves past months into compressed segments (one-time), later opens are cold starts
+        results[f'history.archive[{n}]'] = measure(lambda: History(path), repeat=1)
+        results[f'history.cold_start[{n}]'] = measure(lambda: History(path), repeat=3)
+
+        # Adds rewrite the live file, so time them against n trades that all stay live
+        live_path = os.path.join(workdir, f"history_live_{n}.json")
+        trades = _fake_trades(n, months=1)
+        with open(live_path, 'w', encoding='utf-8') as f:
+            json.dump(trades, f)
+        h = History(live_path)
+        results[f'history.add[{n}]'] = measure(
+            lambda: h.add({"d": today, "sym": "BTCUSDT", "p": 1.0, "r": 0.1}), repeat=adds)
+
+        with open(live_path, 'w', encoding='utf-8') as f:
+            json.dump([dict(t, timestamp=t['d'] + ':00') for t in trades], f)
+        th = TradeHistory(live_path)
+        results[f'tradehistory.add_trade[{n}]'] = measure(
+            lambda: th.add_trade({"symbol": "BTCUSDT", "position_size": 1.0}), repeat=adds)
+        del h, th, trades
+
+
+def bench_fetch(results, quick=False):
+    from api_manager import APIManager
+    from mock_exchange import MockExchangeServer, point_api_at
+    calls = 50 if quick else 200
+    with MockExchangeServer() as srv:
+        api = point_api_at(APIManager(cache_ttl=0), srv.base_url)
+        for ex in api.exchanges:
+            lat = []
+            for _ in range(calls):
+                start = time.perf_counter()
+                api.get_price(ex, 'BTCUSDT')
+                lat.append(time.perf_counter() - start)
+            lat.sort()
+            results[f'fetch.get_price[{ex}]'] = {
+                'median': statistics.median(lat),
+                'min': lat[0],
+                'mean': statistics.fmean(lat),
+                'p95': lat[int(0.95 * (len(lat) - 1))],
+                'repeat': calls,
+                'number': 1,
+            }
+
+
+def bench_charts(results, quick=False):
+    import matplotlib.pyplot as plt
+    from chart_generator import ChartGenerator
+    cg = ChartGenerator()
+
+    def pnl():
+        fig = cg.create_pnl_chart(98000, 96000, [100000, 102000, 105000], 'LONG', 'dark')
+        fig.canvas.draw()
+        plt.close(fig)
+
+    n = 200 if quick else 1000
+    trades = [{'tp_results': [{'profit': random.uniform(-50, 80)}]} for _ in range(n)]
+
+    def hist():
+        fig = cg.create_trade_history_chart(trades, 'light')
+        fig.canvas.draw()
+        plt.close(fig)
+
+    results['chart.pnl'] = measure(pnl, repeat=3)
+    results[f'chart.history[{n}]'] = measure(hist, repeat=3)
+
+
+def bench_alerts(results, quick=False):
+    from alerts import AlertEngine
+    rnd = random.Random(7)
+    syms = [f"SYM{i}USDT" for i in range(200)]
+    engine = AlertEngine()
+    for s in syms:
+        for _ in range(50):
+            engine.add(s, rnd.uniform(90, 110), once=False)
+    n = 20_000 if quick else 200_000
+    ticks = []
+    px = dict.fromkeys(syms, 100.0)
+    for i in range(n):
+        s = syms[i % len(syms)]
+        px[s] *= 1 + rnd.gauss(0, 0.001)
+        ticks.append((s, px[s]))
+
+    def run():
+        for s, p in ticks:
+            engine.on_tick(s, p)
+    r = measure(run, repeat=3)
+    r['per_call'] = r['median'] / n
+    results[f'alerts.on_tick[{len(engine)}]'] = r
+
+
+def bench_paper(results, quick=False):
+    """Paper-trading ticks/s: one tick at a time (live feed) and run() over an array (replay)"""
+    import numpy as np
+    from paper_trading import PaperEngine
+    n = 100_000 if quick else 1_000_000
+    rng = np.random.default_rng(7)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 1e-4, n)))
+    levels = prices[0] * (1 + rng.uniform(-0.05, 0.05, 500))
+
+    def engine():
+        e = PaperEngine(1e9, 0.1)
+        e.on_tick('SYMUSDT', float(prices[0]))
+        for lv in levels:
+            e.place('SYMUSDT', 'buy' if lv < prices[0] else 'sell', 1.0, 'limit', float(lv), leverage=2)
+        return e
+    ticks = prices.tolist()
+
+    def one_by_one():
+        e = engine()
+        for p in ticks:
+            e.on_tick('SYMUSDT', p)
+    r = measure(one_by_one, repeat=3)
+    r['per_call'] = r['median'] / n
+    results[f'paper.on_tick[{n}]'] = r
+    r = measure(lambda: engine().run('SYMUSDT', prices), repeat=3)
+    r['per_call'] = r['median'] / n
+    results[f'paper.run[{n}]'] = r
+
+
+def bench_memory(results, sizes):
+    """Resident size and aggregation speed of list-of-dicts vs TradeStore at the largest size"""
+    import gc
+    import tracemalloc
+    from trade_store import TradeStore
+    n = max(sizes)
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    trades = _fake_trades(n)
+    dict_bytes = tracemalloc.get_traced_memory()[0] - base
+    base = tracemalloc.get_traced_memory()[0]
+    store = TradeStore.from_dicts(trades)
+    store_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    def dict_by_symbol():
+        out = {}
+        for t in trades:
+            out[t['sym']] = out.get(t['sym'], 0.0) + t['p']
+        return out
+
+    results[f'trades.dicts.by_symbol[{n}]'] = dict(measure(dict_by_symbol, repeat=3), bytes=dict_bytes)
+    results[f'trades.store.by_symbol[{n}]'] = dict(measure(lambda: store.by_symbol('p'), repeat=3), bytes=store_bytes)
+    results[f'trades.store.build[{n}]'] = measure(lambda: TradeStore.from_dicts(trades), repeat=1)
+    del trades, store
+
+
+def compare(current, baseline, threshold):
+    """Return [(name, old, new, ratio)] for every benchmark slower than 1 + threshold"""
+    regressions = []
+    for name, new in current['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if not old or not old.get('median'):
+            continue
+        ratio = new['median'] / old['median']
+        if ratio > 1 + threshold:
+            regressions.append((name, old['median'], new['median'], ratio))
+    return regressions
+
+
+def run(sizes, quick=False, only=None):
+    from main import VERSION
+    results = {}
+    suites = {
+        'calc': lambda: bench_calc(results, quick),
+        'history': lambda: bench_history(results, sizes, workdir),
+        'fetch': lambda: bench_fetch(results, quick),
+        'chart': lambda: bench_charts(results, quick),
+        'alerts': lambda: bench_alerts(results, quick),
+        'memory': lambda: bench_memory(results, sizes),
+        'paper': lambda: bench_paper(results, quick),
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, fn in suites.items():
+            if only and name not in only:
+                continue
+            print(f"- {name} ...", file=sys.stderr)
+            fn()
+    return {
+        'version': VERSION,
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Crypto Trading Calculator benchmarks")
+    ap.add_argument('-o', '--output', help="write results JSON here")
+    ap.add_argument('--compare', help="baseline results JSON to compare against")
+    ap.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown ratio (0.2 = 20%%)")
+    ap.add_argument('--sizes', help="comma separated history sizes (default 10000,100000,1000000)")
+    ap.add_argument('--quick', action='store_true', help="small sizes for a fast smoke run")
+    ap.add_argument('--only', help="comma separated suites: calc,history,fetch,chart,alerts,memory,paper")
+    args = ap.parse_args(argv)
+
+    sizes = QUICK_SIZES if args.quick else DEFAULT_SIZES
+    if args.sizes:
+        sizes = tuple(int(x) for x in args.sizes.split(','))
+    only = set(args.only.split(',')) if args.only else None
+
+    report = run(sizes, args.quick, only)
+    for name, r in report['results'].items():
+        mem = f" {r['bytes'] / 1e6:10.1f} MB" if 'bytes' in r else ""
+        print(f"{name:40s} {r['median'] * 1000:12.3f} ms{mem}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, old, new, ratio in regressions:
+            print(f"REGRESSION {name}: {old * 1000:.3f} ms -> {new * 1000:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions over {args.threshold:.0%} vs {baseline.get('version', '?')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,19 @@
+import os
+import matplotlib
+# Respect MPLBACKEND so charts can be rendered headless (e.g. MPLBACKEND=Agg)
+if not os.environ.get('MPLBACKEND'):
+    matplotlib.use('TkAgg')
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib
-matplotlib.use('TkAgg')
+
+from metrics import CHART_RENDER, timed
 
 class ChartGenerator:
     def __init__(self):
         self.fig = None
         self.canvas = None
     
+    @timed(CHART_RENDER, chart='pnl')
     def create_pnl_chart(self, entry_price, stop_loss, take_profits, position_type='LONG', theme='light'):
         """Create profit/loss chart"""
         # Set style based on theme
@@ -73,6 +79,7 @@ class ChartGenerator:
         plt.tight_layout()
         return self.fig
     
+    @timed(CHART_RENDER, chart='history')
     def create_trade_history_chart(self, trades, theme='light'):
         """Create chart showing trade history performance"""
         if not trades:
@@ -0,0 +1,212 @@
+"""
+Headless position sizing for scripts and bots
+
+Reads trade setups as CSV or JSON Lines (file or stdin), streams sized
+results to stdout in the same order.
+
+    python cli.py setups.csv
+    cat setups.jsonl | python cli.py --capital 5000 --risk 0.5 -f csv
+    python cli.py setups.csv --live --exchange Binance --workers 4
+    python main.py --cli setups.csv
+
+Columns: symbol, entry, sl (or stop_loss), leverage (or lev), risk (or risk_percent),
+capital. Missing values fall back to the command line defaults; with --live an
+empty entry (or "live") is filled with the current exchange price.
+"""
+
+import io
+import os
+import sys
+import csv
+import json
+import argparse
+from itertools import chain, islice
+from multiprocessing import Pool
+
+from sizing import calc_position
+
+ALIASES = {
+    'stop_loss': 'sl', 'lev': 'leverage', 'risk_percent': 'risk',
+    'entry_price': 'entry', 'price': 'entry',
+}
+OUTPUT_FIELDS = ['symbol', 'entry', 'sl', 'leverage', 'risk', 'capital', 'position_size', 'qty', 'risk_amount', 'error']
+
+
+def _num(value, default=None):
+    if value is None or value == '':
+        return default
+    return float(value)
+
+
+def size_row(row, defaults):
+    """Size one setup dict; returns an output dict (with 'error' on bad input)"""
+    if not isinstance(row, dict):
+        return {'symbol': '', 'error': "setup must be an object"}
+    if '_error' in row:
+        return {'symbol': '', 'error': row['_error']}
+    row = {ALIASES.get(k.strip().lower(), k.strip().lower()): v for k, v in row.items() if k}
+    out = {'symbol': row.get('symbol', '')}
+    try:
+        entry = _num(row.get('entry'))
+        sl = _num(row.get('sl'))
+        lev = _num(row.get('leverage'), defaults['leverage'])
+        risk = _num(row.get('risk'), defaults['risk'])
+        capital = _num(row.get('capital'), defaults['capital'])
+        if entry is None or sl is None:
+            raise ValueError("entry and sl are required")
+        if entry <= 0 or entry == sl:
+            raise ValueError("entry must be positive and differ from sl")
+        pos, qty, ramt = calc_position(capital, risk, entry, sl, lev)
+        out.update(entry=entry, sl=sl, leverage=lev, risk=risk, capital=capital,
+                   position_size=round(pos, 8), qty=round(qty, 8), risk_amount=round(ramt, 8))
+    except (TypeError, ValueError) as e:
+        out['error'] = str(e)
+    return out
+
+
+_csv_buf = io.StringIO()
+_csv_writer = csv.DictWriter(_csv_buf, fieldnames=OUTPUT_FIELDS, extrasaction='ignore', lineterminator='\n')
+
+
+def format_result(res, out_fmt):
+    if out_fmt == 'csv':
+        _csv_buf.seek(0)
+        _csv_buf.truncate()
+        _csv_writer.writerow(res)
+        return _csv_buf.getvalue()
+    return json.dumps(res) + '\n'
+
+
+def _size_lines(args):
+    """Worker: parse, size and format a chunk of raw input lines"""
+    lines, fmt, fieldnames, defaults, out_fmt = args
+    rows = read_rows(iter(lines), fmt) if fmt == 'jsonl' else csv.DictReader(lines, fieldnames=fieldnames)
+    parts, failed = [], 0
+    for row in rows:
+        res = size_row(row, defaults)
+        failed += 'error' in res
+        parts.append(format_result(res, out_fmt))
+    return ''.join(parts), failed
+
+
+def read_rows(stream, fmt='auto'):
+    """Yield setup dicts lazily from CSV or JSON Lines"""
+    if fmt == 'auto':
+        first = ''
+        for first in stream:
+            if first.strip():
+                break
+        fmt = 'jsonl' if first.lstrip().startswith('{') else 'csv'
+        stream = chain([first], stream)
+    if fmt == 'jsonl':
+        for line in stream:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield {'symbol': '', '_error': f"bad json: {e}"}
+    else:
+        yield from csv.DictReader(stream)
+
+
+def _chunks(it, size):
+    it = iter(it)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _LivePrices:
+    def __init__(self, exchange):
+        from api_manager import APIManager
+        self.api = APIManager()
+        self.exchange = exchange
+        self.cache = {}
+
+    def fill(self, row):
+        if not isinstance(row, dict):
+            return row
+        entry = str(row.get('entry', row.get('price', ''))).strip().lower()
+        sym = row.get('symbol')
+        if sym and entry in ('', 'live', 'none'):
+            if sym not in self.cache:
+                self.cache[sym] = self.api.get_price(row.get('exchange') or self.exchange, sym)
+            if self.cache[sym] is not None:
+                row['entry'] = self.cache[sym]
+        return row
+
+
+def size_stream(rows, defaults):
+    """Yield sized results in input order"""
+    for row in rows:
+        yield size_row(row, defaults)
+
+
+def size_lines_parallel(stream, fmt, defaults, out_fmt, workers, chunk_size=5000):
+    """
+    Fan raw line chunks out to worker processes, which parse, size and format them;
+    yields (text, failed) per chunk in input order
+    """
+    fieldnames = None
+    if fmt == 'csv':
+        fieldnames = next(csv.reader([next(stream, '')]), None)
+    chunks = ((chunk, fmt, fieldnames, defaults, out_fmt) for chunk in _chunks(stream, chunk_size))
+    with Pool(workers) as pool:
+        yield from pool.imap(_size_lines, chunks)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Batch position sizing (CSV / JSON Lines)")
+    ap.add_argument('input', nargs='?', default='-', help="input file, '-' for stdin")
+    ap.add_argument('--format', choices=['auto', 'csv', 'jsonl'], default='auto', help="input format")
+    ap.add_argument('-f', '--output-format', choices=['jsonl', 'csv'], default='jsonl')
+    ap.add_argument('--capital', type=float, default=1000.0)
+    ap.add_argument('--risk', type=float, default=1.0, help="risk percent per trade")
+    ap.add_argument('--leverage', type=float, default=10.0)
+    ap.add_argument('--live', action='store_true', help="fill missing entry prices from the exchange")
+    ap.add_argument('--exchange', default='Binance')
+    ap.add_argument('-j', '--workers', type=int, default=1, help="processes (0 = all cores)")
+    args = ap.parse_args(argv)
+
+    defaults = {'capital': args.capital, 'risk': args.risk, 'leverage': args.leverage}
+    workers = args.workers or os.cpu_count() or 1
+    src = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8-sig', newline='')
+    out = sys.stdout
+
+    fmt = args.format
+    if fmt == 'auto':
+        first = next((line for line in src if line.strip()), '')
+        fmt = 'jsonl' if first.lstrip().startswith('{') else 'csv'
+        src_lines = chain([first], src)
+    else:
+        src_lines = iter(src)
+
+    if args.output_format == 'csv':
+        out.write(','.join(OUTPUT_FIELDS) + '\n')
+    failed = 0
+    try:
+        if workers > 1 and not args.live:
+            for text, n_failed in size_lines_parallel(src_lines, fmt, defaults, args.output_format, workers):
+                out.write(text)
+                failed += n_failed
+        else:
+            rows = read_rows(src_lines, fmt)
+            if args.live:
+                live = _LivePrices(args.exchange)
+                rows = (live.fill(r) for r in rows)
+            for res in size_stream(rows, defaults):
+                failed += 'error' in res
+                out.write(format_result(res, args.output_format))
+        out.flush()
+    except BrokenPipeError:
+        pass
+    finally:
+        if src is not sys.stdin:
+            src.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,65 +1,253 @@
+import copy
 import json
 import os
+import atexit
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
+SCHEMA_VERSION = 2
+
+DEFAULTS = {
+    'capital': 1000,
+    'risk_percent': 1.0,
+    'fee_percent': 0.04,
+    'selected_exchange': 'Binance',
+    'order_type': 'taker',
+    'theme': 'light',
+    'language': 'fa',
+    # Base seconds between live price polls (adapted to volatility and rate limits)
+    'refresh_rate': 5,
+    # API keys per exchange
+    # Format: { "Binance": {"api_key": "...", "api_secret": "..."}, ... }
+    'api_keys': {},
+}
+
+# Old main.py layout -> canonical key
+LEGACY_KEYS = {
+    'risk': 'risk_percent',
+    'fee': 'fee_percent',
+    'exchange': 'selected_exchange',
+    'lang': 'language',
+}
+
+
+def migrate(data):
+    """Bring a config dict from any known layout to SCHEMA_VERSION"""
+    data = dict(data)
+    if data.get('schema_version', 1) < 2:
+        for old, new in LEGACY_KEYS.items():
+            if old in data:
+                value = data.pop(old)
+                data.setdefault(new, value)
+    data['schema_version'] = SCHEMA_VERSION
+    return data
+
+
+class ConfigStore:
+    """
+    In-memory config model backed by a JSON file
+    Changes notify subscribers immediately and are written behind: saves are
+    debounced by `delay` seconds and done via temp file + atomic rename.
+    """
+
+    def __init__(self, path, defaults=None, delay=0.5):
+        self.path = path
+        self.defaults = copy.deepcopy(dict(defaults or DEFAULTS))
+        self.delay = delay
+        self.data = {}
+        self.writes = 0
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._timer = None
+        self._dirty = False
+        self._batch_depth = 0
+        self.load()
+
+    def load(self):
+        raw = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    raw = json.load(f)
+            except Exception:
+                raw = {}
+        with self._lock:
+            migrated = migrate(raw)
+            changed = migrated != raw and raw
+            # Mutable defaults (api_keys) get a fresh copy per load so callers never edit the shared one
+            for key, value in self.defaults.items():
+                if key not in migrated and isinstance(value, (dict, list)):
+                    migrated[key] = copy.deepcopy(value)
+            self.data = migrated
+            if changed:
+                self._mark_dirty()
+        return self.data
+
+    def get(self, key, default=None):
+        if key in self.data:
+            return self.data[key]
+        return self.defaults.get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            old = self.get(key)
+            # Setting the value already in effect (stored or default) is not a change and costs no write
+            if old == value:
+                return
+            self.data[key] = value
+            self._mark_dirty()
+        self._notify(key, old, value)
+
+    def update(self, values=None, **kwargs):
+        with self.batch():
+            for key, value in dict(values or {}, **kwargs).items():
+                self.set(key, value)
+
+    @contextmanager
+    def batch(self):
+        """Group several changes into a single (debounced) write"""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    self._schedule()
+
+    def subscribe(self, callback):
+        """callback(key, old, new) on every change; returns an unsubscribe function"""
+        self._listeners.append(callback)
+        return lambda: self._listeners.remove(callback)
+
+    def _notify(self, key, old, new):
+        for cb in list(self._listeners):
+            try:
+                cb(key, old, new)
+            except Exception:
+                pass
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._batch_depth == 0:
+            self._schedule()
+
+    def _schedule(self):
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """Write pending changes now (no-op when clean)"""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return False
+            payload = json.dumps(self.data, indent=4, ensure_ascii=False)
+            folder = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=folder)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                os.replace(tmp, self.path)
+            except Exception:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            self._dirty = False
+            self.writes += 1
+        return True
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path, defaults=None):
+    """One shared store per config file"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ConfigStore(path, defaults)
+        elif defaults:
+            store.defaults.update(copy.deepcopy(defaults))
+        return store
+
+
+@atexit.register
+def _flush_all():
+    for store in list(_stores.values()):
+        try:
+            store.flush()
+        except Exception:
+            pass
+
+
+def _field(key, cast=None):
+    def fget(self):
+        value = self.store.get(key)
+        return cast(value) if cast else value
+
+    def fset(self, value):
+        self.store.set(key, value)
+    return property(fget, fset)
+
+
 class Config:
-    def __init__(self):
-        self.config_file = 'config.json'
-        self.data = self.load_config()
-
-        # Defaults (kept backward-compatible)
-        self.capital = self.data.get('capital', 1000)
-        self.risk_percent = self.data.get('risk_percent', 1.0)
-        self.fee_percent = self.data.get('fee_percent', 0.04)
-        self.selected_exchange = self.data.get('selected_exchange', 'Binance')
-        self.order_type = self.data.get('order_type', 'taker')
-        self.theme = self.data.get('theme', 'light')
-        self.language = self.data.get('language', 'fa')
-
-        # New: API keys per exchange
-        # Format: { "Binance": {"api_key": "...", "api_secret": "..."}, ... }
-        self.api_keys = self.data.get('api_keys', {})
+    capital = _field('capital', float)
+    risk_percent = _field('risk_percent', float)
+    fee_percent = _field('fee_percent', float)
+    selected_exchange = _field('selected_exchange')
+    order_type = _field('order_type')
+    theme = _field('theme')
+    language = _field('language')
+    refresh_rate = _field('refresh_rate', float)
+    api_keys = _field('api_keys')
+
+    def __init__(self, config_file='config.json', **defaults):
+        self.config_file = config_file
+        self.store = get_store(config_file, dict(DEFAULTS, **defaults))
+
+    @property
+    def data(self):
+        return self.store.data
 
     def load_config(self):
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+        return self.store.load()
+
+    def batch(self):
+        return self.store.batch()
+
+    def subscribe(self, callback):
+        return self.store.subscribe(callback)
 
     def save_config(self, capital, risk_percent, fee_percent, exchange, order_type, theme, language=None):
-        self.capital = capital
-        self.risk_percent = risk_percent
-        self.fee_percent = fee_percent
-        self.selected_exchange = exchange
-        self.order_type = order_type
-        self.theme = theme
-        if language is not None:
-            self.language = language
-
-        self.data.update({
-            'capital': capital,
-            'risk_percent': risk_percent,
-            'fee_percent': fee_percent,
-            'selected_exchange': exchange,
-            'order_type': order_type,
-            'theme': theme,
-            'language': self.language,
-            'api_keys': self.api_keys,
-            'last_updated': datetime.now().isoformat()
-        })
-
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        with self.store.batch():
+            self.capital = capital
+            self.risk_percent = risk_percent
+            self.fee_percent = fee_percent
+            self.selected_exchange = exchange
+            self.order_type = order_type
+            self.theme = theme
+            if language is not None:
+                self.language = language
+            self.store.set('last_updated', datetime.now().isoformat())
         return True
 
     def get_api_credentials(self, exchange):
         return self.api_keys.get(exchange, {'api_key': '', 'api_secret': ''})
 
     def set_api_credentials(self, exchange, api_key, api_secret):
-        self.api_keys[exchange] = {'api_key': api_key or '', 'api_secret': api_secret or ''}
-        # Persist immediately
-        self.save_config(self.capital, self.risk_percent, self.fee_percent, self.selected_exchange, self.order_type, self.theme, self.language)
+        keys = dict(self.api_keys)
+        keys[exchange] = {'api_key': api_key or '', 'api_secret': api_secret or ''}
+        # Persisted by the store's write-behind; several keys in a row cost one write
+        self.api_keys = keys
         return True
@@ -0,0 +1,152 @@
+"""
+Shared download manager for Crypto Trading Calculator
+Streams to a .part file in chunks, resumes with HTTP Range, verifies SHA-256,
+deduplicates concurrent downloads of the same URL and reports progress
+"""
+
+import os
+import time
+import shutil
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+CHUNK_SIZE = 64 * 1024
+# Minimum seconds between progress callbacks (the UI hops each one to its own thread)
+PROGRESS_INTERVAL = 0.1
+
+
+class DownloadError(Exception):
+    pass
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class DownloadManager:
+    def __init__(self, retries=3, timeout=30, chunk_size=CHUNK_SIZE, max_workers=4, progress_interval=PROGRESS_INTERVAL):
+        self.retries = retries
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.progress_interval = progress_interval
+        self.session = requests.Session() if requests else None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def download(self, url, dest, sha256=None, progress=None):
+        """
+        Download url to dest (blocking)
+        progress(done_bytes, total_bytes_or_None) is called from the worker thread,
+        at most every progress_interval seconds plus once at the end
+        Returns dest, raises DownloadError
+        """
+        with self._lock:
+            fut = self._inflight.get(url)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[url] = Future()
+        if not owner:
+            path = fut.result()
+            if os.path.abspath(path) != os.path.abspath(dest):
+                shutil.copyfile(path, dest)
+            return dest
+
+        try:
+            fut.set_result(self._download(url, dest, sha256, progress))
+        except BaseException as e:
+            fut.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+        return fut.result()
+
+    def download_async(self, url, dest, sha256=None, progress=None, callback=None):
+        """Run download() on the pool; callback(path_or_None, error_or_None) when done"""
+        def run():
+            try:
+                path = self.download(url, dest, sha256, progress)
+            except Exception as e:
+                if callback:
+                    callback(None, e)
+                raise
+            if callback:
+                callback(path, None)
+            return path
+        return self._pool.submit(run)
+
+    def _download(self, url, dest, sha256, progress):
+        if self.session is None:
+            raise DownloadError("requests is not installed")
+        part = dest + '.part'
+        last_error = None
+        for attempt in range(self.retries + 1):
+            try:
+                self._stream(url, part, progress)
+                if sha256 and _sha256(part).lower() != sha256.lower():
+                    # Possibly a bad resume; start over from byte zero
+                    os.remove(part)
+                    raise OSError("sha256 mismatch")
+                os.replace(part, dest)
+                return dest
+            except DownloadError:
+                raise
+            except (OSError, requests.RequestException) as e:
+                last_error = e
+                if attempt < self.retries:
+                    time.sleep(min(2 ** attempt, 10) * 0.5)
+        raise DownloadError(f"{url}: {last_error}")
+
+    def _stream(self, url, part, progress):
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = {'Range': f"bytes={offset}-"} if offset else {}
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as r:
+            if r.status_code == 416 and offset:
+                # "Range not satisfiable": complete only if the server's size ("bytes */N") matches the .part
+                size = r.headers.get('Content-Range', '').rpartition('/')[2]
+                if size.isdigit() and int(size) == offset:
+                    if progress:
+                        progress(offset, offset)
+                    return
+                os.remove(part)
+                raise OSError(f"partial file is {offset} bytes, server has {size or 'unknown'}; restarting")
+            if r.status_code == 206 and offset:
+                mode = 'ab'
+            elif r.status_code == 200:
+                mode, offset = 'wb', 0
+            elif r.status_code >= 500:
+                raise OSError(f"HTTP {r.status_code}")
+            else:
+                raise DownloadError(f"{url}: HTTP {r.status_code}")
+            length = r.headers.get('Content-Length')
+            total = offset + int(length) if length and length.isdigit() else None
+            done = offset
+            last_report = 0.0
+            with open(part, mode) as f:
+                for chunk in r.iter_content(self.chunk_size):
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    done += len(chunk)
+                    if progress:
+                        now = time.monotonic()
+                        if now - last_report >= self.progress_interval:
+                            last_report = now
+                            progress(done, total)
+            if progress:
+                progress(done, total)
+            if total is not None and done < total:
+                raise OSError(f"connection closed at {done}/{total} bytes")
+
+
+manager = DownloadManager()
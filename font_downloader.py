@@ -4,12 +4,15 @@ Downloads the beautiful Vazirmatn font if not available
 """
 
 import os
-import requests
-from pathlib import Path
+from downloader import manager, DownloadError
 
 FONT_URL = "https://github.com/rastikerdar/vazirmatn/raw/master/fonts/ttf/Vazirmatn-Regular.ttf"
 FONT_PATH = "Vazirmatn-Regular.ttf"
 
+def _print_progress(done, total):
+    if total:
+        print(f"\r   {done * 100 // total}% ({done // 1024} KB)", end='', flush=True)
+
 def download_font():
     """
     Download Vazirmatn font if it doesn't exist
@@ -20,16 +23,12 @@ def download_font():
     
     try:
         print("📥 Downloading Vazirmatn font...")
-        response = requests.get(FONT_URL, timeout=30)
-        
-        if response.status_code == 200:
-            with open(FONT_PATH, 'wb') as f:
-                f.write(response.content)
-            print(f"✅ Font downloaded successfully: {FONT_PATH}")
-            return True
-        else:
-            print(f"❌ Failed to download font. Status code: {response.status_code}")
-            return False
+        manager.download(FONT_URL, FONT_PATH, progress=_print_progress)
+        print(f"\n✅ Font downloaded successfully: {FONT_PATH}")
+        return True
+    except DownloadError as e:
+        print(f"\n❌ Failed to download font: {e}")
+        return False
     except Exception as e:
         print(f"❌ Error downloading font: {e}")
         return False
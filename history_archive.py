@@ -0,0 +1,249 @@
+"""
+Trade history archival for Crypto Trading Calculator
+
+Trades from past months are moved out of the live history file into one
+gzip-compressed JSON segment per month (<history>.archive/2025-11.json.gz)
+plus a small index.json with per-month counts, totals and date ranges.
+Startup only parses the live file and the index; segments are read lazily
+when older trades are actually needed.
+
+A move is journaled (how long each touched segment was before it) until the
+caller has rewritten the live file, so a crash in between cannot archive the
+same trades twice: the next compact() drops from the live list whatever the
+interrupted run already appended.
+"""
+
+import os
+import re
+import gzip
+import json
+import tempfile
+import threading
+from datetime import datetime
+
+INDEX_NAME = "index.json"
+JOURNAL_NAME = "compact.journal"
+_PERIOD = re.compile(r"^\d{4}-\d{2}$")
+
+
+def _atomic_write(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class HistoryArchive:
+    """
+    Monthly segments for a history file
+    date_key: field holding a 'YYYY-MM-...' date string ('d' in main.History, 'timestamp' in TradeHistory)
+    totals: numeric fields summed per month in the index
+    keep_periods: how many recent months stay in the live file
+    archive_dir: defaults to <history_path>.archive; stores sharing a history file need their own
+    """
+
+    def __init__(self, history_path, date_key, totals=(), keep_periods=1, cache_segments=4, archive_dir=None):
+        self.dir = archive_dir or history_path + ".archive"
+        self.date_key = date_key
+        self.totals = tuple(totals)
+        self.keep_periods = keep_periods
+        self.cache_segments = cache_segments
+        self._cache = {}   # period -> list of trades, most recently used last
+        self._lock = threading.Lock()
+        self.index = self._load_index()
+
+    # ---- index ----
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.dir, INDEX_NAME), 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if raw.get('date_key', self.date_key) != self.date_key:
+            raise ValueError(f"{self.dir} belongs to a history keyed by {raw['date_key']!r}, not {self.date_key!r}")
+        return raw.get('segments', {})
+
+    def _save_index(self):
+        os.makedirs(self.dir, exist_ok=True)
+        data = json.dumps({'date_key': self.date_key, 'segments': self.index}, indent=2).encode('utf-8')
+        _atomic_write(os.path.join(self.dir, INDEX_NAME), data)
+
+    def periods(self):
+        return sorted(self.index)
+
+    def __len__(self):
+        return sum(s['count'] for s in self.index.values())
+
+    def _summarize(self, trades):
+        dates = [str(t.get(self.date_key, '')) for t in trades]
+        seg = {'count': len(trades), 'first': min(dates), 'last': max(dates), 'totals': {}}
+        for k in self.totals:
+            seg['totals'][k] = sum(float(t.get(k) or 0) for t in trades)
+        return seg
+
+    def summary(self, live=()):
+        """Aggregate count/totals/date range over archive + live trades without opening any segment"""
+        segs = list(self.index.values())
+        if live:
+            segs.append(self._summarize(live))
+        out = {'count': 0, 'first': None, 'last': None, 'totals': {k: 0.0 for k in self.totals}}
+        for s in segs:
+            out['count'] += s['count']
+            out['first'] = s['first'] if out['first'] is None else min(out['first'], s['first'])
+            out['last'] = s['last'] if out['last'] is None else max(out['last'], s['last'])
+            for k in self.totals:
+                out['totals'][k] += s['totals'].get(k, 0.0)
+        return out
+
+    # ---- segments ----
+
+    def _period(self, trade):
+        p = str(trade.get(self.date_key, ''))[:7]
+        return p if _PERIOD.match(p) else None
+
+    def _segment_path(self, period):
+        return os.path.join(self.dir, period + ".json.gz")
+
+    def _read_segment(self, period):
+        try:
+            with gzip.open(self._segment_path(period), 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load_segment(self, period):
+        """Trades of one archived month (cached); [] if unknown"""
+        with self._lock:
+            if period in self._cache:
+                trades = self._cache.pop(period)
+                self._cache[period] = trades
+                return trades
+        if period not in self.index:
+            return []
+        trades = self._read_segment(period)
+        if trades is None:
+            return []
+        with self._lock:
+            self._cache[period] = trades
+            while len(self._cache) > self.cache_segments:
+                self._cache.pop(next(iter(self._cache)))
+        return trades
+
+    def _write_segment(self, period, trades):
+        data = gzip.compress(json.dumps(trades, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        _atomic_write(self._segment_path(period), data)
+        self.index[period] = self._summarize(trades)
+        with self._lock:
+            self._cache.pop(period, None)
+
+    # ---- journal ----
+
+    def _journal_path(self):
+        return os.path.join(self.dir, JOURNAL_NAME)
+
+    def _load_journal(self):
+        try:
+            with open(self._journal_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _recover(self, trades, journal):
+        """Drop from trades what an interrupted compact() already appended to its segments"""
+        appended = {}
+        for period, before in journal.items():
+            # Read past the index: the run may have died between writing a segment and the index
+            segment = self._read_segment(period) or []
+            if len(segment) > before:
+                self.index[period] = self._summarize(segment)
+                with self._lock:
+                    self._cache.pop(period, None)
+            for t in segment[before:]:
+                k = json.dumps(t, sort_keys=True)
+                appended[k] = appended.get(k, 0) + 1
+        if not appended:
+            return trades
+        self._save_index()
+        live = []
+        for t in trades:
+            k = json.dumps(t, sort_keys=True) if self._period(t) in journal else None
+            if appended.get(k):
+                appended[k] -= 1
+            else:
+                live.append(t)
+        return live if len(live) != len(trades) else trades
+
+    def compact(self, trades, now=None, save=None):
+        """
+        Move trades older than the last keep_periods months into segments
+        save(live) must rewrite the live file; it is called only when the live list changed
+        Returns the trades that stay live (same list object when nothing moved)
+        """
+        journal = self._load_journal()
+        original = trades
+        if journal:
+            trades = self._recover(trades, journal)
+        now = now or datetime.now()
+        m = now.year * 12 + now.month - 1 - (self.keep_periods - 1)
+        cutoff = f"{m // 12:04d}-{m % 12 + 1:02d}"
+        old = {}
+        live = []
+        for t in trades:
+            p = self._period(t)
+            if p is not None and p < cutoff:
+                old.setdefault(p, []).append(t)
+            else:
+                live.append(t)
+        if old:
+            os.makedirs(self.dir, exist_ok=True)
+            for period in old:
+                # An older entry from an unfinished run covers that run's trades as well
+                journal.setdefault(period, self.index.get(period, {}).get('count', 0))
+            _atomic_write(self._journal_path(), json.dumps(journal).encode('utf-8'))
+            for period, moved in sorted(old.items()):
+                self._write_segment(period, self.load_segment(period) + moved)
+            self._save_index()
+        else:
+            live = trades
+        if live is not original and save:
+            save(live)
+        if journal:
+            os.unlink(self._journal_path())
+        return live
+
+    def tail(self, n):
+        """Newest n archived trades, opening segments newest first"""
+        out = []
+        for period in reversed(self.periods()):
+            if len(out) >= n:
+                break
+            out = self.load_segment(period) + out
+        return out[-n:] if n else []
+
+    def iter_trades(self):
+        for period in self.periods():
+            yield from self.load_segment(period)
+
+    def clear(self):
+        for period in list(self.index):
+            try:
+                os.unlink(self._segment_path(period))
+            except OSError:
+                pass
+        self.index = {}
+        with self._lock:
+            self._cache.clear()
+        try:
+            os.unlink(self._journal_path())
+        except OSError:
+            pass
+        if os.path.isdir(self.dir):
+            self._save_index()
@@ -0,0 +1,120 @@
+"""
+Load test for the local calculation service (service.py)
+
+Opens N keep-alive connections and fires sizing requests as fast as the
+service answers, then reports requests/second and latency percentiles.
+
+    python loadtest.py --spawn --concurrency 64 --requests 20000
+    python loadtest.py --port 8787 --path /pnl
+"""
+
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+
+
+def _body(path, rnd):
+    entry = rnd.uniform(1, 100_000)
+    req = {'entry': entry, 'sl': entry * rnd.uniform(0.9, 0.99), 'leverage': 10, 'risk': 1, 'capital': 1000}
+    if path == '/pnl':
+        req['take_profits'] = [entry * 1.02, entry * 1.05]
+    return json.dumps(req).encode()
+
+
+async def _worker(open_conn, path, count, latencies, errors):
+    reader, writer = await open_conn()
+    rnd = random.Random()
+    try:
+        for _ in range(count):
+            body = _body(path, rnd)
+            req = (b"POST %s HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                   b"Content-Length: %d\r\n\r\n" % (path.encode(), len(body))) + body
+            start = time.perf_counter()
+            writer.write(req)
+            status = await reader.readline()
+            length = 0
+            while True:
+                h = await reader.readline()
+                if h in (b'\r\n', b''):
+                    break
+                if h.lower().startswith(b'content-length:'):
+                    length = int(h.split(b':', 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if b' 200 ' not in status:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    if args.unix:
+        open_conn = lambda: asyncio.open_unix_connection(args.unix)
+    else:
+        open_conn = lambda: asyncio.open_connection(args.host, args.port)
+    per_worker = max(1, args.requests // args.concurrency)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker(open_conn, args.path, per_worker, latencies, errors)
+                           for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def _wait_for_port(host, port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def report(latencies, errors, elapsed):
+    lat = sorted(latencies)
+    pick = lambda q: lat[min(len(lat) - 1, int(q * (len(lat) - 1)))] * 1000
+    print(f"requests:   {len(lat)} ({len(errors)} errors) in {elapsed:.2f}s")
+    print(f"throughput: {len(lat) / elapsed:,.0f} req/s")
+    print(f"latency:    p50 {pick(0.50):.2f} ms | p95 {pick(0.95):.2f} ms | p99 {pick(0.99):.2f} ms | max {lat[-1] * 1000:.2f} ms")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load test the calculation service")
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8787)
+    ap.add_argument('--unix', help="connect to a Unix socket instead")
+    ap.add_argument('--path', default='/size', choices=['/size', '/pnl'])
+    ap.add_argument('-c', '--concurrency', type=int, default=64)
+    ap.add_argument('-n', '--requests', type=int, default=20000)
+    ap.add_argument('--spawn', action='store_true', help="start service.py in a subprocess first")
+    args = ap.parse_args(argv)
+
+    proc = None
+    if args.spawn:
+        cmd = [sys.executable, 'service.py'] + (['--unix', args.unix] if args.unix else ['--port', str(args.port)])
+        proc = subprocess.Popen(cmd)
+        if not args.unix and not _wait_for_port(args.host, args.port):
+            proc.terminate()
+            print("service did not start", file=sys.stderr)
+            return 1
+        if args.unix:
+            time.sleep(1)
+    try:
+        latencies, errors, elapsed = asyncio.run(run(args))
+        report(latencies, errors, elapsed)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
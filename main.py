@@ -9,6 +9,7 @@ import threading
 import subprocess
 import webbrowser
 from datetime import datetime
+from contextlib import nullcontext
 
 import tkinter as tk
 from tkinter import ttk
@@ -20,6 +21,23 @@ try:
 except ImportError:
     requests = None
 
+import config
+import metrics
+from downloader import manager as downloads, DownloadError
+from sizing import calc_position
+from symbol_info import SymbolIndex
+from alerts import AlertEngine, LogNotifier
+from slippage import SlippageEstimator
+from screener import Screener
+from margin import margin_grid, LEVERAGES
+from history_archive import HistoryArchive
+from trade_store import TradeStore
+from refresh_scheduler import RefreshScheduler
+from volatility import VolatilityEngine
+from symbol_search import SymbolSearch
+from paper_trading import PaperEngine
+from metrics import CALC_LATENCY, HISTORY_SAVE, HISTORY_SIZE
+
 VERSION = "1.7.0"
 
 # ----------------------------
@@ -30,8 +48,12 @@ os.makedirs(APP_DATA_DIR, exist_ok=True)
 
 CONFIG_PATH = os.path.join(APP_DATA_DIR, "config.json")
 HISTORY_PATH = os.path.join(APP_DATA_DIR, "trade_history.json")
+PAPER_HISTORY_PATH = os.path.join(APP_DATA_DIR, "paper_trades.json")
 FONT_PATH = os.path.join(APP_DATA_DIR, "Vazirmatn-Regular.ttf")
 LOG_PATH = os.path.join(APP_DATA_DIR, "app.log")
+METRICS_PATH = os.path.join(APP_DATA_DIR, "metrics.prom")
+ALERTS_LOG_PATH = os.path.join(APP_DATA_DIR, "alerts.log")
+METRICS_PORT = 9108
 
 PROJECT_DIR = os.path.dirname(os.path.abspath(sys.argv[0]))
 REPO_OWNER = "Qfndr"
@@ -91,53 +113,82 @@ def _dl_font_async(cb=None):
     def r():
         for u in ["https://raw.githubusercontent.com/rastikerdar/vazirmatn/master/fonts/ttf/Vazirmatn-Regular.ttf"]:
             try:
-                res = requests.get(u, timeout=10)
-                if res.status_code == 200:
-                    with open(FONT_PATH, "wb") as f: f.write(res.content)
-                    break
-            except: continue
+                downloads.download(u, FONT_PATH)
+                break
+            except DownloadError as e: _log(f"font_dl: {e}")
         if cb: cb()
     threading.Thread(target=r, daemon=True).start()
 
 # ----------------------------
 # Classes
 # ----------------------------
-class Config:
+class Config(config.Config):
+    """main.py view of the shared config store (short attribute names)"""
+    risk = config.Config.risk_percent
+    fee = config.Config.fee_percent
+    exchange = config.Config.selected_exchange
+    lang = config.Config.language
     def __init__(self):
-        self.data = {}
-        self.load()
-    def load(self):
-        if os.path.exists(CONFIG_PATH):
-            try:
-                with open(CONFIG_PATH, "r", encoding="utf-8") as f: self.data = json.load(f)
-            except: self.data = {}
-        self.capital = float(self.data.get("capital", 1000))
-        self.risk = float(self.data.get("risk", 1.0))
-        self.fee = float(self.data.get("fee", 0.04))
-        self.exchange = self.data.get("exchange", "Binance")
-        self.lang = self.data.get("lang", "fa")
-        self.theme = self.data.get("theme", "dark")
-        self.api_keys = self.data.get("api_keys", {})
+        super().__init__(CONFIG_PATH, theme="dark")
         if self.lang not in SUPPORTED_LANGS: self.lang = "en"
-    def save(self):
-        self.data.update({"capital": self.capital, "risk": self.risk, "fee": self.fee, "exchange": self.exchange, "lang": self.lang, "theme": self.theme, "api_keys": self.api_keys})
-        with open(CONFIG_PATH, "w", encoding="utf-8") as f: json.dump(self.data, f, indent=2)
+    def save(self): self.store.flush()
 
 class History:
-    def __init__(self):
-        self.trades = []
-        if os.path.exists(HISTORY_PATH):
-            try: with open(HISTORY_PATH, "r", encoding="utf-8") as f: self.trades = json.load(f)
+    # Only the current month is loaded, as a columnar TradeStore; older months are gzip segments opened on demand
+    # metrics=False keeps a secondary book (paper fills) out of the history_trades / history_save_seconds series
+    def __init__(self, path=HISTORY_PATH, metrics=True):
+        self.path = path
+        self.metrics = metrics
+        self.archive = HistoryArchive(path, "d", totals=("p", "r"))
+        trades = []
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f: trades = json.load(f)
             except: pass
+        try: live = self.archive.compact(trades, save=self._write)
+        except OSError as e: _log(f"history_archive: {e}"); live = trades
+        self.trades = TradeStore.from_dicts(live)
+        self._report()
+    def _report(self):
+        if self.metrics: HISTORY_SIZE.set(len(self.archive) + len(self.trades))
+    def _timed(self): return HISTORY_SAVE.time() if self.metrics else nullcontext()
+    def _write(self, rows):
+        with self._timed():
+            with open(self.path, "w", encoding="utf-8") as f: json.dump(rows, f, indent=2)
+    def _save(self): self._write(self.trades.to_dicts())
     def add(self, t):
         self.trades.append(t)
-        with open(HISTORY_PATH, "w", encoding="utf-8") as f: json.dump(self.trades, f, indent=2)
+        if not self._append(self.trades[-1].to_dict()): self._save()
+        self._report()
+    def _append(self, row):
+        # Splice one row in before the closing bracket instead of re-serializing the whole store; False if the file isn't a non-empty list as _write leaves it
+        item = "\n".join("  " + ln for ln in json.dumps(row, indent=2).splitlines())
+        try:
+            with self._timed(), open(self.path, "rb+") as f:
+                end = f.seek(0, 2)
+                if end < 4: return False
+                f.seek(end - 2)
+                if f.read(2) != b"\n]": return False
+                f.seek(end - 2); f.write((",\n" + item + "\n]").encode("utf-8"))
+            return True
+        except OSError: return False
+    def all_trades(self): return list(self.archive.iter_trades()) + self.trades.to_dicts()
+    def stats(self):
+        st = self.archive.summary()
+        if len(self.trades):
+            first, last = self.trades.time_range()
+            st['count'] += len(self.trades)
+            # Either side can be None: rows whose date is kept verbatim have no place in the range
+            st['first'] = min((x for x in (st['first'], first) if x), default=None); st['last'] = max((x for x in (st['last'], last) if x), default=None)
+            for k in st['totals']: st['totals'][k] += self.trades.total(k)
+        return st
 
 class Updater:
     def __init__(self, ver):
         self.ver = ver
         self.release_url = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/releases/latest"
         self.download_url = None
+        self.download_sha = None
 
     def check(self):
         if not requests: return None
@@ -153,18 +204,19 @@ class Updater:
                     for a in assets:
                         if a.get("name") == "main.py":
                             self.download_url = a.get("browser_download_url")
+                            # GitHub publishes "sha256:<hex>" digests for release assets
+                            dg = a.get("digest") or ""
+                            self.download_sha = dg.split(":", 1)[1] if dg.startswith("sha256:") else None
                             return (tag, None) # None content, we dl later
         except Exception as e: _log(f"upd_chk: {e}")
         return None
 
-    def download_and_stage(self):
+    def download_and_stage(self, progress=None):
         if not self.download_url: return None
         try:
-            r = requests.get(self.download_url, timeout=15)
-            if r.status_code == 200:
-                upd_path = os.path.join(PROJECT_DIR, "main_update.py")
-                with open(upd_path, "wb") as f: f.write(r.content)
-                return self._create_bat()
+            upd_path = os.path.join(PROJECT_DIR, "main_update.py")
+            downloads.download(self.download_url, upd_path, self.download_sha, progress)
+            return self._create_bat()
         except Exception as e: _log(f"upd_dl: {e}")
         return None
 
@@ -192,6 +244,30 @@ class App:
         self.cfg = Config()
         self.hist = History()
         self.updater = Updater(VERSION)
+        self.sym_index = SymbolIndex()
+        self._search, self._ranked = {}, {}   # per exchange: SymbolSearch index, ranked default list
+        self.sym_index.ensure_async(self.cfg.exchange, self._on_symbols)
+        self.slippage = SlippageEstimator(self.sym_index.api, symbols=self.sym_index)
+        self.screener = Screener(self.sym_index.api, interval=300)
+        self.screener.subscribe(lambda ex, n: self.root.after(0, self._sort_symbols, ex))
+        self.screener.start(first=self.cfg.exchange)
+        self.alerts = AlertEngine([LogNotifier(ALERTS_LOG_PATH)])
+        self.alerts.add_notifier(lambda ev: self.root.after(0, self._on_alert, ev))
+        self._last_calc = None
+        self._margin = None
+        self.status_v = tk.StringVar(value="")
+        self.live_v = tk.StringVar(value="")
+        self.refresher = RefreshScheduler(self.sym_index.api, lambda ex, p: self.root.after(0, self._on_prices, ex, p), base_interval=self.cfg.refresh_rate)
+        self.root.bind("<Unmap>", lambda e: e.widget is self.root and self.refresher.set_visible(False), add="+")
+        self.root.bind("<Map>", lambda e: e.widget is self.root and self.refresher.set_visible(True), add="+")
+        self.refresher.start()
+        self.vol = VolatilityEngine()
+        self.paper = PaperEngine(self.cfg.capital, self.cfg.fee)
+        self.paper.listeners.append(self._on_paper_fill)
+        self.paper_hist = History(PAPER_HISTORY_PATH, metrics=False)   # kept apart so paper fills never count as calculations
+        self._paper_risk = {}        # entry order id -> planned risk amount
+        self._placing_risk = None    # risk of the entry being placed right now (it can fill inside bracket())
+        self._tick_ex = {'alerts': {}, 'paper': {}}   # watch -> {symbol: exchange its alerts/orders were placed on}
         
         _dl_font_async(self._reload)
         self._setup_font()
@@ -204,14 +280,18 @@ class App:
             "capital": "سرمایه (USDT)", "risk": "ریسک (%)", "fee": "کارمزد (%)", "save": "ذخیره",
             "calc": "محاسبه", "entry": "قیمت ورود", "sl": "استاپ لاس", "lev": "لوریج", 
             "res_pos": "حجم پوزیشن", "res_qty": "تعداد کوین", "res_risk": "مقدار ریسک", "saved": "ذخیره شد",
-            "new_ver": "نسخه جدید موجود است. دانلود و نصب شود؟"
+            "new_ver": "نسخه جدید موجود است. دانلود و نصب شود؟", "diag": "عیب‌یابی", "watch": "هشدار SL", "watching": "هشدار فعال شد",
+            "margin": "مارجین و لیکوئید", "liq": "قیمت لیکوئید", "sl_beyond_liq": "استاپ بعد از لیکوئید است",
+            "live_price": "قیمت لحظه‌ای", "refresh_rate": "نرخ رفرش (ثانیه)", "vol_risk": "ریسک پیشنهادی (نوسان)", "paper": "معامله کاغذی", "paper_placed": "سفارش کاغذی ثبت شد", "busy_on": "در حال پیگیری در"
         }
         en = {
             "title": "Crypto Trading Calculator", "settings": "Settings", "help": "Help", "history": "History", "charts": "Charts", "update": "Update",
             "capital": "Capital", "risk": "Risk %", "fee": "Fee %", "save": "Save",
             "calc": "Calculate", "entry": "Entry Price", "sl": "Stop Loss", "lev": "Leverage",
             "res_pos": "Position Size", "res_qty": "Coin Qty", "res_risk": "Risk Amt", "saved": "Saved!",
-            "new_ver": "New version available. Download & Install?"
+            "new_ver": "New version available. Download & Install?", "diag": "Diagnostics", "watch": "Watch SL", "watching": "Alert armed",
+            "margin": "Margin & Liquidation", "liq": "Liq", "sl_beyond_liq": "stop is beyond liquidation",
+            "live_price": "Live Price", "refresh_rate": "Refresh Rate (s)", "vol_risk": "Vol-adj. Risk", "paper": "Paper Trade", "paper_placed": "Paper order placed", "busy_on": "already tracked on"
         }
         d = fa if self.cfg.lang == "fa" else en
         return d.get(key, key)
@@ -232,18 +312,27 @@ class App:
         nav = tk.Frame(self.root, bg=self.colors['card'], height=50); nav.pack(fill='x')
         tk.Label(nav, text=f"{self.t('title')} (v{VERSION})", font=self.f_h, bg=self.colors['card'], fg=self.colors['fg']).pack(side='left', padx=15, pady=10)
         btns = tk.Frame(nav, bg=self.colors['card']); btns.pack(side='right', padx=10)
-        for k, c in [("help", self.win_help), ("settings", self.win_settings), ("history", self.win_history), ("charts", self.win_charts), ("update", self.manual_update)]:
+        for k, c in [("help", self.win_help), ("settings", self.win_settings), ("history", self.win_history), ("charts", self.win_charts), ("diag", self.win_diagnostics), ("update", self.manual_update)]:
             tk.Button(btns, text=self.t(k), command=c, bg=self.colors['card'], fg=self.colors['fg'], relief='flat', font=self.f_b).pack(side='left', padx=5)
 
+        # Status bar
+        tk.Label(self.root, textvariable=self.status_v, bg=self.colors['card'], fg=self.colors['fg'], font=self.f_b, anchor='w').pack(side='bottom', fill='x')
+
         # Main
         main = tk.Frame(self.root, bg=self.colors['bg']); main.pack(fill='both', expand=True, padx=20, pady=20)
         left = tk.Frame(main, bg=self.colors['bg']); left.pack(side='left', fill='y', padx=(0,20))
         
         # Exchange
         c_ex = self._card(left, "Exchange")
-        self.ex_v = tk.StringVar(value=self.cfg.exchange); ttk.Combobox(c_ex, textvariable=self.ex_v, values=list(EXCHANGES_INFO.keys())).pack(fill='x', pady=5)
-        self.sym_v = tk.StringVar(value="BTCUSDT"); ttk.Combobox(c_ex, textvariable=self.sym_v, values=SYMBOLS).pack(fill='x', pady=5)
-        tk.Button(c_ex, text=self.t('calc')+" Price (Sim)", command=lambda: [self.e_ent.delete(0,'end'), self.e_ent.insert(0,"98000")], bg=self.colors['btn'], fg='white', relief='flat').pack(fill='x', pady=5)
+        self.ex_v = tk.StringVar(value=self.cfg.exchange); cb_ex = ttk.Combobox(c_ex, textvariable=self.ex_v, values=list(EXCHANGES_INFO.keys())); cb_ex.pack(fill='x', pady=5)
+        cb_ex.bind("<<ComboboxSelected>>", lambda e: self._on_exchange())
+        self.sym_v = tk.StringVar(value="BTCUSDT"); self.cb_sym = ttk.Combobox(c_ex, textvariable=self.sym_v, values=SYMBOLS); self.cb_sym.pack(fill='x', pady=5)
+        for ev in ("<<ComboboxSelected>>", "<Return>", "<FocusOut>"): self.cb_sym.bind(ev, lambda e: self._watch_visible(), add="+")
+        self.cb_sym.bind("<KeyRelease>", self._complete, add="+")
+        self._sort_symbols(self.ex_v.get())
+        tk.Label(c_ex, textvariable=self.live_v, bg=self.colors['card'], fg=self.colors['fg'], font=self.f_b).pack(anchor='w')
+        tk.Button(c_ex, text=self.t('live_price'), command=self.fill_price, bg=self.colors['btn'], fg='white', relief='flat').pack(fill='x', pady=5)
+        self._watch_visible()
 
         # Capital
         c_cap = self._card(left, "Capital")
@@ -258,9 +347,93 @@ class App:
         self.e_ent = self._inp_g(gf, self.t('entry'), 0, 0)
         self.e_sl = self._inp_g(gf, self.t('sl'), 0, 1)
         self.e_lev = self._inp_g(gf, self.t('lev'), 1, 0, "10")
-        tk.Button(c_cal, text=self.t('calc'), command=self.do_calc, bg=self.colors['btn'], fg='white', font=self.f_h, relief='flat').pack(fill='x', pady=15)
+        tk.Button(c_cal, text=self.t('calc'), command=self.do_calc, bg=self.colors['btn'], fg='white', font=self.f_h, relief='flat').pack(fill='x', pady=(15, 5))
+        tk.Button(c_cal, text=self.t('watch'), command=self.watch_trade, bg=self.colors['card'], fg=self.colors['fg'], relief='flat', font=self.f_b).pack(fill='x', pady=(0, 5))
+        tk.Button(c_cal, text=self.t('margin'), command=self.win_margin, bg=self.colors['card'], fg=self.colors['fg'], relief='flat', font=self.f_b).pack(fill='x', pady=(0, 5))
+        tk.Button(c_cal, text=self.t('paper'), command=self.paper_trade, bg=self.colors['card'], fg=self.colors['fg'], relief='flat', font=self.f_b).pack(fill='x', pady=(0, 10))
         self.res_txt = tk.Text(c_cal, height=8, bg=self.colors['inp'], fg=self.colors['fg'], relief='flat', font=('Consolas', 11)); self.res_txt.pack(fill='both', expand=True)
 
+    def _on_exchange(self):
+        ex = self.ex_v.get()
+        self.sym_index.ensure_async(ex, self._on_symbols)
+        self._sort_symbols(ex)
+        self._watch_visible()
+
+    def _watch_visible(self):
+        # Only the symbol on screen (plus alert symbols) is polled
+        sym = self.sym_v.get().strip().upper()
+        self.refresher.unwatch('visible'); self.live_v.set("")
+        if sym and self.sym_index.is_valid(self.ex_v.get(), sym) is not False: self.refresher.watch('visible', self.ex_v.get(), [sym])
+        self._load_vol()
+
+    def _load_vol(self):
+        # Hourly Binance candles for the symbol on screen and alerted ones: a full window the first time, then only the bars closed since
+        # Anything else is dropped so one stale symbol can't pin the aligned correlation window to old bars
+        syms = [s for s in dict.fromkeys([self.sym_v.get().strip().upper()] + self.alerts.symbols()) if s]
+        def r():
+            from tp_optimizer import fetch_candles
+            for sym in [s for s in self.vol.symbols if s not in syms]: self.vol.untrack(sym)
+            for sym in syms:
+                try:
+                    limit = 5 if self.vol.stats(sym)['bars'] else self.vol.corr_window + 2
+                    ts, ohlc = fetch_candles(sym, '1h', limit, api=self.sym_index.api, with_times=True)
+                    self.vol.seed(sym, ts[:-1], ohlc[:-1])   # last candle is still open
+                except Exception as e: _log(f"volatility {sym}: {e}")
+        threading.Thread(target=r, daemon=True).start()
+
+    def _claim(self, name, sym):
+        # One exchange per symbol and watch: a second one's prices would trigger the first one's levels
+        ex = self._tick_ex[name].setdefault(sym, self.ex_v.get())
+        if ex != self.ex_v.get(): self.status_v.set(f"⚠ {sym}: {self.t('busy_on')} {ex}")
+        return ex == self.ex_v.get()
+
+    def _rewatch(self, name, symbols):
+        # Poll each symbol on the exchange it was placed on, not whichever exchange is selected now
+        owners = self._tick_ex[name]
+        for sym in [s for s in owners if s not in symbols]: del owners[sym]
+        by_ex = {}
+        for sym in symbols: by_ex.setdefault(owners.setdefault(sym, self.ex_v.get()), []).append(sym)
+        self.refresher.unwatch(name)
+        for ex, syms in by_ex.items(): self.refresher.watch(name, ex, syms)
+
+    def _on_prices(self, ex, prices):
+        # Alerts and paper books are keyed by symbol, so only their own exchange's ticks may reach them
+        alert_ex, paper_ex = self._tick_ex['alerts'], self._tick_ex['paper']
+        for sym, p in prices.items():
+            if alert_ex.get(sym) == ex: self.alerts.on_tick(sym, p)
+            if paper_ex.get(sym) == ex: self.paper.on_tick(sym, p)
+        sym = self.sym_v.get().strip().upper()
+        if ex == self.ex_v.get() and sym in prices: self.live_v.set(f"{sym}: {prices[sym]:,.8g}")
+
+    def fill_price(self):
+        ex, sym = self.ex_v.get(), self.sym_v.get().strip().upper()
+        def r():
+            p = self.sym_index.api.get_price(ex, sym)
+            if p is None: self.root.after(0, self.status_v.set, f"⚠ {sym}: no price from {ex}")
+            else: self.root.after(0, lambda: [self.e_ent.delete(0, 'end'), self.e_ent.insert(0, f"{p:g}")])
+        threading.Thread(target=r, daemon=True).start()
+
+    def _sort_symbols(self, ex):
+        # Most active pairs first (24h quote volume from the screener), then the built-in list
+        if ex != self.ex_v.get() or not self.cb_sym.winfo_exists(): return
+        top = [r['symbol'] for r in self.screener.rank('volume', 200, exchange=ex, quote='USDT')] if ex in self.screener.exchanges else []
+        seen = set(top)
+        self.cb_sym['values'] = self._ranked[ex] = top + [x for x in self.screener.sort_by_activity(ex, SYMBOLS) if x not in seen]
+        self._search[ex] = SymbolSearch(self.sym_index.symbols(ex) + list(self.cb_sym['values']), self.screener.table.volumes(ex))
+
+    def _on_symbols(self, ex, ok):
+        if ok: self.root.after(0, self._sort_symbols, ex)
+
+    def _complete(self, e):
+        # Autocomplete over the exchange's full symbol list; navigation keys keep the current list
+        if e.keysym in ("Up", "Down", "Left", "Right", "Return", "Escape", "Tab", "Home", "End") or e.keysym.startswith(("Shift", "Control", "Alt")): return
+        ex, q = self.ex_v.get(), self.sym_v.get().strip()
+        if not q:
+            # Back to the ranked list built with the index; rebuilding the trie per keystroke costs ~20 ms
+            if ex in self._ranked: self.cb_sym['values'] = self._ranked[ex]
+            else: self._sort_symbols(ex)
+        elif ex in self._search: self.cb_sym['values'] = self._search[ex].search(q, 50)
+
     def _card(self, p, t):
         f = tk.Frame(p, bg=self.colors['card'], padx=15, pady=15); f.pack(fill='x', pady=(0, 15))
         tk.Label(f, text=t, font=self.f_h, bg=self.colors['card'], fg=self.colors['fg']).pack(anchor='w', pady=(0, 10))
@@ -278,25 +451,105 @@ class App:
 
     def save_cfg(self):
         try:
-            self.cfg.capital = float(self.e_cap.get()); self.cfg.risk = float(self.e_risk.get()); self.cfg.exchange = self.ex_v.get()
-            self.cfg.save(); messagebox.showinfo("", self.t('saved'))
+            with self.cfg.batch():
+                self.cfg.capital = float(self.e_cap.get()); self.cfg.risk = float(self.e_risk.get()); self.cfg.exchange = self.ex_v.get()
+            messagebox.showinfo("", self.t('saved'))
         except: messagebox.showerror("", "Error")
 
+    @metrics.timed(CALC_LATENCY)
     def do_calc(self):
         try:
             e=float(self.e_ent.get()); s=float(self.e_sl.get()); L=float(self.e_lev.get())
             C=float(self.e_cap.get()); R=float(self.e_risk.get())
-            ramt = C*(R/100); diff = abs(e-s)/e; sz = ramt/diff; qty = (sz*L)/e
+            sz, qty, ramt = calc_position(C, R, e, s, L)
+            info = self.sym_index.lookup(self.ex_v.get(), self.sym_v.get())
+            if info: qty = info.round_qty(qty)
             res = f"{self.t('res_pos')}: {sz:,.2f} $\n{self.t('res_qty')}: {qty:.6f}\n{self.t('res_risk')}: {ramt:.2f} $\nLev: {L}x | SL: {s}"
+            if info:
+                res += f"\nStep: {info.step_size:g} | Tick: {info.tick_size:g}"
+                probs = info.check(qty, e)
+                if probs: res += "\n⚠ " + ", ".join(probs)
+            elif self.sym_index.is_valid(self.ex_v.get(), self.sym_v.get()) is False:
+                res += f"\n⚠ {self.sym_v.get()} not listed on {self.ex_v.get()}"
+            self._margin = margin_grid(e, s, [qty], sorted(set(LEVERAGES) | {L}), wallet=C)
+            m = self._margin.row(L)
+            liq = "-" if m['dist_isolated'] == float('inf') else f"{m['liq_isolated']:,.4f} ({m['dist_isolated']:.2f}%)"
+            res += f"\n{self.t('liq')}: {liq} | Margin: {m['initial_margin']:,.2f} $"
+            if not m['safe_isolated']: res += f"\n⚠ {self.t('sl_beyond_liq')}"
+            v = self.vol.stats(self.sym_v.get())
+            if v['stdev']:
+                vr = self.vol.suggested_risk(self.sym_v.get(), R, self.alerts.symbols())
+                res += f"\n{self.t('vol_risk')}: {vr:.2f}% | ATR(1h): {v['atr_pct'] or 0:.2f}%"
             self.res_txt.delete('1.0', 'end'); self.res_txt.insert('1.0', res)
             self.hist.add({"d": datetime.now().strftime("%Y-%m-%d %H:%M"), "sym": self.sym_v.get(), "p": sz, "r": ramt})
+            self._last_calc = (self.sym_v.get(), e, s, qty, L, ramt)
+            self._estimate_fill(self.ex_v.get(), self.sym_v.get(), "buy" if s < e else "sell", qty, e)
         except: messagebox.showerror("", "Error")
 
+    def _estimate_fill(self, ex, sym, side, qty, entry):
+        """Walk the live order book off the UI thread and append the expected fill"""
+        if qty <= 0: return   # rounded down to nothing by the exchange's step size
+        def r():
+            f = self.slippage.estimate(ex, sym, side, qty=qty)
+            if not f: return
+            slip = (f.avg_price - entry) / entry * 100 * (1 if side == "buy" else -1)
+            line = f"\nFill ≈ {f.avg_price:,.4f} ({slip:+.3f}% vs entry, {f.levels} lvls)" + ("" if f.complete else " ⚠ thin book")
+            self.root.after(0, lambda: self.res_txt.insert('end', line))
+        threading.Thread(target=r, daemon=True).start()
+
+    def watch_trade(self):
+        if not self._last_calc: self.do_calc()
+        if not self._last_calc: return
+        sym, e, s = self._last_calc[:3]
+        if not self._claim('alerts', sym): return
+        self.alerts.add_trade(sym, e, s, note=f"entry {e:g}")
+        self._rewatch('alerts', self.alerts.symbols())
+        self._load_vol()
+        self.status_v.set(f"{self.t('watching')}: {sym} SL {s:g}")
+
+    def paper_trade(self):
+        # Rehearse the last calculation: limit entry at the entry price with the SL attached, filled by live prices
+        if not self._last_calc: self.do_calc()
+        if not self._last_calc: return
+        sym, e, s, qty, L, ramt = self._last_calc
+        self.paper.fee_pct = self.cfg.fee
+        if not self._claim('paper', sym): return
+        self._placing_risk = ramt
+        try: o = self.paper.bracket(sym, e, s, qty, leverage=L)
+        finally: self._placing_risk = None
+        if o.status == 'open': self._paper_risk[o.id] = ramt
+        self._rewatch('paper', self.paper.symbols())
+        self.status_v.set(f"{self.t('paper_placed')}: #{o.id} {o.side} {qty:g} {sym} @ {e:g} ({o.status})")
+
+    def _on_paper_fill(self, f):
+        # Entry fills carry the planned risk like a normal calculation; exits record the realized PnL
+        o = self.paper.order(f.order_id)
+        t = {"d": datetime.now().strftime("%Y-%m-%d %H:%M"), "sym": f.symbol, "p": f.qty * f.price,
+             "paper": f"{f.side} {f.qty:g} @ {f.price:g} ({o.note or f.kind})", "fee": round(f.fee, 8), "pnl": round(f.pnl, 8)}
+        if not o.reduce_only:
+            r = self._paper_risk.pop(f.order_id, self._placing_risk)
+            if r is not None: t["r"] = r
+        self.paper_hist.add(t)
+        self._rewatch('paper', self.paper.symbols())
+        self.status_v.set(f"Paper: {t['paper']} | PnL {f.pnl:+.2f} | Equity {self.paper.equity():,.2f}")
+
+    def _on_alert(self, ev):
+        self.status_v.set(f"🔔 {ev.message()}")
+        self._rewatch('alerts', self.alerts.symbols())
+        try: self.root.bell()
+        except tk.TclError: pass
+
     def win_settings(self):
         w = tk.Toplevel(self.root); w.title(self.t('settings')); w.configure(bg=self.colors['bg']); w.geometry("500x400")
         tk.Label(w, text=self.t('lang'), bg=self.colors['bg'], fg=self.colors['fg']).pack(pady=10)
         cb_l = ttk.Combobox(w, values=SUPPORTED_LANGS, state='readonly'); cb_l.set(self.cfg.lang); cb_l.pack()
-        def sv(): self.cfg.lang = cb_l.get(); self.cfg.save(); w.destroy(); self.build()
+        tk.Label(w, text=self.t('refresh_rate'), bg=self.colors['bg'], fg=self.colors['fg']).pack(pady=10)
+        e_rr = tk.Entry(w); e_rr.insert(0, f"{self.cfg.refresh_rate:g}"); e_rr.pack()
+        def sv():
+            try: rr = max(1.0, float(e_rr.get()))
+            except ValueError: rr = self.cfg.refresh_rate
+            with self.cfg.batch(): self.cfg.lang = cb_l.get(); self.cfg.refresh_rate = rr
+            self.refresher.set_base_interval(rr); w.destroy(); self.build()
         tk.Button(w, text=self.t('save'), command=sv, bg=self.colors['btn'], fg='white').pack(pady=20)
 
     def win_help(self):
@@ -312,8 +565,53 @@ class App:
             tk.Button(b, text="Home", command=lambda u=i['home']: webbrowser.open(u)).pack(side='left')
             tk.Button(b, text="API", command=lambda u=i['api_url']: webbrowser.open(u)).pack(side='left', padx=5)
 
-    def win_history(self): messagebox.showinfo("", f"Saved: {HISTORY_PATH}")
+    def win_history(self):
+        st = self.hist.stats(); tot = st['totals']
+        span = f"{st['first'][:10]} → {st['last'][:10]}" if st['first'] and st['last'] else "-"
+        messagebox.showinfo("", f"Saved: {HISTORY_PATH}\nTrades: {st['count']} ({span})\nPosition total: {tot['p']:,.2f} $ | Risk total: {tot['r']:,.2f} $")
     def win_charts(self): messagebox.showinfo("", "Charts coming soon")
+
+    def win_margin(self):
+        if not self._margin: self.do_calc()
+        g = self._margin
+        if not g: return
+        w = tk.Toplevel(self.root); w.title(self.t('margin')); w.configure(bg=self.colors['bg']); w.geometry("760x420")
+        cols = ("lev", "margin", "liq_iso", "dist_iso", "liq_cross", "dist_cross", "stop")
+        tv = ttk.Treeview(w, columns=cols, show='headings', height=14); tv.pack(fill='both', expand=True, padx=10, pady=10)
+        for c in cols: tv.heading(c, text=c); tv.column(c, width=100, anchor='center')
+        tv.tag_configure('danger', background='#7f1d1d', foreground='white')
+        pct = lambda v: "-" if v == float('inf') else f"{v:.2f}%"
+        px = lambda v: "-" if v in (0.0, float('inf')) else f"{v:,.4f}"
+        for r in g.rows():
+            ok = r['safe_isolated'] and r['safe_cross'] and r['affordable']
+            tv.insert('', 'end', values=(f"{r['leverage']:g}x", f"{r['initial_margin']:,.2f}", px(r['liq_isolated']), pct(r['dist_isolated']),
+                                         px(r['liq_cross']), pct(r['dist_cross']), "OK" if ok else "⚠"), tags=() if ok else ('danger',))
+        best = g.max_safe_leverage()
+        tk.Label(w, text=f"Entry {g.entry:g} | SL {g.stop_loss:g} | Qty {g.qtys[0]:.6f} | MMR {g.mmr*100:g}% | max safe (isolated): {best:g}x" if best else self.t('sl_beyond_liq'),
+                 bg=self.colors['bg'], fg=self.colors['fg'], font=self.f_b).pack(anchor='w', padx=10, pady=(0, 10))
+
+    def win_diagnostics(self):
+        w = tk.Toplevel(self.root); w.title(self.t('diag')); w.configure(bg=self.colors['bg']); w.geometry("720x380")
+        cols = ("exchange", "endpoint", "calls", "errors", "p50", "p95", "p99")
+        tv = ttk.Treeview(w, columns=cols, show='headings', height=10); tv.pack(fill='both', expand=True, padx=10, pady=10)
+        for c in cols: tv.heading(c, text=c); tv.column(c, width=90, anchor='center')
+        info = tk.Label(w, bg=self.colors['bg'], fg=self.colors['fg'], font=self.f_b, justify='left'); info.pack(anchor='w', padx=10)
+        ms = lambda v: "-" if v is None else f"{v*1000:.1f} ms"
+        def refresh():
+            tv.delete(*tv.get_children())
+            for r in metrics.exchange_summary():
+                tv.insert('', 'end', values=(r['exchange'], r['endpoint'], r['calls'], r['errors'], ms(r['p50']), ms(r['p95']), ms(r['p99'])))
+            info.configure(text=f"calc p95: {ms(CALC_LATENCY.quantile(0.95))} | history save p95: {ms(HISTORY_SAVE.quantile(0.95))} | trades: {HISTORY_SIZE.value()}")
+        def export():
+            try: messagebox.showinfo("", f"Saved: {metrics.registry.write_prometheus(METRICS_PATH)}", parent=w)
+            except Exception as e: _log(f"metrics_export: {e}"); messagebox.showerror("", "Error", parent=w)
+        def serve():
+            try: metrics.registry.serve(METRICS_PORT); messagebox.showinfo("", f"http://127.0.0.1:{METRICS_PORT}/metrics", parent=w)
+            except Exception as e: _log(f"metrics_serve: {e}"); messagebox.showerror("", "Error", parent=w)
+        b = tk.Frame(w, bg=self.colors['bg']); b.pack(fill='x', padx=10, pady=10)
+        for txt, cmd in [("Refresh", refresh), ("Export .prom", export), ("HTTP :%d" % METRICS_PORT, serve)]:
+            tk.Button(b, text=txt, command=cmd, bg=self.colors['btn'], fg='white', relief='flat').pack(side='left', padx=5)
+        refresh()
     
     def manual_update(self): self.check_update_silent(True)
     def check_update_silent(self, f=False):
@@ -321,15 +619,40 @@ class App:
         if res:
             tag, _ = res
             if messagebox.askyesno(self.t('update'), f"{self.t('new_ver')} ({tag})"):
-                bat = self.updater.download_and_stage()
-                if bat: 
-                    if sys.platform.startswith("win"): os.startfile(bat)
-                    self.root.destroy()
+                self._download_update()
         elif f: messagebox.showinfo("", "Up to date")
 
+    def _download_update(self):
+        w = tk.Toplevel(self.root); w.title(self.t('update')); w.configure(bg=self.colors['bg']); w.geometry("360x90")
+        pb = ttk.Progressbar(w, mode='determinate', maximum=100); pb.pack(fill='x', padx=15, pady=(20, 5))
+        lbl = tk.Label(w, text="0 KB", bg=self.colors['bg'], fg=self.colors['fg'], font=self.f_b); lbl.pack()
+        def prog(done, total):
+            pct = done * 100 / total if total else 0
+            self.root.after(0, lambda: [pb.configure(value=pct), lbl.configure(text=f"{done // 1024} KB")])
+        def done(bat):
+            w.destroy()
+            if bat:
+                if sys.platform.startswith("win"): os.startfile(bat)
+                self.root.destroy()
+            else: messagebox.showerror("", "Error")
+        def run():
+            bat = self.updater.download_and_stage(prog)
+            self.root.after(0, lambda: done(bat))
+        threading.Thread(target=run, daemon=True).start()
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--cli":
+        import cli
+        sys.exit(cli.main(sys.argv[2:]))
+    session = None
+    if "--profile" in sys.argv:
+        from profiling import ProfileSession
+        session = ProfileSession(os.path.join(APP_DATA_DIR, "profiles")).start()
     try:
         root = tk.Tk()
+        if session: session.watch(root).on_stall = lambda s: _log(f"ui stall {s['duration'] * 1000:.0f} ms")
         App(root)
         root.mainloop()
     except Exception as e: _log(f"fatal: {e}")
+    finally:
+        if session: print(f"Profile report: {session.stop()}")
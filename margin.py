@@ -0,0 +1,118 @@
+"""
+Liquidation and margin math for Crypto Trading Calculator
+
+Liquidation price, initial/maintenance margin and distance to liquidation for
+isolated and cross margin, computed with NumPy broadcasting over a whole grid of
+leverage values x position sizes at once so the UI can show every leverage
+choice side by side. Fees and funding are ignored; mmr is the exchange's
+maintenance margin rate for the position's tier.
+"""
+
+import numpy as np
+
+DEFAULT_MMR = 0.005
+LEVERAGES = (1, 2, 3, 5, 10, 15, 20, 25, 50, 75, 100, 125)
+
+
+def liquidation_price(entry, leverage, long=True, mode='isolated', qty=None, wallet=None, mmr=DEFAULT_MMR):
+    """
+    Price at which margin balance falls to maintenance margin
+    isolated: only the position's initial margin (entry * qty / leverage) is at stake
+    cross: the whole wallet backs the position (qty and wallet required)
+    Accepts scalars or broadcastable arrays; a long that can't be liquidated gives 0, a short inf
+    """
+    entry = np.asarray(entry, dtype=np.float64)
+    leverage = np.asarray(leverage, dtype=np.float64)
+    if mode == 'isolated':
+        if long:
+            return entry * (1 - 1 / leverage) / (1 - mmr)
+        return entry * (1 + 1 / leverage) / (1 + mmr)
+    if mode != 'cross':
+        raise ValueError(f"unknown margin mode {mode!r}")
+    if qty is None or wallet is None:
+        raise ValueError("cross margin needs qty and wallet")
+    qty = np.asarray(qty, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if long:
+            liq = (qty * entry - wallet) / (qty * (1 - mmr))
+            return np.maximum(liq, 0.0) + 0 * leverage
+        liq = (wallet + qty * entry) / (qty * (1 + mmr))
+        return np.where(qty > 0, liq, np.inf) + 0 * leverage
+
+
+class MarginGrid:
+    """
+    Margin figures for every (leverage, qty) pair; arrays have shape (len(leverages), len(qtys))
+    A stop is 'safe' when it triggers before liquidation
+    """
+
+    def __init__(self, entry, stop_loss, qtys, leverages=LEVERAGES, wallet=None, mmr=DEFAULT_MMR):
+        self.entry = float(entry)
+        self.stop_loss = float(stop_loss)
+        self.long = stop_loss < entry
+        self.mmr = mmr
+        self.leverages = np.asarray(leverages, dtype=np.float64)
+        self.qtys = np.atleast_1d(np.asarray(qtys, dtype=np.float64))
+        lev, qty = self.leverages[:, None], self.qtys[None, :]
+
+        self.notional = qty * self.entry + 0 * lev
+        self.initial_margin = self.notional / lev
+        self.maint_margin = self.notional * mmr
+        self.liq_isolated = liquidation_price(self.entry, lev, self.long, 'isolated', mmr=mmr) + 0 * qty
+        self.dist_isolated = self._distance(self.liq_isolated)
+        self.safe_isolated = self._stop_first(self.liq_isolated)
+        if wallet is not None:
+            self.wallet = float(wallet)
+            self.liq_cross = liquidation_price(self.entry, lev, self.long, 'cross', qty, self.wallet, mmr)
+            self.dist_cross = self._distance(self.liq_cross)
+            self.safe_cross = self._stop_first(self.liq_cross)
+            self.affordable = self.initial_margin <= self.wallet
+        else:
+            self.wallet = None
+            self.liq_cross = self.dist_cross = self.safe_cross = self.affordable = None
+
+    def _distance(self, liq):
+        """% move from entry to liquidation (inf when it can't happen)"""
+        with np.errstate(invalid='ignore'):
+            d = np.abs(self.entry - liq) / self.entry * 100
+        return np.where(np.isfinite(liq) & (liq > 0), d, np.inf)
+
+    def _stop_first(self, liq):
+        return self.stop_loss > liq if self.long else self.stop_loss < liq
+
+    def _index(self, leverage, qty):
+        i = int(np.abs(self.leverages - leverage).argmin())
+        j = 0 if qty is None else int(np.abs(self.qtys - qty).argmin())
+        return i, j
+
+    def row(self, leverage, qty=None):
+        """Figures for the nearest grid point as a dict"""
+        i, j = self._index(leverage, qty)
+        d = {
+            'leverage': float(self.leverages[i]), 'qty': float(self.qtys[j]),
+            'notional': float(self.notional[i, j]), 'initial_margin': float(self.initial_margin[i, j]),
+            'maint_margin': float(self.maint_margin[i, j]),
+            'liq_isolated': float(self.liq_isolated[i, j]), 'dist_isolated': float(self.dist_isolated[i, j]),
+            'safe_isolated': bool(self.safe_isolated[i, j]),
+        }
+        if self.wallet is not None:
+            d.update(liq_cross=float(self.liq_cross[i, j]), dist_cross=float(self.dist_cross[i, j]),
+                     safe_cross=bool(self.safe_cross[i, j]), affordable=bool(self.affordable[i, j]))
+        return d
+
+    def rows(self, qty=None):
+        """One dict per leverage for a given position size"""
+        return [self.row(lev, qty) for lev in self.leverages]
+
+    def max_safe_leverage(self, qty=None, mode='isolated'):
+        """Highest grid leverage whose liquidation lies beyond the stop (None if none)"""
+        _, j = self._index(self.leverages[0], qty)
+        safe = (self.safe_isolated if mode == 'isolated' else self.safe_cross)[:, j]
+        if mode == 'cross' and self.affordable is not None:
+            safe = safe & self.affordable[:, j]
+        ok = self.leverages[safe]
+        return float(ok.max()) if len(ok) else None
+
+
+def margin_grid(entry, stop_loss, qtys, leverages=LEVERAGES, wallet=None, mmr=DEFAULT_MMR):
+    return MarginGrid(entry, stop_loss, qtys, leverages, wallet, mmr)
@@ -0,0 +1,414 @@
+"""
+Record and replay exchange market data for Crypto Trading Calculator
+
+Recorder captures every raw response an APIManager receives, every answer it
+gets from the price daemon instead (kind 'daemon'; run the daemon itself with
+--record to capture its raw upstream responses for replay), and any stream
+messages handed to record_message, into a compact file: JSON-lines records
+grouped into independently gzip-compressed chunks, with a sidecar index of
+(first time, last time, offset, length, count) per chunk so a time range can
+be read without decompressing the rest.
+
+Replayer reads them back: ReplayServer serves the recorded HTTP responses from
+a local MockExchangeServer following a virtual clock that runs at any speed
+(1.0 = real time, 1000 = 1000x), and play_messages() re-emits stream messages
+on the same clock. Point an APIManager at it with ReplayServer.attach(api).
+DaemonReplay does the same for 'daemon' records: DaemonReplay.attach(api)
+makes an APIManager take its daemon answers from the recording, and
+serve-daemon puts it behind the price daemon protocol for other processes.
+
+    python market_replay.py record session.mrec --symbols BTCUSDT,ETHUSDT --duration 600
+    python market_replay.py serve session.mrec --speed 1000 --port 8765
+    python market_replay.py serve-daemon session.mrec --socket /tmp/replay.sock   # CRYPTO_CALC_DAEMON=/tmp/replay.sock
+    python market_replay.py info session.mrec
+"""
+
+import os
+import sys
+import json
+import gzip
+import time
+import bisect
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+from mock_exchange import MockExchangeServer, point_api_at
+
+FORMAT_VERSION = 1
+
+
+def _key(path, query):
+    """Canonical request key: path plus sorted query, so parameter order doesn't matter"""
+    q = query if isinstance(query, dict) else parse_qs(query)
+    return path + ('?' + urlencode(sorted(q.items()), doseq=True) if q else '')
+
+
+def index_path(path):
+    return path + '.idx.json'
+
+
+class Recorder:
+    """
+    Append-only writer; a chunk is flushed every chunk_records records or chunk_seconds
+    Record times are seconds since the recording started
+    """
+
+    def __init__(self, path, chunk_records=2000, chunk_seconds=30.0):
+        self.path = path
+        self.chunk_records = chunk_records
+        self.chunk_seconds = chunk_seconds
+        self.started = time.time()
+        self._t0 = time.monotonic()
+        self._buf = []
+        self._buf_since = self._t0
+        self._index = []
+        self._lock = threading.Lock()
+        self._attached = []
+        self.records = 0
+        self._f = open(path, 'wb')
+
+    def _now(self):
+        return round(time.monotonic() - self._t0, 6)
+
+    def _add(self, rec):
+        with self._lock:
+            self._buf.append(rec)
+            self.records += 1
+            if len(self._buf) >= self.chunk_records or time.monotonic() - self._buf_since >= self.chunk_seconds:
+                self._flush_chunk()
+
+    def _flush_chunk(self):
+        if not self._buf:
+            return
+        data = gzip.compress('\n'.join(json.dumps(r, separators=(',', ':')) for r in self._buf).encode('utf-8'))
+        offset = self._f.tell()
+        self._f.write(data)
+        self._f.flush()
+        self._index.append([self._buf[0]['t'], self._buf[-1]['t'], offset, len(data), len(self._buf)])
+        self._buf = []
+        self._buf_since = time.monotonic()
+        self._write_index()
+
+    def _write_index(self):
+        tmp = index_path(self.path) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': FORMAT_VERSION, 'started': self.started, 'chunks': self._index}, f)
+        os.replace(tmp, index_path(self.path))
+
+    def record_http(self, url, exchange, endpoint, status, body):
+        parts = urlsplit(url)
+        self._add({'t': self._now(), 'k': 'http', 'ex': exchange, 'ep': endpoint,
+                   'u': _key(parts.path, parts.query), 's': status, 'b': body})
+
+    def record_message(self, channel, payload):
+        """Stream message (e.g. a websocket frame); payload must be JSON-serializable"""
+        self._add({'t': self._now(), 'k': 'msg', 'ch': channel, 'd': payload})
+
+    def record_daemon(self, method, args, result):
+        """Reply of the price daemon to one PriceDaemonClient call"""
+        self._add({'t': self._now(), 'k': 'daemon', 'm': method, 'a': list(args), 'r': result})
+
+    def attach(self, api):
+        """Record every response api._http_get returns and every price daemon answer it gets (until detach)"""
+        from api_manager import HTTP_TIMEOUT, _NO_DAEMON
+        original_get, original_call = api._http_get, api._daemon_call
+
+        def recording_get(url, exchange, endpoint, timeout=HTTP_TIMEOUT):
+            response = original_get(url, exchange, endpoint, timeout)
+            try:
+                self.record_http(url, exchange, endpoint, response.status_code, response.text)
+            except Exception as e:
+                print(f"Recorder error: {e}")
+            return response
+
+        def recording_call(method, *args):
+            result = original_call(method, *args)
+            if result is not _NO_DAEMON:
+                try:
+                    self.record_daemon(method, args, result)
+                except Exception as e:
+                    print(f"Recorder error: {e}")
+            return result
+        api._http_get, api._daemon_call = recording_get, recording_call
+        self._attached.append(api)
+        return api
+
+    def detach(self, api=None):
+        for a in ([api] if api else list(self._attached)):
+            a.__dict__.pop('_http_get', None)
+            a.__dict__.pop('_daemon_call', None)
+            self._attached.remove(a)
+
+    def close(self):
+        self.detach()
+        with self._lock:
+            self._flush_chunk()
+            self._write_index()
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    """Read side: chunk index plus lazy, time-ranged record iteration"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(index_path(path), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.started = meta.get('started', 0.0)
+        self.chunks = meta['chunks']
+
+    @property
+    def duration(self):
+        return self.chunks[-1][1] if self.chunks else 0.0
+
+    def __len__(self):
+        return sum(c[4] for c in self.chunks)
+
+    def records(self, start=None, end=None, kind=None):
+        """Records with start <= t <= end, reading only the chunks that overlap the range"""
+        with open(self.path, 'rb') as f:
+            for t0, t1, offset, length, _ in self.chunks:
+                if (start is not None and t1 < start) or (end is not None and t0 > end):
+                    continue
+                f.seek(offset)
+                for line in gzip.decompress(f.read(length)).splitlines():
+                    rec = json.loads(line)
+                    if start is not None and rec['t'] < start:
+                        continue
+                    if end is not None and rec['t'] > end:
+                        return
+                    if kind is None or rec['k'] == kind:
+                        yield rec
+
+
+class VirtualClock:
+    """Recording time that advances speed times faster than the wall clock"""
+
+    def __init__(self, speed=1.0, start_at=0.0):
+        self.speed = speed
+        self.start_at = start_at
+        self._wall = time.monotonic()
+
+    def now(self):
+        return self.start_at + (time.monotonic() - self._wall) * self.speed
+
+    def reset(self, start_at=0.0):
+        self.start_at = start_at
+        self._wall = time.monotonic()
+
+
+class ReplayServer:
+    """Serve recorded HTTP responses from a MockExchangeServer as of the virtual clock's time"""
+
+    def __init__(self, path, speed=1.0, port=0, loop=False):
+        self.recording = Recording(path)
+        self.clock = VirtualClock(speed)
+        self.loop = loop
+        self.server = MockExchangeServer(port)
+        self.server.routes.clear()
+        self._times = {}      # key -> [t]
+        self._responses = {}  # key -> [(status, body)]
+        for rec in self.recording.records(kind='http'):
+            self._times.setdefault(rec['u'], []).append(rec['t'])
+            self._responses.setdefault(rec['u'], []).append((rec['s'], rec['b']))
+        for path in {k.split('?', 1)[0] for k in self._times}:
+            self.server.add_route(path, self._make_handler(path))
+
+    def _make_handler(self, path):
+        def handler(query):
+            key = _key(path, query)
+            times = self._times.get(key)
+            if not times:
+                return 404, b'{"msg":"not recorded"}', 'application/json'
+            now = self.clock.now()
+            if self.loop and self.recording.duration:
+                now %= self.recording.duration
+            # Latest response recorded at or before now (the first one before the recording starts)
+            i = max(bisect.bisect_right(times, now) - 1, 0)
+            status, body = self._responses[key][i]
+            return status, body.encode('utf-8'), 'application/json'
+        return handler
+
+    @property
+    def base_url(self):
+        return self.server.base_url
+
+    def start(self):
+        self.server.start()
+        self.clock.reset()
+        return self
+
+    def stop(self):
+        self.server.stop()
+
+    def attach(self, api):
+        """Route an APIManager to this server (its price cache is cleared so replayed data is seen)"""
+        api.cache.clear()
+        return point_api_at(api, self.base_url)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class DaemonReplay:
+    """
+    Recorded price daemon answers as of the virtual clock's time
+    Stands in for a PriceDaemonClient (attach) and for the APIManager a PriceDaemon wraps,
+    so PriceDaemon(api=DaemonReplay(path)).serve(address) replays them over the daemon protocol
+    """
+
+    def __init__(self, path, speed=1.0, loop=False):
+        self.recording = Recording(path)
+        self.clock = VirtualClock(speed)
+        self.loop = loop
+        self.rate_headroom = {}
+        self._prices = {}   # (exchange, symbol) -> ([t], [price]), from get_price and get_prices replies
+        self._stats = {}    # (exchange, symbol) -> ([t], [stats])
+        for rec in self.recording.records(kind='daemon'):
+            method, args, result = rec['m'], rec['a'], rec['r']
+            if method == 'get_price':
+                found = {args[1]: result}
+            elif method == 'get_prices':
+                found = result or {}
+            elif method == 'get_24h_stats':
+                times, values = self._stats.setdefault((args[0], args[1]), ([], []))
+                times.append(rec['t'])
+                values.append(result)
+                continue
+            else:
+                continue
+            for symbol, price in found.items():
+                if price is not None:
+                    times, values = self._prices.setdefault((args[0], symbol), ([], []))
+                    times.append(rec['t'])
+                    values.append(price)
+
+    @property
+    def cache(self):
+        # PriceDaemon looks in api.cache first; every answer here comes from the recording
+        return self
+
+    def get(self, *args):
+        return None
+
+    def _at(self, series, key):
+        times, values = series.get(key, ((), ()))
+        if not times:
+            return None
+        now = self.clock.now()
+        if self.loop and self.recording.duration:
+            now %= self.recording.duration
+        return values[max(bisect.bisect_right(times, now) - 1, 0)]
+
+    def get_price(self, exchange, symbol, max_age=None):
+        return self._at(self._prices, (exchange, symbol))
+
+    def get_prices(self, exchange, symbols, max_age=None):
+        prices = {s: self._at(self._prices, (exchange, s)) for s in symbols}
+        return {s: p for s, p in prices.items() if p is not None}
+
+    def get_24h_stats(self, exchange, symbol):
+        return self._at(self._stats, (exchange, symbol))
+
+    def start(self):
+        self.clock.reset()
+        return self
+
+    def attach(self, api):
+        """Answer an APIManager's daemon calls from the recording (its price cache is cleared)"""
+        api.cache.clear()
+        api._daemon = lambda: self
+        return api
+
+
+def play_messages(path, callback, speed=1.0, channel=None, start=None, end=None):
+    """
+    Re-emit recorded stream messages as callback(channel, payload, t)
+    speed=0 plays as fast as possible (for benchmarks); returns the number played
+    """
+    clock = VirtualClock(speed or 1.0, start or 0.0)
+    n = 0
+    for rec in Recording(path).records(start, end, kind='msg'):
+        if channel is not None and rec['ch'] != channel:
+            continue
+        if speed:
+            wait = (rec['t'] - clock.now()) / speed
+            if wait > 0:
+                time.sleep(wait)
+        callback(rec['ch'], rec['d'], rec['t'])
+        n += 1
+    return n
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Record and replay exchange market data")
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    rec = sub.add_parser('record', help="poll prices through APIManager and record the raw responses")
+    rec.add_argument('path')
+    rec.add_argument('--exchange', default='Binance')
+    rec.add_argument('--symbols', default='BTCUSDT,ETHUSDT')
+    rec.add_argument('--interval', type=float, default=1.0)
+    rec.add_argument('--duration', type=float, default=60.0)
+    srv = sub.add_parser('serve', help="serve a recording as a stand-in exchange")
+    srv.add_argument('path')
+    srv.add_argument('--speed', type=float, default=1.0)
+    srv.add_argument('--port', type=int, default=8765)
+    srv.add_argument('--loop', action='store_true', help="start over when the recording ends")
+    dmn = sub.add_parser('serve-daemon', help="serve a recording's price daemon answers over the daemon protocol")
+    dmn.add_argument('path')
+    dmn.add_argument('--speed', type=float, default=1.0)
+    dmn.add_argument('--socket', help="Unix socket path")
+    dmn.add_argument('--port', type=int, help="TCP 127.0.0.1:PORT instead of a Unix socket")
+    dmn.add_argument('--loop', action='store_true', help="start over when the recording ends")
+    info = sub.add_parser('info')
+    info.add_argument('path')
+    args = ap.parse_args(argv)
+
+    if args.cmd == 'record':
+        from api_manager import APIManager
+        api = APIManager(cache_ttl=0, use_daemon=False)
+        symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+        with Recorder(args.path) as r:
+            r.attach(api)
+            end = time.monotonic() + args.duration
+            while time.monotonic() < end:
+                api.get_prices(args.exchange, symbols, max_age=0)
+                time.sleep(args.interval)
+            print(f"Recorded {r.records} responses to {args.path}", file=sys.stderr)
+    elif args.cmd == 'serve':
+        server = ReplayServer(args.path, args.speed, args.port, args.loop).start()
+        print(f"Replaying {args.path} at {args.speed:g}x on {server.base_url}", file=sys.stderr)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.stop()
+    elif args.cmd == 'serve-daemon':
+        import asyncio
+        from price_daemon import PriceDaemon
+        replay = DaemonReplay(args.path, args.speed, args.loop).start()
+        try:
+            asyncio.run(PriceDaemon(api=replay).serve(('127.0.0.1', args.port) if args.port is not None else args.socket))
+        except KeyboardInterrupt:
+            pass
+    else:
+        r = Recording(args.path)
+        kinds = {}
+        for rec in r.records():
+            kinds[rec['k']] = kinds.get(rec['k'], 0) + 1
+        size = os.path.getsize(args.path)
+        print(f"{len(r)} records in {len(r.chunks)} chunks, {r.duration:.1f}s, {size / 1024:.1f} KiB; {kinds}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
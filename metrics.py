@@ -0,0 +1,263 @@
+"""
+In-process metrics for Crypto Trading Calculator
+Counters, gauges and latency histograms with Prometheus text export
+"""
+
+import os
+import bisect
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_SAMPLES = 2048
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _fmt_labels(key):
+    if not key:
+        return ''
+    body = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in key)
+    return '{' + body + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text=''):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        k = _key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, k, v) for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class _Series:
+    __slots__ = ('buckets', 'count', 'sum', 'recent')
+
+    def __init__(self, n_buckets):
+        self.buckets = [0] * n_buckets
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+
+class Histogram:
+    """Cumulative buckets for export plus a window of recent samples for quantiles"""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text='', buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.bounds = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        k = _key(labels)
+        with self._lock:
+            s = self._series.get(k)
+            if s is None:
+                s = self._series[k] = _Series(len(self.bounds))
+            i = bisect.bisect_left(self.bounds, value)
+            if i < len(self.bounds):
+                s.buckets[i] += 1
+            s.count += 1
+            s.sum += value
+            s.recent.append(value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def label_sets(self):
+        with self._lock:
+            return [dict(k) for k in self._series]
+
+    def count(self, **labels):
+        s = self._series.get(_key(labels))
+        return s.count if s else 0
+
+    def quantile(self, q, **labels):
+        """Quantile over the recent samples of one label set, None if empty"""
+        with self._lock:
+            s = self._series.get(_key(labels))
+            data = sorted(s.recent) if s else []
+        if not data:
+            return None
+        idx = min(len(data) - 1, max(0, int(round(q * (len(data) - 1)))))
+        return data[idx]
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for k, s in self._series.items():
+                running = 0
+                for bound, n in zip(self.bounds, s.buckets):
+                    running += n
+                    out.append((self.name + '_bucket', k + (('le', repr(bound)),), running))
+                out.append((self.name + '_bucket', k + (('le', '+Inf'),), s.count))
+                out.append((self.name + '_sum', k, s.sum))
+                out.append((self.name + '_count', k, s.count))
+        return out
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _get_or_create(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help_text, **kwargs)
+            elif not isinstance(m, cls):
+                raise ValueError(f"Metric {name} already registered as {m.kind}")
+            return m
+
+    def counter(self, name, help_text=''):
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name, help_text=''):
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name, help_text='', buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def to_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for m in metrics:
+            if m.help:
+                lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, k, v in m.samples():
+                lines.append(f"{name}{_fmt_labels(k)} {v}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write the text export atomically (for node_exporter's textfile collector)"""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+        return path
+
+    def serve(self, port=9108):
+        """Expose /metrics on 127.0.0.1 only; returns the running server"""
+        if self._server:
+            return self._server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+    def stop_serving(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def timed(histogram, **labels):
+    """Decorator observing the wall time of every call into histogram"""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+registry = MetricsRegistry()
+
+FETCH_LATENCY = registry.histogram('exchange_fetch_seconds', 'Latency of exchange HTTP requests')
+FETCH_TOTAL = registry.counter('exchange_fetch_total', 'Exchange requests by outcome')
+PRICE_CACHE = registry.counter('price_cache_total', 'Price cache lookups by outcome (hit/miss)')
+HISTORY_SAVE = registry.histogram('history_save_seconds', 'Time to persist trade history')
+HISTORY_SIZE = registry.gauge('history_trades', 'Trades held in history')
+CALC_LATENCY = registry.histogram('calc_seconds', 'Time spent in position size calculation')
+CHART_RENDER = registry.histogram('chart_render_seconds', 'Time to build a chart figure')
+
+
+def exchange_summary():
+    """
+    Per exchange/endpoint latency quantiles (seconds) for the diagnostics panel
+    errors counts every outcome other than 'ok' (timeouts/connection errors, HTTP errors, parse errors)
+    """
+    failed = {}
+    for _, key, value in FETCH_TOTAL.samples():
+        labels = dict(key)
+        if labels.get('outcome') != 'ok':
+            k = (labels.get('exchange', ''), labels.get('endpoint', ''))
+            failed[k] = failed.get(k, 0) + value
+    rows = []
+    for labels in sorted(FETCH_LATENCY.label_sets(), key=lambda d: (d.get('exchange', ''), d.get('endpoint', ''))):
+        ex, ep = labels.get('exchange', ''), labels.get('endpoint', '')
+        rows.append({
+            'exchange': ex,
+            'endpoint': ep,
+            'calls': FETCH_LATENCY.count(**labels),
+            'errors': failed.get((ex, ep), 0),
+            'p50': FETCH_LATENCY.quantile(0.50, **labels),
+            'p95': FETCH_LATENCY.quantile(0.95, **labels),
+            'p99': FETCH_LATENCY.quantile(0.99, **labels),
+        })
+    return rows
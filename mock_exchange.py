@@ -0,0 +1,149 @@
+"""
+Local stand-in exchange server for Crypto Trading Calculator
+Serves ticker responses shaped like each supported exchange so APIManager
+can be exercised offline (benchmarks, replay, manual testing)
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+BASE_PRICES = {
+    'BTCUSDT': 98000.0, 'ETHUSDT': 3400.0, 'SOLUSDT': 190.0, 'BNBUSDT': 690.0,
+    'XRPUSDT': 2.2, 'DOGEUSDT': 0.32, 'ADAUSDT': 0.9,
+}
+
+
+def _price(symbol):
+    sym = symbol.replace('-', '').replace('_', '').upper()
+    return BASE_PRICES.get(sym, 1.0)
+
+
+def _ticker_routes():
+    """path -> (query param, body builder) for every exchange APIManager knows"""
+    def binance(sym):
+        return {'symbol': sym, 'price': f"{_price(sym):.8f}"}
+
+    def binance_24h(sym):
+        if not sym:
+            # No symbol -> bulk ticker for every known pair
+            return [binance_24h(s) for s in BASE_PRICES]
+        p = _price(sym)
+        return {'symbol': sym, 'highPrice': str(p * 1.02), 'lowPrice': str(p * 0.97),
+                'volume': '12345.6', 'quoteVolume': str(p * 12345.6), 'priceChangePercent': '1.25', 'lastPrice': str(p)}
+
+    def binance_depth(sym):
+        p = _price(sym)
+        return {'bids': [[f"{p * (1 - i * 0.0001):.8f}", f"{0.5 + i * 0.1:.4f}"] for i in range(100)],
+                'asks': [[f"{p * (1 + (i + 1) * 0.0001):.8f}", f"{0.5 + i * 0.1:.4f}"] for i in range(100)]}
+
+    return {
+        '/api/v3/ticker/price': ('symbol', binance),
+        '/api/v3/depth': ('symbol', binance_depth),
+        '/api/v3/ticker/24hr': ('symbol', binance_24h),
+        '/v2/public/tickers': ('symbol', lambda s: {'result': [{'symbol': s, 'last_price': str(_price(s))}]}),
+        '/api/v5/market/ticker': ('instId', lambda s: {'code': '0', 'data': [{'instId': s, 'last': str(_price(s))}]}),
+        '/api/v1/market/orderbook/level1': ('symbol', lambda s: {'code': '200000', 'data': {'price': str(_price(s))}}),
+        '/api/v4/spot/tickers': ('currency_pair', lambda s: [{'currency_pair': s, 'last': str(_price(s))}]),
+        '/api/spot/v1/market/ticker': ('symbol', lambda s: {'code': '00000', 'data': {'symbol': s, 'close': str(_price(s))}}),
+        '/v1/market/ticker': ('market', lambda s: {'code': 0, 'data': {'ticker': {'last': str(_price(s))}}}),
+    }
+
+
+class MockExchangeServer:
+    """
+    Threaded HTTP server on 127.0.0.1
+    Extra routes can be registered with add_route(path, handler) where
+    handler(query_dict) returns (status, body_bytes, content_type)
+    """
+
+    def __init__(self, port=0):
+        self.port = port
+        self.routes = {}
+        self.requests = 0
+        self._httpd = None
+        for path, (param, build) in _ticker_routes().items():
+            self.add_json_route(path, param, build)
+        self.add_route('/api/v3/ticker/price', self._binance_price)
+
+    @staticmethod
+    def _binance_price(query):
+        # ?symbol=X -> object, ?symbols=["X","Y"] -> list
+        if 'symbols' in query:
+            syms = json.loads(query['symbols'][0])
+            body = [{'symbol': s, 'price': f"{_price(s):.8f}"} for s in syms]
+        else:
+            s = query.get('symbol', [''])[0]
+            body = {'symbol': s, 'price': f"{_price(s):.8f}"}
+        return 200, json.dumps(body).encode('utf-8'), 'application/json'
+
+    def add_route(self, path, handler):
+        self.routes[path] = handler
+
+    def add_json_route(self, path, param, build):
+        def handler(query):
+            sym = query.get(param, [''])[0]
+            return 200, json.dumps(build(sym)).encode('utf-8'), 'application/json'
+        self.add_route(path, handler)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.requests += 1
+                parts = urlsplit(self.path)
+                handler = server.routes.get(parts.path)
+                if handler is None:
+                    status, body, ctype = 404, b'{"msg":"not found"}', 'application/json'
+                else:
+                    status, body, ctype = handler(parse_qs(parts.query))
+                self.send_response(status)
+                self.send_header('Content-Type', ctype)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def point_api_at(api, base_url):
+    """Send every request of an APIManager (prices, stats, depth, exchange info) to base_url"""
+    api.base_url_override = base_url.rstrip('/')
+    return api
+
+
+if __name__ == "__main__":
+    import sys
+    srv = MockExchangeServer(int(sys.argv[1]) if len(sys.argv) > 1 else 8765).start()
+    print(f"Mock exchange listening on {srv.base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.stop()
@@ -0,0 +1,344 @@
+"""
+Paper trading engine for Crypto Trading Calculator
+
+Matches market, limit and stop orders against a price feed (live ticks from
+the refresh scheduler, or a recording from market_replay) without touching an
+exchange. Resting orders sit in four heaps per symbol - buy limits, sell
+limits, buy stops, sell stops - and the engine keeps the trigger price at the
+top of each, so a tick that crosses nothing costs four float comparisons.
+run() goes further for fast-forward simulation: it scans a whole price array
+with NumPy for the next tick that crosses anything and only steps through
+those.
+
+Positions are one-way (netted) per symbol, use isolated margin at the order's
+leverage, pay the configured fee on every fill and carry a liquidation stop at
+margin.liquidation_price; being liquidated forfeits the position's margin.
+Fills are kept in engine.fills and passed to on_fill listeners (main.py writes
+them to a paper trade history of their own).
+
+Not thread-safe: feed ticks and place orders from one thread.
+"""
+
+import heapq
+import itertools
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from margin import liquidation_price, DEFAULT_MMR
+
+INF = float('inf')
+SIDES = ('buy', 'sell')
+KINDS = ('market', 'limit', 'stop')
+
+Fill = namedtuple('Fill', 'order_id symbol side qty price fee pnl ts kind')
+
+
+class Order:
+    __slots__ = ('id', 'symbol', 'side', 'kind', 'qty', 'price', 'leverage', 'reduce_only', 'status', 'note')
+
+    def __init__(self, id, symbol, side, kind, qty, price, leverage, reduce_only, note):
+        self.id = id
+        self.symbol = symbol
+        self.side = side
+        self.kind = kind
+        self.qty = qty
+        self.price = price
+        self.leverage = leverage
+        self.reduce_only = reduce_only
+        self.status = 'open'
+        self.note = note
+
+    def __repr__(self):
+        return f"Order(#{self.id} {self.side} {self.qty:g} {self.symbol} {self.kind} @ {self.price:g}, {self.status})"
+
+
+class Position:
+    __slots__ = ('qty', 'entry', 'leverage', 'margin', 'realized', 'liq_id')
+
+    def __init__(self):
+        self.qty = 0.0        # signed: > 0 long, < 0 short
+        self.entry = 0.0
+        self.leverage = 1.0
+        self.margin = 0.0
+        self.realized = 0.0
+        self.liq_id = None
+
+
+class _Book:
+    """Resting orders of one symbol; bl/sl/bs/ss are the prices that trigger the top of each heap"""
+    __slots__ = ('buy_limits', 'sell_limits', 'buy_stops', 'sell_stops', 'bl', 'sl', 'bs', 'ss')
+
+    def __init__(self):
+        self.buy_limits = []    # (-price, id, order): fills when price <= bl
+        self.sell_limits = []   # (price, id, order): fills when price >= sl
+        self.buy_stops = []     # (price, id, order): triggers when price >= bs
+        self.sell_stops = []    # (-price, id, order): triggers when price <= ss
+        self.bl = -INF
+        self.sl = INF
+        self.bs = INF
+        self.ss = -INF
+
+    def heap(self, order):
+        if order.kind == 'stop':
+            return self.buy_stops if order.side == 'buy' else self.sell_stops
+        return self.buy_limits if order.side == 'buy' else self.sell_limits
+
+    def push(self, order):
+        sign = -1 if (order.side == 'buy') == (order.kind != 'stop') else 1
+        heapq.heappush(self.heap(order), (sign * order.price, order.id, order))
+        self.refresh()
+
+    def refresh(self):
+        # Drop cancelled/filled orders from the tops, then re-read the trigger prices
+        for h in (self.buy_limits, self.sell_limits, self.buy_stops, self.sell_stops):
+            while h and h[0][2].status != 'open':
+                heapq.heappop(h)
+        self.bl = -self.buy_limits[0][0] if self.buy_limits else -INF
+        self.sl = self.sell_limits[0][0] if self.sell_limits else INF
+        self.bs = self.buy_stops[0][0] if self.buy_stops else INF
+        self.ss = -self.sell_stops[0][0] if self.sell_stops else -INF
+
+    def triggered(self, price):
+        """The top order this price triggers (limits first), or None"""
+        if price <= self.bl:
+            return heapq.heappop(self.buy_limits)[2]
+        if price >= self.sl:
+            return heapq.heappop(self.sell_limits)[2]
+        if price >= self.bs:
+            return heapq.heappop(self.buy_stops)[2]
+        if price <= self.ss:
+            return heapq.heappop(self.sell_stops)[2]
+        return None
+
+    def __len__(self):
+        return len(self.buy_limits) + len(self.sell_limits) + len(self.buy_stops) + len(self.sell_stops)
+
+
+class PaperEngine:
+    """
+    balance: starting wallet in quote currency
+    fee_pct: fee per fill in percent of notional (Config.fee)
+    """
+
+    def __init__(self, balance=1000.0, fee_pct=0.1, mmr=DEFAULT_MMR):
+        self.balance = float(balance)
+        self.fee_pct = float(fee_pct)
+        self.mmr = mmr
+        self.fills = []
+        self.listeners = []
+        self._books = {}
+        self._orders = {}
+        self._positions = {}
+        self._brackets = {}     # entry order id -> (stop_loss, take_profits)
+        self._last = {}
+        self._ids = itertools.count(1)
+
+    # ---- orders ----
+
+    def place(self, symbol, side, qty, kind='market', price=None, leverage=1.0, reduce_only=False, note=''):
+        """New order; returns it (already filled when marketable and the last price is known)"""
+        if side not in SIDES or kind not in KINDS:
+            raise ValueError(f"bad order: {side} {kind}")
+        if qty <= 0 or leverage < 1:
+            raise ValueError("qty must be > 0 and leverage >= 1")
+        if kind != 'market' and not price:
+            raise ValueError(f"{kind} order needs a price")
+        # A market order is a limit at the far end of the book: any tick fills it, at that tick's price
+        limit = float(price) if kind != 'market' else (INF if side == 'buy' else 0.0)
+        order = Order(next(self._ids), symbol, side, kind, float(qty), limit, float(leverage), reduce_only, note)
+        self._orders[order.id] = order
+        book = self._books.get(symbol) or self._books.setdefault(symbol, _Book())
+        last = self._last.get(symbol)
+        if last is not None and self._marketable(order, last):
+            self._execute(order, last, time.time(), [], at_market=True)
+            book.refresh()
+        else:
+            book.push(order)
+        return order
+
+    @staticmethod
+    def _marketable(order, price):
+        if order.kind == 'stop':
+            return price >= order.price if order.side == 'buy' else price <= order.price
+        return price <= order.price if order.side == 'buy' else price >= order.price
+
+    def bracket(self, symbol, entry, stop_loss, qty, take_profits=(), leverage=1.0, kind='limit', note=''):
+        """Entry plus SL (and TPs, qty split evenly) placed once the entry fills; returns the entry order"""
+        side = 'buy' if stop_loss < entry else 'sell'
+        order = self.place(symbol, side, qty, kind, entry, leverage, note=note)
+        if order.status == 'filled':
+            self._place_exits(order, stop_loss, take_profits)
+        elif order.status == 'open':
+            self._brackets[order.id] = (stop_loss, tuple(take_profits))
+        return order
+
+    def _place_exits(self, entry, stop_loss, take_profits):
+        exit_side = 'sell' if entry.side == 'buy' else 'buy'
+        self.place(entry.symbol, exit_side, entry.qty, 'stop', stop_loss, entry.leverage, True, note=f"SL #{entry.id}")
+        for tp in take_profits:
+            self.place(entry.symbol, exit_side, entry.qty / len(take_profits), 'limit', tp, entry.leverage, True,
+                       note=f"TP #{entry.id}")
+
+    def cancel(self, order_id):
+        order = self._orders.get(order_id)
+        if order is None or order.status != 'open':
+            return False
+        order.status = 'cancelled'
+        self._brackets.pop(order_id, None)
+        self._books[order.symbol].refresh()
+        return True
+
+    def order(self, order_id):
+        return self._orders.get(order_id)
+
+    def open_orders(self, symbol=None):
+        return [o for o in self._orders.values() if o.status == 'open' and symbol in (None, o.symbol)]
+
+    # ---- matching ----
+
+    def on_tick(self, symbol, price, ts=None):
+        """Feed one price; returns the fills it caused"""
+        self._last[symbol] = price
+        b = self._books.get(symbol)
+        if b is None or (b.bl < price < b.sl and b.ss < price < b.bs):
+            return ()
+        fills = []
+        ts = time.time() if ts is None else ts
+        while True:
+            order = b.triggered(price)
+            if order is None:
+                break
+            if order.status == 'open':
+                self._execute(order, price, ts, fills)
+            b.refresh()
+        return fills
+
+    def run(self, symbol, prices, times=None, chunk=4096):
+        """
+        Fast-forward over a price array (and optional parallel timestamps)
+        Ticks that trigger nothing are skipped in bulk; returns the fills
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        fills = []
+        i, n = 0, len(prices)
+        while i < n:
+            b = self._books.get(symbol)
+            if b is None or not len(b):
+                break
+            seg = prices[i:i + chunk]
+            hit = (seg <= b.bl) | (seg >= b.sl) | (seg >= b.bs) | (seg <= b.ss)
+            j = int(hit.argmax())
+            if not hit[j]:
+                i += len(seg)
+                continue
+            i += j
+            fills.extend(self.on_tick(symbol, float(prices[i]), None if times is None else float(times[i])))
+            i += 1
+        if n:
+            self._last[symbol] = float(prices[-1])
+        return fills
+
+    def _execute(self, order, price, ts, fills, at_market=False):
+        pos = self._positions.setdefault(order.symbol, Position())
+        signed = order.qty if order.side == 'buy' else -order.qty
+        qty = order.qty
+        if order.reduce_only:
+            if pos.qty == 0 or (pos.qty > 0) == (signed > 0):
+                order.status = 'cancelled'
+                return
+            qty = min(qty, abs(pos.qty))
+            signed = qty if signed > 0 else -qty
+        # Resting limits fill at their limit and liquidations at the liquidation price; markets, stops
+        # and anything marketable when placed fill at the tick
+        liquidation = order.note == 'liquidation'
+        px = order.price if not at_market and (order.kind == 'limit' or liquidation) else price
+        closed = min(qty, abs(pos.qty)) if pos.qty and (pos.qty > 0) != (signed > 0) else 0.0
+        opening = qty - closed
+        released = pos.margin * closed / abs(pos.qty) if closed else 0.0
+        if liquidation:
+            # The exchange keeps the whole isolated margin, whatever the last price did past the liquidation level
+            pnl, fee = -released, 0.0
+        else:
+            pnl = closed * (px - pos.entry) * (1 if pos.qty > 0 else -1) if closed else 0.0
+            fee = qty * px * self.fee_pct / 100
+        if opening:
+            # Checked after the close leg: a flip frees the old margin and opens at the order's own leverage
+            leverage = pos.leverage if pos.qty and not closed else order.leverage
+            free = self.balance + pnl - sum(p.margin for p in self._positions.values()) + released
+            if opening * px / leverage > free:
+                order.status = 'rejected'
+                self._brackets.pop(order.id, None)
+                return
+
+        if closed:
+            pos.margin -= released
+            pos.qty += closed if signed > 0 else -closed
+            if abs(pos.qty) < 1e-12:
+                pos.qty = 0.0
+                pos.margin = 0.0
+        if opening:
+            if pos.qty == 0:
+                pos.entry = px
+                pos.leverage = order.leverage
+            else:
+                pos.entry = (abs(pos.qty) * pos.entry + opening * px) / (abs(pos.qty) + opening)
+            pos.qty += opening if signed > 0 else -opening
+            pos.margin += opening * px / pos.leverage
+        pos.realized += pnl
+        self.balance += pnl - fee
+        order.status = 'filled'
+
+        fill = Fill(order.id, order.symbol, order.side, qty, px, fee, pnl, ts, order.kind)
+        self.fills.append(fill)
+        fills.append(fill)
+        self._after_fill(order, pos)
+        for fn in self.listeners:
+            try:
+                fn(fill)
+            except Exception as e:
+                print(f"Paper fill listener error: {e}")
+
+    def _after_fill(self, order, pos):
+        if pos.liq_id is not None:
+            self.cancel(pos.liq_id)
+            pos.liq_id = None
+        if pos.qty == 0:
+            # Flat: whatever exits are still resting (the other side of a bracket) have nothing to close
+            for o in self.open_orders(order.symbol):
+                if o.reduce_only:
+                    self.cancel(o.id)
+        else:
+            long = pos.qty > 0
+            liq = float(liquidation_price(pos.entry, pos.leverage, long, mmr=self.mmr))
+            if 0 < liq < INF:
+                liq_order = Order(next(self._ids), order.symbol, 'sell' if long else 'buy', 'stop', abs(pos.qty), liq,
+                                  pos.leverage, True, 'liquidation')
+                self._orders[liq_order.id] = liq_order
+                self._books[order.symbol].push(liq_order)
+                pos.liq_id = liq_order.id
+        exits = self._brackets.pop(order.id, None)
+        if exits:
+            self._place_exits(order, *exits)
+
+    # ---- account ----
+
+    def position(self, symbol):
+        return self._positions.get(symbol) or Position()
+
+    def unrealized(self):
+        return sum(p.qty * (self._last.get(s, p.entry) - p.entry) for s, p in self._positions.items() if p.qty)
+
+    def equity(self):
+        return self.balance + self.unrealized()
+
+    def symbols(self):
+        """Symbols with open orders or positions (what the price feed has to cover)"""
+        return sorted({s for s, b in self._books.items() if self.open_orders(s)} |
+                      {s for s, p in self._positions.items() if p.qty})
+
+    def summary(self):
+        return {'balance': self.balance, 'equity': self.equity(), 'fills': len(self.fills),
+                'fees': sum(f.fee for f in self.fills), 'realized': sum(p.realized for p in self._positions.values()),
+                'open_orders': len(self.open_orders())}
@@ -0,0 +1,342 @@
+"""
+Shared local price daemon for Crypto Trading Calculator
+
+One process owns the exchange connections and the price cache; every app
+instance and bot using APIManager asks it over a local socket instead of
+polling the exchanges itself. APIManager uses the daemon automatically when it
+is running and fetches directly when it is not.
+
+Protocol: newline-delimited JSON over a Unix socket
+(~/.crypto_calculator/priced.sock), or over TCP 127.0.0.1 where Unix sockets
+are unavailable (the port is written to ~/.crypto_calculator/priced.port).
+
+    {"op": "price", "exchange": "Binance", "symbol": "BTCUSDT", "max_age": 2}  -> {"price": 98000.0}
+    {"op": "prices", "exchange": "Binance", "symbols": [...]}                -> {"prices": {...}}
+    {"op": "24h", "exchange": "Binance", "symbol": "BTCUSDT"}                -> {"stats": {...}}
+    {"op": "status"}                                                         -> {"requests": ..., ...}
+
+Price replies also carry "headroom": the exchange's rate-limit headroom (0-1) as
+last seen by the daemon, which is the process actually making the requests.
+
+    python price_daemon.py            # start
+    python price_daemon.py --status   # check a running daemon
+    python price_daemon.py --record session.mrec   # also record every upstream response (market_replay)
+
+Set CRYPTO_CALC_DAEMON=off to never use the daemon, or to a socket path /
+host:port to use a non-default address.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import threading
+
+from api_manager import HTTP_TIMEOUT
+
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".crypto_calculator")
+SOCKET_PATH = os.path.join(DATA_DIR, "priced.sock")
+PORT_FILE = os.path.join(DATA_DIR, "priced.port")
+ENV_VAR = "CRYPTO_CALC_DAEMON"
+HAS_UNIX = hasattr(socket, 'AF_UNIX') and sys.platform != 'win32'
+CONNECT_TIMEOUT = 2.0
+# A reply may wait on a full upstream fetch, so the client has to outlast the daemon's own timeout
+REQUEST_TIMEOUT = HTTP_TIMEOUT + 2.0
+
+# Set inside the daemon process so its own APIManager never calls back into itself
+_in_daemon = False
+
+
+class DaemonUnavailable(Exception):
+    """No daemon is reachable; callers should fetch directly"""
+
+
+def default_address():
+    """Socket path (str) or (host, port); None when disabled or no TCP daemon has registered"""
+    env = os.environ.get(ENV_VAR, '').strip()
+    if env.lower() in ('off', '0', 'no', 'false'):
+        return None
+    if env:
+        host, sep, port = env.rpartition(':')
+        if sep and port.isdigit() and '/' not in env:
+            return (host or '127.0.0.1', int(port))
+        return env
+    if HAS_UNIX:
+        return SOCKET_PATH
+    try:
+        with open(PORT_FILE, 'r') as f:
+            return ('127.0.0.1', int(f.read().strip()))
+    except (OSError, ValueError):
+        return None
+
+
+class PriceDaemonClient:
+    """
+    Blocking client with one persistent connection (thread-safe)
+    After a failed connect, further attempts are skipped for retry_after seconds
+    so the no-daemon path costs nothing
+    timeout covers a whole request and must exceed the daemon's upstream HTTP_TIMEOUT;
+    connect_timeout only the connect, so a missing or wedged daemon is detected quickly
+    """
+
+    def __init__(self, address=None, timeout=REQUEST_TIMEOUT, retry_after=5.0, connect_timeout=CONNECT_TIMEOUT):
+        self.address = address
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retry_after = retry_after
+        self._sock = None
+        self._file = None
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self.rate_headroom = {}    # exchange -> last headroom the daemon reported (it does the HTTP)
+
+    def _connect(self):
+        address = self.address or default_address()
+        if address is None:
+            raise DaemonUnavailable("no daemon address")
+        if isinstance(address, str):
+            if not os.path.exists(address):
+                raise DaemonUnavailable(f"{address} does not exist")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.connect_timeout)
+        try:
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            raise
+        sock.settimeout(self.timeout)
+        self._sock, self._file = sock, sock.makefile('rb')
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        for obj in (self._file, self._sock):
+            try:
+                if obj:
+                    obj.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+    def request(self, msg):
+        data = (json.dumps(msg) + '\n').encode('utf-8')
+        with self._lock:
+            if self._sock is None and time.monotonic() < self._down_until:
+                raise DaemonUnavailable("daemon recently unreachable")
+            # A connection that went stale since the last call gets one reconnect
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(data)
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("daemon closed the connection")
+                    reply = json.loads(line)
+                    if reply.get('headroom') is not None:
+                        self.rate_headroom[msg.get('exchange')] = reply['headroom']
+                    return reply
+                except DaemonUnavailable:
+                    self._down_until = time.monotonic() + self.retry_after
+                    raise
+                except (OSError, ValueError) as e:
+                    self._close()
+                    if attempt:
+                        self._down_until = time.monotonic() + self.retry_after
+                        raise DaemonUnavailable(str(e))
+
+    def available(self):
+        try:
+            return self.request({'op': 'ping'}).get('ok', False)
+        except DaemonUnavailable:
+            return False
+
+    def get_price(self, exchange, symbol, max_age=None):
+        """Price from the daemon (None if the daemon couldn't get one); raises DaemonUnavailable"""
+        return self.request({'op': 'price', 'exchange': exchange, 'symbol': symbol, 'max_age': max_age}).get('price')
+
+    def get_prices(self, exchange, symbols, max_age=None):
+        return self.request({'op': 'prices', 'exchange': exchange, 'symbols': list(symbols),
+                             'max_age': max_age}).get('prices', {})
+
+    def get_24h_stats(self, exchange, symbol):
+        return self.request({'op': '24h', 'exchange': exchange, 'symbol': symbol}).get('stats')
+
+    def status(self):
+        return self.request({'op': 'status'})
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client, or None inside the daemon itself or when disabled via CRYPTO_CALC_DAEMON=off"""
+    global _client
+    if _in_daemon or os.environ.get(ENV_VAR, '').strip().lower() in ('off', '0', 'no', 'false'):
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PriceDaemonClient()
+    return _client
+
+
+class PriceDaemon:
+    def __init__(self, api=None, cache_ttl=1.0):
+        self.cache_ttl = cache_ttl
+        self._api = api
+        self._inflight = {}
+        self.requests = 0
+        self.clients = 0
+        self.started = time.time()
+
+    @property
+    def api(self):
+        if self._api is None:
+            from api_manager import APIManager
+            self._api = APIManager(cache_ttl=self.cache_ttl, use_daemon=False)
+        return self._api
+
+    async def _shared(self, key, fn, *args):
+        """Run fn in a worker thread; concurrent identical requests share one call"""
+        fut = self._inflight.get(key)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = self._inflight[key] = loop.run_in_executor(None, fn, *args)
+            fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(fut)
+
+    def _max_age(self, max_age):
+        return self.cache_ttl if max_age is None else max(float(max_age), 0.0)
+
+    async def price(self, exchange, symbol, max_age):
+        max_age = self._max_age(max_age)
+        cached = self.api.cache.get(exchange, symbol, max_age) if max_age > 0 else None
+        if cached is not None:
+            return cached
+        return await self._shared(('price', exchange, symbol), self.api.get_price, exchange, symbol, 0)
+
+    async def dispatch(self, msg):
+        op = msg.get('op')
+        if op == 'ping':
+            return {'ok': True}
+        if op == 'status':
+            return {'ok': True, 'requests': self.requests, 'clients': self.clients,
+                    'uptime': time.time() - self.started, 'pid': os.getpid()}
+        exchange = msg.get('exchange', 'Binance')
+        if op == 'price':
+            reply = {'price': await self.price(exchange, str(msg.get('symbol', '')).upper(), msg.get('max_age'))}
+        elif op == 'prices':
+            # One bulk upstream request (APIManager.get_prices), shared by clients asking for the same list
+            symbols = tuple(dict.fromkeys(str(s).upper() for s in msg.get('symbols', [])))
+            reply = {'prices': await self._shared(('prices', exchange, symbols), self.api.get_prices,
+                                                  exchange, list(symbols), self._max_age(msg.get('max_age')))}
+        elif op == '24h':
+            symbol = str(msg.get('symbol', '')).upper()
+            reply = {'stats': await self._shared(('24h', exchange, symbol), self.api.get_24h_stats, exchange, symbol)}
+        else:
+            return {'error': f"unknown op {op!r}"}
+        # The daemon makes the HTTP requests, so clients learn the rate-limit headroom from it
+        reply['headroom'] = self.api.rate_headroom.get(exchange)
+        return reply
+
+    async def handle(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.requests += 1
+                try:
+                    reply = await self.dispatch(json.loads(line))
+                except ValueError:
+                    reply = {'error': 'invalid JSON'}
+                except Exception as e:
+                    reply = {'error': str(e)}
+                writer.write((json.dumps(reply) + '\n').encode('utf-8'))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def serve(self, address=None):
+        global _in_daemon
+        _in_daemon = True
+        os.makedirs(DATA_DIR, exist_ok=True)
+        if HAS_UNIX and (address is None or isinstance(address, str)):
+            path = address or SOCKET_PATH
+            if os.path.exists(path):
+                if PriceDaemonClient(path, retry_after=0).available():
+                    raise RuntimeError(f"a price daemon is already running on {path}")
+                os.unlink(path)
+            server = await asyncio.start_unix_server(self.handle, path=path)
+            where, cleanup = path, path
+        else:
+            host, port = address if isinstance(address, tuple) else ('127.0.0.1', 0)
+            server = await asyncio.start_server(self.handle, host, port)
+            port = server.sockets[0].getsockname()[1]
+            with open(PORT_FILE, 'w') as f:
+                f.write(str(port))
+            where, cleanup = f"{host}:{port}", PORT_FILE
+        print(f"Price daemon listening on {where}", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            try:
+                os.unlink(cleanup)
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Shared local price daemon")
+    ap.add_argument('--socket', help="Unix socket path (default ~/.crypto_calculator/priced.sock)")
+    ap.add_argument('--port', type=int, help="listen on TCP 127.0.0.1:PORT instead of a Unix socket")
+    ap.add_argument('--ttl', type=float, default=1.0, help="seconds a fetched price is served from cache")
+    ap.add_argument('--status', action='store_true', help="query a running daemon and exit")
+    ap.add_argument('--record', metavar='PATH', help="record every upstream response for market_replay.py")
+    args = ap.parse_args(argv)
+
+    address = ('127.0.0.1', args.port) if args.port is not None else args.socket
+    if args.status:
+        try:
+            print(json.dumps(PriceDaemonClient(address, retry_after=0).status()))
+            return 0
+        except DaemonUnavailable as e:
+            print(f"No price daemon running ({e})", file=sys.stderr)
+            return 1
+    daemon = PriceDaemon(cache_ttl=args.ttl)
+    recorder = None
+    if args.record:
+        from market_replay import Recorder
+        recorder = Recorder(args.record)
+        recorder.attach(daemon.api)
+    try:
+        asyncio.run(daemon.serve(address))
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if recorder:
+            recorder.close()
+            print(f"Recorded {recorder.records} responses to {args.record}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Session profiling and UI stall detection for Crypto Trading Calculator
+
+LagWatchdog schedules a root.after heartbeat on the Tk event loop; a monitor
+thread notices when the heartbeat stops arriving for longer than a threshold
+and grabs the main thread's stack at that moment (sys._current_frames), so a
+stall report points at the blocking call - a network request, a history
+rewrite, a rebuild - instead of just saying "it froze".
+
+ProfileSession (python main.py --profile) runs cProfile on the UI thread and
+tracemalloc for the whole session, then writes one text report (top functions,
+memory growth by line, every stall with its stack) plus the raw .prof file for
+snakeviz/pstats.
+"""
+
+import os
+import sys
+import time
+import io
+import pstats
+import cProfile
+import threading
+import traceback
+import tracemalloc
+from datetime import datetime
+
+
+class LagWatchdog:
+    """
+    threshold: seconds without a heartbeat that count as a stall
+    interval: heartbeat period in seconds (also the detection resolution)
+    on_stall(stall) is called from the monitor thread when a stall ends
+    """
+
+    def __init__(self, root, threshold=0.2, interval=0.05, max_stalls=500, on_stall=None):
+        self.root = root
+        self.threshold = threshold
+        self.interval = interval
+        self.max_stalls = max_stalls
+        self.on_stall = on_stall
+        self.stalls = []
+        self.beats = 0
+        self._last = time.monotonic()
+        self._current = None     # stall in progress
+        self._main_id = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._after = None
+        self._thread = None
+
+    def _beat(self):
+        self._last = time.monotonic()
+        self.beats += 1
+        if not self._stop.is_set():
+            self._after = self.root.after(int(self.interval * 1000), self._beat)
+
+    def _stack(self):
+        frame = sys._current_frames().get(self._main_id)
+        return ''.join(traceback.format_stack(frame)) if frame is not None else ''
+
+    def _monitor(self):
+        while not self._stop.wait(self.interval / 2):
+            lag = time.monotonic() - self._last - self.interval
+            if lag > self.threshold:
+                if self._current is None:
+                    # First look at this stall: the main thread is still inside the blocking call
+                    self._current = {'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+                                     'duration': lag, 'stack': self._stack()}
+                else:
+                    self._current['duration'] = lag
+            elif self._current is not None:
+                self._finish()
+
+    def _finish(self):
+        stall, self._current = self._current, None
+        if len(self.stalls) < self.max_stalls:
+            self.stalls.append(stall)
+        if self.on_stall:
+            try:
+                self.on_stall(stall)
+            except Exception as e:
+                print(f"Watchdog callback error: {e}")
+
+    def start(self):
+        self._stop.clear()
+        self._last = time.monotonic()
+        self._beat()
+        self._thread = threading.Thread(target=self._monitor, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(1)
+        if self._current is not None:
+            self._finish()
+        if self._after is not None:
+            try:
+                self.root.after_cancel(self._after)
+            except Exception:
+                pass
+
+    def summary(self):
+        durations = sorted(s['duration'] for s in self.stalls)
+        return {'stalls': len(durations), 'total': sum(durations),
+                'worst': durations[-1] if durations else 0.0, 'beats': self.beats}
+
+    def report(self):
+        s = self.summary()
+        lines = [f"Event-loop stalls over {self.threshold * 1000:.0f} ms: {s['stalls']} "
+                 f"(total {s['total']:.2f} s, worst {s['worst'] * 1000:.0f} ms)"]
+        for st in sorted(self.stalls, key=lambda x: -x['duration']):
+            lines.append(f"\n--- {st['at']}  {st['duration'] * 1000:.0f} ms ---\n{st['stack'].rstrip()}")
+        return '\n'.join(lines)
+
+
+class ProfileSession:
+    """cProfile (calling thread) + tracemalloc snapshots + optional LagWatchdog, written to out_dir"""
+
+    def __init__(self, out_dir, frames=25, top=40):
+        self.out_dir = out_dir
+        self.frames = frames
+        self.top = top
+        self.profiler = cProfile.Profile()
+        self.watchdog = None
+        self._snap0 = None
+        self._started = None
+
+    def start(self):
+        self._started = datetime.now()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._snap0 = tracemalloc.take_snapshot()
+        self.profiler.enable()
+        return self
+
+    def watch(self, root, threshold=0.2):
+        self.watchdog = LagWatchdog(root, threshold).start()
+        return self.watchdog
+
+    def _memory_report(self, snap):
+        snap = snap.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),
+                                   tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")))
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"Traced memory: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB",
+                 "", f"Top {self.top // 2} allocation growth by line:"]
+        for stat in snap.compare_to(self._snap0, 'lineno')[:self.top // 2]:
+            lines.append(f"  {stat}")
+        lines += ["", f"Top {self.top // 2} live allocations by line:"]
+        for stat in snap.statistics('lineno')[:self.top // 2]:
+            lines.append(f"  {stat}")
+        return '\n'.join(lines)
+
+    def stop(self):
+        """Stop everything and write the report; returns the report path"""
+        self.profiler.disable()
+        if self.watchdog:
+            self.watchdog.stop()
+        snap = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = self._started.strftime('%Y%m%d-%H%M%S')
+        base = os.path.join(self.out_dir, f"profile-{stamp}")
+        self.profiler.dump_stats(base + ".prof")
+
+        buf = io.StringIO()
+        pstats.Stats(self.profiler, stream=buf).sort_stats('cumulative').print_stats(self.top)
+        elapsed = (datetime.now() - self._started).total_seconds()
+        sections = [f"Profile session {self._started:%Y-%m-%d %H:%M:%S}, {elapsed:.1f} s",
+                    "=" * 60, "CPU (cProfile, UI thread, by cumulative time)", buf.getvalue().strip(),
+                    "=" * 60, "Memory (tracemalloc)", self._memory_report(snap)]
+        if self.watchdog:
+            sections += ["=" * 60, self.watchdog.report()]
+        with open(base + ".txt", 'w', encoding='utf-8') as f:
+            f.write('\n'.join(sections) + '\n')
+        return base + ".txt"
@@ -0,0 +1,168 @@
+"""
+Adaptive live-price refresh for Crypto Trading Calculator
+
+Polls only the symbols somebody is looking at (the selected symbol, armed
+alerts, open trades), with one batched request per exchange. Each exchange
+gets its own interval that shrinks when prices move fast, grows when they are
+quiet or the exchange reports little rate-limit headroom, and backs off while
+the window is minimized.
+"""
+
+import time
+import threading
+
+# Average absolute move per poll that the base interval is tuned for (0.1 %)
+REFERENCE_MOVE = 0.001
+HIDDEN_FACTOR = 6.0
+
+
+class _ExchangeState:
+    __slots__ = ('interval', 'due', 'last', 'move', 'polls', 'errors')
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.due = 0.0
+        self.last = {}       # symbol -> last price
+        self.move = None     # EWMA of mean |return| per poll
+        self.polls = 0
+        self.errors = 0
+
+
+class RefreshScheduler:
+    """
+    callback(exchange, {symbol: price}) runs on the scheduler thread after every poll;
+    UI code should hop back to its own thread (root.after)
+    """
+
+    def __init__(self, api, callback, base_interval=5.0, min_interval=1.0, max_interval=60.0):
+        self.api = api
+        self.callback = callback
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.visible = True
+        self._watches = {}   # name -> {exchange: set(symbols)}
+        self._state = {}     # exchange -> _ExchangeState
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- what to poll ----
+
+    def watch(self, name, exchange, symbols):
+        """Replace the named watch set (e.g. 'visible', 'alerts', 'trades') for one exchange"""
+        with self._lock:
+            self._watches.setdefault(name, {})[exchange] = set(symbols)
+            if exchange not in self._state:
+                self._state[exchange] = _ExchangeState(self.base_interval)
+        self._wake.set()
+
+    def unwatch(self, name, exchange=None):
+        with self._lock:
+            if exchange is None:
+                self._watches.pop(name, None)
+            else:
+                self._watches.get(name, {}).pop(exchange, None)
+
+    def watched(self):
+        """{exchange: sorted symbols} across every watch set"""
+        out = {}
+        with self._lock:
+            for sets in self._watches.values():
+                for ex, syms in sets.items():
+                    out.setdefault(ex, set()).update(syms)
+        return {ex: sorted(s) for ex, s in out.items() if s}
+
+    def set_visible(self, visible):
+        """Window mapped/unmapped; polling slows down HIDDEN_FACTOR times while hidden"""
+        if visible != self.visible:
+            self.visible = visible
+            now = time.monotonic()
+            with self._lock:
+                for st in self._state.values():
+                    # Coming back: refresh right away instead of waiting out the long interval
+                    st.due = now if visible else now + st.interval * HIDDEN_FACTOR
+            self._wake.set()
+
+    def set_base_interval(self, seconds):
+        self.base_interval = max(self.min_interval, float(seconds))
+        self._wake.set()
+
+    # ---- interval policy ----
+
+    def _next_interval(self, exchange, st):
+        interval = self.base_interval
+        if st.move is not None:
+            # Fast markets -> shorter interval, quiet ones -> longer (bounded to 4x either way)
+            interval *= min(4.0, max(0.25, REFERENCE_MOVE / max(st.move, 1e-9)))
+        headroom = self.api.rate_headroom.get(exchange)
+        if headroom is not None and headroom < 0.5:
+            interval /= max(headroom * 2, 0.1)
+        if st.errors:
+            interval *= 2 ** min(st.errors, 4)
+        if not self.visible:
+            interval *= HIDDEN_FACTOR
+        return min(self.max_interval * (HIDDEN_FACTOR if not self.visible else 1), max(self.min_interval, interval))
+
+    def _poll(self, exchange, symbols, st):
+        # Anything fresher than min_interval (another window, the daemon) is good enough
+        prices = self.api.get_prices(exchange, symbols, max_age=self.min_interval)
+        st.polls += 1
+        if not prices:
+            st.errors += 1
+            return
+        st.errors = 0
+        moves = [abs(p / st.last[s] - 1) for s, p in prices.items() if st.last.get(s)]
+        if moves:
+            m = sum(moves) / len(moves)
+            st.move = m if st.move is None else 0.7 * st.move + 0.3 * m
+        st.last.update(prices)
+        try:
+            self.callback(exchange, prices)
+        except Exception as e:
+            print(f"Refresh callback error: {e}")
+
+    def poll_now(self, exchange=None):
+        """Poll immediately (all exchanges or one); returns the number of exchanges polled"""
+        n = 0
+        for ex, syms in self.watched().items():
+            if exchange in (None, ex):
+                st = self._state[ex]
+                self._poll(ex, syms, st)
+                st.interval = self._next_interval(ex, st)
+                st.due = time.monotonic() + st.interval
+                n += 1
+        return n
+
+    # ---- thread ----
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            watched = self.watched()
+            for ex, syms in watched.items():
+                st = self._state[ex]
+                if st.due <= now:
+                    self._poll(ex, syms, st)
+                    st.interval = self._next_interval(ex, st)
+                    st.due = time.monotonic() + st.interval
+            dues = [self._state[ex].due for ex in watched]
+            timeout = max(0.05, min(dues) - time.monotonic()) if dues else None
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self):
+        return {ex: {'interval': st.interval, 'polls': st.polls, 'move': st.move, 'errors': st.errors,
+                     'headroom': self.api.rate_headroom.get(ex)} for ex, st in self._state.items()}
@@ -0,0 +1,314 @@
+"""
+24h market screener for Crypto Trading Calculator
+
+Pulls 24h stats for every symbol on every supported exchange with one bulk
+request per exchange, keeps them in a columnar in-memory table (one NumPy array
+per field, row index by (exchange, symbol)) and ranks/filters whole columns at
+once. A background thread refreshes one exchange at a time so the table stays
+current without bursts of requests.
+
+    python screener.py --by volatility --top 20
+"""
+
+import sys
+import time
+import argparse
+import threading
+
+import numpy as np
+
+from symbol_info import normalize
+
+
+def _f(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _pct(open_, last):
+    o, l = _f(open_), _f(last)
+    return (l - o) / o * 100 if o else np.nan
+
+
+# ---- bulk endpoints: exchange -> (url, parser(json) -> iterable of (symbol, last, high, low, quote_volume, change %)) ----
+
+def _binance(data):
+    for t in data:
+        yield (t['symbol'], _f(t.get('lastPrice')), _f(t.get('highPrice')), _f(t.get('lowPrice')),
+               _f(t.get('quoteVolume')), _f(t.get('priceChangePercent')))
+
+
+def _bybit(data):
+    for t in data.get('result', {}).get('list', []):
+        yield (t['symbol'], _f(t.get('lastPrice')), _f(t.get('highPrice24h')), _f(t.get('lowPrice24h')),
+               _f(t.get('turnover24h')), _f(t.get('price24hPcnt')) * 100)
+
+
+def _okx(data):
+    for t in data.get('data', []):
+        yield (t['instId'], _f(t.get('last')), _f(t.get('high24h')), _f(t.get('low24h')),
+               _f(t.get('volCcy24h')), _pct(t.get('open24h'), t.get('last')))
+
+
+def _kucoin(data):
+    for t in data.get('data', {}).get('ticker', []):
+        yield (t['symbol'], _f(t.get('last')), _f(t.get('high')), _f(t.get('low')),
+               _f(t.get('volValue')), _f(t.get('changeRate')) * 100)
+
+
+def _gate(data):
+    for t in data:
+        yield (t['currency_pair'], _f(t.get('last')), _f(t.get('high_24h')), _f(t.get('low_24h')),
+               _f(t.get('quote_volume')), _f(t.get('change_percentage')))
+
+
+def _bitget(data):
+    for t in data.get('data', []):
+        yield (t['symbol'], _f(t.get('lastPr')), _f(t.get('high24h')), _f(t.get('low24h')),
+               _f(t.get('quoteVolume')), _f(t.get('change24h')) * 100)
+
+
+def _coinex(data):
+    for t in data.get('data', []):
+        yield (t['market'], _f(t.get('last')), _f(t.get('high')), _f(t.get('low')),
+               _f(t.get('value')), _pct(t.get('open'), t.get('last')))
+
+
+BULK_ENDPOINTS = {
+    'Binance': ('https://api.binance.com/api/v3/ticker/24hr', _binance),
+    'Bybit': ('https://api.bybit.com/v5/market/tickers?category=spot', _bybit),
+    'OKX': ('https://www.okx.com/api/v5/market/tickers?instType=SPOT', _okx),
+    'KuCoin': ('https://api.kucoin.com/api/v1/market/allTickers', _kucoin),
+    'Gate.io': ('https://api.gateio.ws/api/v4/spot/tickers', _gate),
+    'Bitget': ('https://api.bitget.com/api/v2/spot/market/tickers', _bitget),
+    'MEXC': ('https://api.mexc.com/api/v3/ticker/24hr', _binance),
+    'CoinEx': ('https://api.coinex.com/v2/spot/ticker', _coinex),
+}
+
+EXCHANGES = list(BULK_ENDPOINTS)
+FIELDS = ('last', 'high', 'low', 'volume', 'change', 'updated')
+SORT_KEYS = ('volume', 'volatility', 'change', 'abs_change')
+
+
+class MarketTable:
+    """Columnar 24h stats: one float64 array per field, rows addressed by (exchange, symbol)"""
+
+    def __init__(self, capacity=4096):
+        self._n = 0
+        self._index = {}                 # (exchange, symbol) -> row
+        self.symbols = []                # row -> normalized symbol
+        self.exchange = np.zeros(capacity, dtype=np.int8)
+        self.cols = {f: np.full(capacity, np.nan) for f in FIELDS}
+        self._quote_masks = {}           # quote -> bool array over rows, extended as rows are added
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._n
+
+    def _grow(self, need):
+        cap = len(self.exchange)
+        if need <= cap:
+            return
+        cap = max(need, cap * 2)
+        self.exchange = np.resize(self.exchange, cap)
+        for f, col in self.cols.items():
+            grown = np.full(cap, np.nan)
+            grown[:self._n] = col[:self._n]
+            self.cols[f] = grown
+
+    def upsert(self, exchange, rows, ts=None):
+        """Write one exchange's snapshot; existing rows are updated in place, new symbols appended"""
+        ts = time.time() if ts is None else ts
+        code = EXCHANGES.index(exchange)
+        idx, values = [], []
+        with self._lock:
+            for sym, *vals in rows:
+                sym = normalize(sym)
+                key = (exchange, sym)
+                row = self._index.get(key)
+                if row is None:
+                    self._grow(self._n + 1)
+                    row = self._index[key] = self._n
+                    self.symbols.append(sym)
+                    self.exchange[row] = code
+                    self._n += 1
+                idx.append(row)
+                values.append(vals)
+            if not idx:
+                return 0
+            idx = np.asarray(idx)
+            arr = np.asarray(values, dtype=np.float64)
+            for j, f in enumerate(FIELDS[:-1]):
+                self.cols[f][idx] = arr[:, j]
+            self.cols['updated'][idx] = ts
+        return len(idx)
+
+    def column(self, name):
+        n = self._n
+        if name == 'volatility':
+            # 24h range as % of last price
+            c = self.cols
+            return (c['high'][:n] - c['low'][:n]) / c['last'][:n] * 100
+        if name == 'abs_change':
+            return np.abs(self.cols['change'][:n])
+        return self.cols[name][:n]
+
+    def mask(self, exchange=None, quote=None, min_volume=0.0, max_age=None):
+        n = self._n
+        m = np.isfinite(self.cols['last'][:n])
+        if exchange is not None:
+            m &= self.exchange[:n] == EXCHANGES.index(exchange)
+        if min_volume:
+            m &= self.cols['volume'][:n] >= min_volume
+        if max_age is not None:
+            m &= self.cols['updated'][:n] >= time.time() - max_age
+        if quote:
+            m &= self._quote_mask(quote)
+        return m
+
+    def _quote_mask(self, quote):
+        done = self._quote_masks.get(quote, np.zeros(0, dtype=bool))
+        if len(done) < self._n:
+            new = np.fromiter((s.endswith(quote) for s in self.symbols[len(done):self._n]), dtype=bool)
+            done = self._quote_masks[quote] = np.concatenate([done, new])
+        return done[:self._n]
+
+    def rank(self, by='volume', top=20, ascending=False, **filters):
+        """Top rows by a column (see SORT_KEYS) after filtering; list of dicts"""
+        with self._lock:
+            values = self.column(by)
+            rows = np.nonzero(self.mask(**filters) & np.isfinite(values))[0]
+            if not len(rows):
+                return []
+            key = values[rows] if ascending else -values[rows]
+            if top and top < len(rows):
+                part = np.argpartition(key, top - 1)[:top]
+                rows, key = rows[part], key[part]
+            rows = rows[np.argsort(key, kind='stable')]
+            return [self.row(r) for r in rows]
+
+    def row(self, r):
+        d = {f: float(self.cols[f][r]) for f in FIELDS}
+        d['symbol'] = self.symbols[r]
+        d['exchange'] = EXCHANGES[self.exchange[r]]
+        d['volatility'] = (d['high'] - d['low']) / d['last'] * 100 if d['last'] else float('nan')
+        return d
+
+    def get(self, exchange, symbol):
+        r = self._index.get((exchange, normalize(symbol)))
+        return None if r is None else self.row(r)
+
+    def volumes(self, exchange):
+        """{symbol: quote volume} for one exchange ({} for exchanges the screener doesn't cover)"""
+        if exchange not in EXCHANGES:
+            return {}
+        with self._lock:
+            rows = np.nonzero(self.exchange[:self._n] == EXCHANGES.index(exchange))[0]
+            vol = self.cols['volume'][rows]
+            return {self.symbols[r]: float(v) for r, v in zip(rows, vol)}
+
+
+class Screener:
+    def __init__(self, api=None, exchanges=None, interval=60.0):
+        self._api = api
+        self.exchanges = list(exchanges or EXCHANGES)
+        self.interval = interval
+        self.table = MarketTable()
+        self.last_refresh = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._listeners = []
+
+    @property
+    def api(self):
+        if self._api is None:
+            from api_manager import APIManager
+            self._api = APIManager()
+        return self._api
+
+    def subscribe(self, callback):
+        """callback(exchange, rows) after every successful refresh (called from the worker thread)"""
+        self._listeners.append(callback)
+
+    def refresh(self, exchange):
+        """Fetch one exchange's bulk tickers into the table; row count or None on failure"""
+        url, parse = BULK_ENDPOINTS[exchange]
+        try:
+            r = self.api._http_get(url, exchange, 'tickers_24h', timeout=20)
+            if r.status_code != 200:
+                return None
+            n = self.table.upsert(exchange, parse(r.json()))
+        except Exception as e:
+            print(f"Error fetching 24h tickers from {exchange}: {e}")
+            return None
+        self.last_refresh[exchange] = time.time()
+        for cb in self._listeners:
+            try:
+                cb(exchange, n)
+            except Exception as e:
+                print(f"Screener listener error: {e}")
+        return n
+
+    def refresh_all(self):
+        return {ex: self.refresh(ex) for ex in self.exchanges}
+
+    def _run(self):
+        # Spread the exchanges over the interval instead of fetching them all at once
+        while not self._stop.is_set():
+            ex = min(self.exchanges, key=lambda e: self.last_refresh.get(e, 0))
+            if time.time() - self.last_refresh.get(ex, 0) >= self.interval:
+                if self.refresh(ex) is None:
+                    self.last_refresh[ex] = time.time()  # failed; retry next round
+            self._stop.wait(self.interval / len(self.exchanges))
+
+    def start(self, first=None):
+        """Background refresh; `first` exchange (e.g. the selected one) is fetched immediately"""
+        if self._thread and self._thread.is_alive():
+            return
+        if first in self.exchanges:
+            self.exchanges.remove(first)
+            self.exchanges.insert(0, first)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def rank(self, by='volume', top=20, **filters):
+        return self.table.rank(by, top, **filters)
+
+    def sort_by_activity(self, exchange, symbols):
+        """Order symbols by 24h quote volume on exchange; unknown ones keep their order at the end"""
+        vol = self.table.volumes(exchange)
+        if not vol:
+            return list(symbols)
+        return sorted(symbols, key=lambda s: -vol.get(normalize(s), -1.0))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rank symbols by 24h activity across exchanges")
+    ap.add_argument('--by', choices=SORT_KEYS, default='volume')
+    ap.add_argument('--top', type=int, default=20)
+    ap.add_argument('--exchange', action='append', choices=EXCHANGES, help="repeatable; default all")
+    ap.add_argument('--quote', default='USDT')
+    ap.add_argument('--min-volume', type=float, default=0.0, help="minimum 24h quote volume")
+    ap.add_argument('--asc', action='store_true')
+    args = ap.parse_args(argv)
+
+    sc = Screener(exchanges=args.exchange)
+    t0 = time.perf_counter()
+    counts = sc.refresh_all()
+    print(f"{len(sc.table)} rows from {sum(1 for n in counts.values() if n)} exchanges "
+          f"in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    print(f"{'Exchange':<9} {'Symbol':<14} {'Last':>14} {'Change %':>9} {'Range %':>8} {'Volume':>16}")
+    for r in sc.rank(args.by, args.top, ascending=args.asc, quote=args.quote, min_volume=args.min_volume):
+        print(f"{r['exchange']:<9} {r['symbol']:<14} {r['last']:>14g} {r['change']:>9.2f} "
+              f"{r['volatility']:>8.2f} {r['volume']:>16,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Local calculation service for trading bots
+
+Small asyncio HTTP/JSON server (TCP on 127.0.0.1 or a Unix socket) exposing the
+same sizing logic as App.do_calc. Concurrent /size requests are micro-batched
+into one vectorized sizing.calc_position_batch call; /price goes through the
+shared APIManager price cache with in-flight deduplication.
+
+    python service.py --port 8787
+    python service.py --unix /tmp/calc.sock
+
+Endpoints:
+    POST /size   {"capital", "risk", "entry", "sl", "leverage"} or a list of them
+    POST /pnl    {"entry", "sl", "take_profits": [...], "qty" | sizing fields, "fee"}
+    GET  /price?exchange=Binance&symbol=BTCUSDT
+    GET  /health
+"""
+
+import sys
+import json
+import math
+import asyncio
+import argparse
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+from sizing import calc_position_batch, project_pnl
+
+DEFAULTS = {'capital': 1000.0, 'risk': 1.0, 'leverage': 10.0, 'fee': 0.04}
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _setup(d):
+    """Validate one sizing request dict -> (capital, risk, entry, sl, leverage)"""
+    if not isinstance(d, dict):
+        raise BadRequest("setup must be an object")
+    try:
+        entry = float(d['entry'])
+        sl = float(d.get('sl', d.get('stop_loss')))
+        capital = float(d.get('capital', DEFAULTS['capital']))
+        risk = float(d.get('risk', d.get('risk_percent', DEFAULTS['risk'])))
+        lev = float(d.get('leverage', DEFAULTS['leverage']))
+    except (KeyError, TypeError, ValueError):
+        raise BadRequest("entry and sl must be numbers")
+    if not all(map(math.isfinite, (entry, sl, capital, risk, lev))):
+        raise BadRequest("numbers must be finite")
+    if entry <= 0 or entry == sl:
+        raise BadRequest("entry must be positive and differ from sl")
+    return capital, risk, entry, sl, lev
+
+
+class SizingBatcher:
+    """Collect concurrent sizing requests for up to max_delay seconds, then size them in one call"""
+
+    def __init__(self, max_batch=1024, max_delay=0.001):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, setup):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((setup, fut))
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self.flush)
+        return fut
+
+    def flush(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        cols = np.array([s for s, _ in batch], dtype=np.float64).T
+        pos, qty, ramt = calc_position_batch(*cols)
+        for i, (_, fut) in enumerate(batch):
+            if not fut.done():
+                fut.set_result((float(pos[i]), float(qty[i]), float(ramt[i])))
+        self.batches += 1
+        self.items += len(batch)
+
+
+class CalcService:
+    def __init__(self, api=None, max_batch=1024, max_delay=0.001):
+        self.batcher = SizingBatcher(max_batch, max_delay)
+        self._api = api
+        self._price_inflight = {}
+        self.requests = 0
+
+    @property
+    def api(self):
+        if self._api is None:
+            from api_manager import APIManager
+            self._api = APIManager()
+        return self._api
+
+    async def size(self, body):
+        items = body if isinstance(body, list) else [body]
+        setups = [_setup(d) for d in items]
+        results = await asyncio.gather(*(self.batcher.submit(s) for s in setups))
+        out = [
+            {'entry': s[2], 'sl': s[3], 'leverage': s[4], 'position_size': p, 'qty': q, 'risk_amount': r}
+            for s, (p, q, r) in zip(setups, results)
+        ]
+        return out if isinstance(body, list) else out[0]
+
+    async def pnl(self, body):
+        if not isinstance(body, dict):
+            raise BadRequest("body must be an object")
+        try:
+            tps = [float(x) for x in body.get('take_profits', [])]
+            fee = float(body.get('fee', DEFAULTS['fee']))
+            qty = None if body.get('qty') is None else float(body['qty'])
+        except (TypeError, ValueError):
+            raise BadRequest("take_profits, fee and qty must be numbers")
+        if not all(map(math.isfinite, tps + [fee] + ([] if qty is None else [qty]))):
+            raise BadRequest("numbers must be finite")
+        capital, risk, entry, sl, lev = _setup(body)
+        if qty is None:
+            _, qty, _ = await self.batcher.submit((capital, risk, entry, sl, lev))
+        return {'entry': entry, 'sl': sl, 'qty': qty, 'levels': project_pnl(entry, sl, qty, [sl] + tps, fee)}
+
+    async def price(self, query):
+        exchange = query.get('exchange', ['Binance'])[0]
+        symbol = query.get('symbol', [''])[0].upper()
+        if not symbol:
+            raise BadRequest("symbol is required")
+        key = (exchange, symbol)
+        fut = self._price_inflight.get(key)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = self._price_inflight[key] = loop.run_in_executor(None, self.api.get_price, exchange, symbol)
+            fut.add_done_callback(lambda _: self._price_inflight.pop(key, None))
+        price = await asyncio.shield(fut)
+        return {'exchange': exchange, 'symbol': symbol, 'price': price}
+
+    async def dispatch(self, method, target, body):
+        parts = urlsplit(target)
+        path = parts.path
+        try:
+            if path == '/health':
+                b = self.batcher
+                return 200, {'status': 'ok', 'requests': self.requests, 'batches': b.batches,
+                             'avg_batch': b.items / b.batches if b.batches else 0.0}
+            if path == '/price':
+                return 200, await self.price(parse_qs(parts.query))
+            if path in ('/size', '/pnl'):
+                if method != 'POST':
+                    return 405, {'error': 'use POST'}
+                try:
+                    data = json.loads(body or b'null')
+                except ValueError:
+                    raise BadRequest("invalid JSON")
+                return 200, await (self.size(data) if path == '/size' else self.pnl(data))
+            return 404, {'error': f"unknown path {path}"}
+        except BadRequest as e:
+            return 400, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, _ = line.decode('latin-1').split(None, 2)
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b'\r\n', b'\n', b''):
+                        break
+                    k, _, v = h.decode('latin-1').partition(':')
+                    headers[k.strip().lower()] = v.strip()
+                length = int(headers.get('content-length') or 0)
+                body = await reader.readexactly(length) if length else b''
+
+                self.requests += 1
+                status, payload = await self.dispatch(method.upper(), target, body)
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(
+                    b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+                    % (status, REASONS.get(status, '').encode(), len(data)) + data)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8787, unix=None):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, path=unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local calculation service")
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8787)
+    ap.add_argument('--unix', help="listen on this Unix socket path instead of TCP")
+    ap.add_argument('--max-batch', type=int, default=1024)
+    ap.add_argument('--max-delay-ms', type=float, default=1.0, help="micro-batch window")
+    args = ap.parse_args(argv)
+
+    svc = CalcService(max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000)
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"Calculation service on {where}", file=sys.stderr)
+    try:
+        asyncio.run(svc.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
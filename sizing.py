@@ -0,0 +1,42 @@
+"""
+Position sizing math shared by the UI and headless tools
+"""
+
+import numpy as np
+
+
+def calc_position(capital, risk_percent, entry, stop_loss, leverage):
+    """
+    Size a position so that hitting stop_loss loses risk_percent of capital
+    Returns: (position_size, qty, risk_amount)
+    """
+    risk_amount = capital * (risk_percent / 100)
+    diff = abs(entry - stop_loss) / entry
+    position_size = risk_amount / diff
+    qty = (position_size * leverage) / entry
+    return position_size, qty, risk_amount
+
+
+def calc_position_batch(capital, risk_percent, entry, stop_loss, leverage):
+    """Vectorized calc_position over array-likes; returns three float64 arrays"""
+    capital, risk_percent, entry, stop_loss, leverage = (
+        np.asarray(a, dtype=np.float64) for a in (capital, risk_percent, entry, stop_loss, leverage))
+    risk_amount = capital * (risk_percent / 100)
+    diff = np.abs(entry - stop_loss) / entry
+    position_size = risk_amount / diff
+    qty = (position_size * leverage) / entry
+    return position_size, qty, risk_amount
+
+
+def project_pnl(entry, stop_loss, qty, levels, fee_percent=0.0):
+    """
+    PnL of closing qty at each price in levels (side inferred from stop_loss)
+    Fees are charged on entry and exit notional
+    """
+    side = 1.0 if stop_loss < entry else -1.0
+    out = []
+    for price in levels:
+        gross = (price - entry) * qty * side
+        fees = (entry + price) * qty * fee_percent / 100
+        out.append({'price': price, 'pnl': gross - fees, 'pnl_percent': gross / (entry * qty) * 100 if qty else 0.0})
+    return out
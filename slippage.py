@@ -0,0 +1,159 @@
+"""
+Order-book slippage estimator for Crypto Trading Calculator
+
+Fetches L2 depth snapshots, keeps cumulative size/notional arrays per side and
+binary-searches them to find the average fill price of a market order of a
+given size. Snapshots are cached briefly so repeated sizing is cheap.
+"""
+
+import time
+import threading
+
+import numpy as np
+
+from symbol_info import native_symbol
+
+DEFAULT_TTL = 2.0
+
+# exchange -> (url template, parser(json) -> (bids, asks) as [[price, qty], ...])
+# {symbol} is filled in the exchange's own notation (BTC-USDT on OKX, BTC_USDT on Gate.io)
+DEPTH_ENDPOINTS = {
+    'Binance': ('https://api.binance.com/api/v3/depth?symbol={symbol}&limit=1000',
+                lambda d: (d['bids'], d['asks'])),
+    'MEXC': ('https://api.mexc.com/api/v3/depth?symbol={symbol}&limit=1000',
+             lambda d: (d['bids'], d['asks'])),
+    'Bybit': ('https://api.bybit.com/v5/market/orderbook?category=spot&symbol={symbol}&limit=200',
+              lambda d: (d['result']['b'], d['result']['a'])),
+    'OKX': ('https://www.okx.com/api/v5/market/books?instId={symbol}&sz=400',
+            lambda d: (d['data'][0]['bids'], d['data'][0]['asks'])),
+    'KuCoin': ('https://api.kucoin.com/api/v1/market/orderbook/level2_100?symbol={symbol}',
+               lambda d: (d['data']['bids'], d['data']['asks'])),
+    'Gate.io': ('https://api.gateio.ws/api/v4/spot/order_book?currency_pair={symbol}&limit=100',
+                lambda d: (d['bids'], d['asks'])),
+    'Bitget': ('https://api.bitget.com/api/v2/spot/market/orderbook?symbol={symbol}&limit=150',
+               lambda d: (d['data']['bids'], d['data']['asks'])),
+    'CoinEx': ('https://api.coinex.com/v2/spot/depth?market={symbol}&limit=50&interval=0',
+               lambda d: (d['data']['depth']['bids'], d['data']['depth']['asks'])),
+}
+
+
+class Fill:
+    __slots__ = ('avg_price', 'best_price', 'qty', 'notional', 'slippage_pct', 'levels', 'complete')
+
+    def __init__(self, avg_price, best_price, qty, notional, slippage_pct, levels, complete):
+        self.avg_price = avg_price
+        self.best_price = best_price
+        self.qty = qty
+        self.notional = notional
+        self.slippage_pct = slippage_pct
+        self.levels = levels
+        self.complete = complete
+
+    def __repr__(self):
+        return f"Fill(avg={self.avg_price:g}, slippage={self.slippage_pct:.4f}%, levels={self.levels}, complete={self.complete})"
+
+
+class BookSide:
+    """One side of the book, best price first, with running totals"""
+
+    def __init__(self, levels):
+        arr = np.asarray(levels, dtype=np.float64).reshape(-1, 2) if len(levels) else np.zeros((0, 2))
+        self.prices = arr[:, 0]
+        self.cum_qty = np.cumsum(arr[:, 1])
+        self.cum_notional = np.cumsum(arr[:, 0] * arr[:, 1])
+
+    def __len__(self):
+        return len(self.prices)
+
+    def fill(self, qty=None, notional=None):
+        """Walk the side for qty coins (or notional quote); None if the side is empty or the size isn't positive"""
+        if qty is None:
+            target, cum = notional, self.cum_notional
+        else:
+            target, cum = qty, self.cum_qty
+        if not len(self.prices) or not target > 0:
+            return None
+        best = self.prices[0]
+        k = int(np.searchsorted(cum, target, side='left'))
+        if k >= len(cum):
+            # Book too thin: everything visible gets taken
+            q, n = float(self.cum_qty[-1]), float(self.cum_notional[-1])
+            return Fill(n / q, best, q, n, abs(n / q - best) / best * 100, len(cum), False)
+        prev_q = self.cum_qty[k - 1] if k else 0.0
+        prev_n = self.cum_notional[k - 1] if k else 0.0
+        p = self.prices[k]
+        if qty is None:
+            q = prev_q + (notional - prev_n) / p
+            n = notional
+        else:
+            q = qty
+            n = prev_n + (qty - prev_q) * p
+        avg = n / q
+        return Fill(float(avg), float(best), float(q), float(n), float(abs(avg - best) / best * 100), k + 1, True)
+
+
+class OrderBook:
+    def __init__(self, exchange, symbol, bids, asks, ts=None):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.bids = BookSide(sorted(((float(p), float(q)) for p, q, *_ in bids), reverse=True))
+        self.asks = BookSide(sorted((float(p), float(q)) for p, q, *_ in asks))
+        self.ts = time.monotonic() if ts is None else ts
+
+    @property
+    def mid(self):
+        if len(self.bids) and len(self.asks):
+            return (self.bids.prices[0] + self.asks.prices[0]) / 2
+        return None
+
+    def estimate(self, side, qty=None, notional=None):
+        """side 'buy' walks the asks, 'sell' the bids; give qty (coins) or notional (quote)"""
+        if (qty is None) == (notional is None):
+            raise ValueError("give exactly one of qty or notional")
+        book = self.asks if side == 'buy' else self.bids
+        return book.fill(qty, notional)
+
+
+class SlippageEstimator:
+    def __init__(self, api=None, ttl=DEFAULT_TTL, symbols=None):
+        """symbols: optional SymbolIndex, used for the exact native symbol once an exchange is loaded"""
+        self._api = api
+        self.symbols = symbols
+        self.ttl = ttl
+        self._books = {}
+        self._lock = threading.Lock()
+
+    @property
+    def api(self):
+        if self._api is None:
+            from api_manager import APIManager
+            self._api = APIManager()
+        return self._api
+
+    def snapshot(self, exchange, symbol, max_age=None):
+        """Cached OrderBook (refetched after ttl seconds); None if unavailable"""
+        max_age = self.ttl if max_age is None else max_age
+        key = (exchange, symbol)
+        book = self._books.get(key)
+        if book and time.monotonic() - book.ts <= max_age:
+            return book
+        if exchange not in DEPTH_ENDPOINTS:
+            return None
+        url, parse = DEPTH_ENDPOINTS[exchange]
+        try:
+            native = self.symbols.native(exchange, symbol) if self.symbols else native_symbol(exchange, symbol)
+            r = self.api._http_get(url.format(symbol=native), exchange, 'depth')
+            if r.status_code != 200:
+                return None
+            bids, asks = parse(r.json())
+        except Exception as e:
+            print(f"Error fetching order book from {exchange}: {e}")
+            return None
+        book = OrderBook(exchange, symbol, bids, asks)
+        with self._lock:
+            self._books[key] = book
+        return book
+
+    def estimate(self, exchange, symbol, side, qty=None, notional=None):
+        book = self.snapshot(exchange, symbol)
+        return book.estimate(side, qty, notional) if book else None
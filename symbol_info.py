@@ -0,0 +1,277 @@
+"""
+Exchange symbol metadata for Crypto Trading Calculator
+Fetches exchange info once per exchange, persists it to disk with a refresh TTL
+and gives O(1) lookup of tick size, step size, min notional and trading status
+"""
+
+import os
+import json
+import time
+import threading
+from decimal import Decimal, ROUND_DOWN
+
+SYMBOLS_DIR = os.path.join(os.path.expanduser("~"), ".crypto_calculator", "symbols")
+DEFAULT_TTL = 24 * 3600
+
+
+def normalize(symbol):
+    """'BTC-USDT', 'btc_usdt', 'BTC/USDT' -> 'BTCUSDT'"""
+    return symbol.replace('-', '').replace('_', '').replace('/', '').replace(' ', '').upper()
+
+
+# Separator between base and quote in each exchange's own notation (others write BTCUSDT)
+NATIVE_SEPARATOR = {'OKX': '-', 'KuCoin': '-', 'Gate.io': '_'}
+# Quote currencies tried longest first when a symbol has to be split without exchange info
+QUOTES = ('FDUSD', 'USDT', 'USDC', 'TUSD', 'BUSD', 'USDE', 'EUR', 'TRY', 'BTC', 'ETH', 'BNB', 'USD')
+
+
+def native_symbol(exchange, symbol):
+    """'BTCUSDT' in the exchange's notation, e.g. OKX 'BTC-USDT', Gate.io 'BTC_USDT'"""
+    sym = normalize(symbol)
+    sep = NATIVE_SEPARATOR.get(exchange)
+    if not sep:
+        return sym
+    for quote in QUOTES:
+        if sym.endswith(quote) and len(sym) > len(quote):
+            return sym[:-len(quote)] + sep + quote
+    return sym
+
+
+def _precision_step(decimals):
+    """Number of decimals -> step, e.g. 3 -> 0.001"""
+    return 10.0 ** -int(decimals)
+
+
+def _f(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _round_down(value, step):
+    if not step:
+        return value
+    s = Decimal(repr(step))
+    return float((Decimal(repr(value)) / s).to_integral_value(rounding=ROUND_DOWN) * s)
+
+
+class SymbolInfo:
+    __slots__ = ('symbol', 'native', 'trading', 'tick_size', 'step_size', 'min_qty', 'min_notional')
+
+    def __init__(self, symbol, native, trading, tick_size, step_size, min_qty=0.0, min_notional=0.0):
+        self.symbol = symbol
+        self.native = native
+        self.trading = trading
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.min_qty = min_qty
+        self.min_notional = min_notional
+
+    def round_qty(self, qty):
+        return _round_down(qty, self.step_size)
+
+    def round_price(self, price):
+        return _round_down(price, self.tick_size)
+
+    def check(self, qty, price):
+        """List of reasons the order can't be placed (empty when fine)"""
+        problems = []
+        if not self.trading:
+            problems.append("not trading")
+        if self.min_qty and qty < self.min_qty:
+            problems.append(f"qty < min {self.min_qty:g}")
+        if self.min_notional and qty * price < self.min_notional:
+            problems.append(f"notional < min {self.min_notional:g}")
+        return problems
+
+    def to_list(self):
+        return [self.native, self.trading, self.tick_size, self.step_size, self.min_qty, self.min_notional]
+
+    @classmethod
+    def from_list(cls, symbol, row):
+        return cls(symbol, *row)
+
+    def __repr__(self):
+        return f"SymbolInfo({self.symbol}, tick={self.tick_size:g}, step={self.step_size:g}, trading={self.trading})"
+
+
+# ---- per exchange parsers: JSON payload -> iterable of SymbolInfo ----
+
+def _binance(data):
+    for s in data.get('symbols', []):
+        flt = {f['filterType']: f for f in s.get('filters', [])}
+        notional = flt.get('NOTIONAL') or flt.get('MIN_NOTIONAL') or {}
+        lot = flt.get('LOT_SIZE', {})
+        yield SymbolInfo(normalize(s['symbol']), s['symbol'], s.get('status') == 'TRADING',
+                         _f(flt.get('PRICE_FILTER', {}).get('tickSize')), _f(lot.get('stepSize')),
+                         _f(lot.get('minQty')), _f(notional.get('minNotional')))
+
+
+def _mexc(data):
+    for s in data.get('symbols', []):
+        yield SymbolInfo(normalize(s['symbol']), s['symbol'], str(s.get('status')) in ('1', 'ENABLED', 'TRADING'),
+                         _precision_step(s.get('quotePrecision', 8)), _f(s.get('baseSizePrecision')),
+                         0.0, _f(s.get('quoteAmountPrecision')))
+
+
+def _bybit(data):
+    for s in data.get('result', {}).get('list', []):
+        lot = s.get('lotSizeFilter', {})
+        yield SymbolInfo(normalize(s['symbol']), s['symbol'], s.get('status') == 'Trading',
+                         _f(s.get('priceFilter', {}).get('tickSize')), _f(lot.get('basePrecision')),
+                         _f(lot.get('minOrderQty')), _f(lot.get('minOrderAmt')))
+
+
+def _okx(data):
+    for s in data.get('data', []):
+        yield SymbolInfo(normalize(s['instId']), s['instId'], s.get('state') == 'live',
+                         _f(s.get('tickSz')), _f(s.get('lotSz')), _f(s.get('minSz')))
+
+
+def _kucoin(data):
+    for s in data.get('data', []):
+        yield SymbolInfo(normalize(s['symbol']), s['symbol'], bool(s.get('enableTrading')),
+                         _f(s.get('priceIncrement')), _f(s.get('baseIncrement')),
+                         _f(s.get('baseMinSize')), _f(s.get('minFunds')))
+
+
+def _gate(data):
+    for s in data:
+        yield SymbolInfo(normalize(s['id']), s['id'], s.get('trade_status') == 'tradable',
+                         _precision_step(s.get('precision', 8)), _precision_step(s.get('amount_precision', 8)),
+                         _f(s.get('min_base_amount')), _f(s.get('min_quote_amount')))
+
+
+def _bitget(data):
+    for s in data.get('data', []):
+        yield SymbolInfo(normalize(s['symbol']), s['symbol'], s.get('status') == 'online',
+                         _precision_step(s.get('pricePrecision', 8)), _precision_step(s.get('quantityPrecision', 8)),
+                         _f(s.get('minTradeAmount')), _f(s.get('minTradeUSDT')))
+
+
+def _coinex(data):
+    for s in data.get('data', []):
+        yield SymbolInfo(normalize(s['market']), s['market'], s.get('status', 'online') == 'online',
+                         _precision_step(s.get('quote_ccy_precision', 8)), _precision_step(s.get('base_ccy_precision', 8)),
+                         _f(s.get('min_amount')))
+
+
+EXCHANGE_INFO = {
+    'Binance': ('https://api.binance.com/api/v3/exchangeInfo', _binance),
+    'Bybit': ('https://api.bybit.com/v5/market/instruments-info?category=spot', _bybit),
+    'OKX': ('https://www.okx.com/api/v5/public/instruments?instType=SPOT', _okx),
+    'KuCoin': ('https://api.kucoin.com/api/v2/symbols', _kucoin),
+    'Gate.io': ('https://api.gateio.ws/api/v4/spot/currency_pairs', _gate),
+    'Bitget': ('https://api.bitget.com/api/v2/spot/public/symbols', _bitget),
+    'MEXC': ('https://api.mexc.com/api/v3/exchangeInfo', _mexc),
+    'CoinEx': ('https://api.coinex.com/v2/spot/market', _coinex),
+}
+
+
+class SymbolIndex:
+    def __init__(self, api=None, cache_dir=SYMBOLS_DIR, ttl=DEFAULT_TTL):
+        self._api = api
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._tables = {}      # exchange -> {symbol: SymbolInfo}
+        self._fetched_at = {}  # exchange -> epoch seconds
+        self._lock = threading.Lock()
+
+    @property
+    def api(self):
+        if self._api is None:
+            from api_manager import APIManager
+            self._api = APIManager()
+        return self._api
+
+    def _path(self, exchange):
+        return os.path.join(self.cache_dir, exchange.replace('.', '_') + '.json')
+
+    def _load_disk(self, exchange):
+        try:
+            with open(self._path(exchange), 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return False
+        table = {k: SymbolInfo.from_list(k, row) for k, row in raw.get('symbols', {}).items()}
+        with self._lock:
+            self._tables[exchange] = table
+            self._fetched_at[exchange] = raw.get('fetched_at', 0)
+        return True
+
+    def _save_disk(self, exchange, table, fetched_at):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(exchange)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'exchange': exchange, 'fetched_at': fetched_at,
+                       'symbols': {k: v.to_list() for k, v in table.items()}}, f)
+        os.replace(tmp, path)
+
+    def refresh(self, exchange):
+        """Fetch exchange info now; returns the number of symbols or None on failure"""
+        if exchange not in EXCHANGE_INFO:
+            return None
+        url, parse = EXCHANGE_INFO[exchange]
+        try:
+            r = self.api._http_get(url, exchange, 'exchange_info', timeout=20)
+            if r.status_code != 200:
+                return None
+            table = {info.symbol: info for info in parse(r.json())}
+        except Exception as e:
+            print(f"Error fetching exchange info from {exchange}: {e}")
+            return None
+        if not table:
+            return None
+        now = time.time()
+        with self._lock:
+            self._tables[exchange] = table
+            self._fetched_at[exchange] = now
+        try:
+            self._save_disk(exchange, table, now)
+        except OSError:
+            pass
+        return len(table)
+
+    def is_stale(self, exchange):
+        return time.time() - self._fetched_at.get(exchange, 0) > self.ttl
+
+    def ensure(self, exchange):
+        """Make the table available: memory, then disk, then network when stale"""
+        if exchange not in self._tables:
+            self._load_disk(exchange)
+        if self.is_stale(exchange):
+            self.refresh(exchange)
+        return exchange in self._tables
+
+    def ensure_async(self, exchange, callback=None):
+        def run():
+            ok = self.ensure(exchange)
+            if callback:
+                callback(exchange, ok)
+        threading.Thread(target=run, daemon=True).start()
+
+    def loaded(self, exchange):
+        return exchange in self._tables
+
+    def lookup(self, exchange, symbol):
+        """SymbolInfo from memory (never blocks on the network); None if unknown/not loaded"""
+        table = self._tables.get(exchange)
+        return table.get(normalize(symbol)) if table else None
+
+    def native(self, exchange, symbol):
+        """Symbol as the exchange writes it: from exchange info when loaded, else native_symbol()"""
+        info = self.lookup(exchange, symbol)
+        return info.native if info else native_symbol(exchange, symbol)
+
+    def is_valid(self, exchange, symbol):
+        """True/False once the exchange is loaded, None if we can't tell yet"""
+        if exchange not in self._tables:
+            return None
+        info = self.lookup(exchange, symbol)
+        return bool(info and info.trading)
+
+    def symbols(self, exchange, trading_only=True):
+        table = self._tables.get(exchange, {})
+        return sorted(k for k, v in table.items() if v.trading or not trading_only)
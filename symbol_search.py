@@ -0,0 +1,148 @@
+"""
+Symbol autocomplete for Crypto Trading Calculator
+
+A prefix trie over an exchange's symbol list where every node keeps the ids
+of its best-ranked completions (ids are ranks, so the lists come out sorted),
+making a prefix lookup a walk of len(query) dict hops. When nothing starts
+with the query it is matched fuzzily: first by edit distance, walking the same
+trie with one DP row per node (Levenshtein plus adjacent swaps, so "ehtusdt"
+-> ETHUSDT) and pruning branches that can no longer get within reach, then as
+a subsequence ("ethfidt" -> ETHFIUSDT). Symbols with a numeric multiplier
+(1000PEPEUSDT) are also reachable by their base name.
+
+    idx = SymbolSearch(symbols, weights=screener.table.volumes('Binance'))
+    idx.search('eth')        # ['ETHUSDT', 'ETHBTC', 'ETHFIUSDT', ...]
+"""
+
+from symbol_info import normalize
+
+# Completions cached per trie node
+TOP_K = 32
+# Typos tolerated by the fuzzy tier; 2 multiplies the trie area walked ~10x
+MAX_EDITS = 1
+CACHE_SIZE = 256
+
+
+def _keys(symbol):
+    yield symbol
+    stripped = symbol.lstrip('0123456789')
+    if stripped and stripped != symbol:
+        yield stripped
+
+
+def _is_subsequence(q, s):
+    it = iter(s)
+    return all(c in it for c in q)
+
+
+class SymbolSearch:
+    """
+    symbols: iterable of symbols in any notation (normalized on the way in)
+    weights: {symbol: score}, higher ranks first (e.g. 24h quote volume); ties go to shorter symbols
+    """
+
+    def __init__(self, symbols=(), weights=None):
+        self.build(symbols, weights)
+
+    def build(self, symbols, weights=None):
+        weights = {normalize(k): v for k, v in (weights or {}).items()}
+        syms = sorted({normalize(s) for s in symbols if s}, key=lambda s: (-weights.get(s, 0.0), len(s), s))
+        root = [{}, []]
+        by_first = {}
+        for i, s in enumerate(syms):
+            for key in _keys(s):
+                by_first.setdefault(key[0], []).append(i)
+                node = root
+                for ch in key:
+                    node = node[0].get(ch) or node[0].setdefault(ch, [{}, []])
+                    top = node[1]
+                    # Inserted in rank order, so each node's list is already its best TOP_K
+                    if len(top) < TOP_K:
+                        top.append(i)
+        self.symbols = syms
+        self._id = {s: i for i, s in enumerate(syms)}
+        self._root = root
+        self._by_first = by_first
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return normalize(symbol) in self._id
+
+    def _node(self, q):
+        node = self._root
+        for ch in q:
+            node = node[0].get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _edits(self, q, max_dist):
+        """
+        {id: distance} for symbols with a prefix within max_dist edits of q
+        The first character is taken as typed: it keeps the walk to one subtree, and typos there are rare
+        """
+        start = self._root[0].get(q[0])
+        if start is None:
+            return {}
+        found = {}
+        n = len(q)
+        first = list(range(n))    # row[j] = distance between the node's prefix and q[:j + 1]
+        # Rows are kept two deep for adjacent transpositions (optimal string alignment): 'ehtusdt' -> ETHUSDT
+        empty = list(range(1, n + 1))
+        stack = [(ch, child, first, empty, q[0]) for ch, child in start[0].items()]
+        while stack:
+            ch, node, prev, prev2, pch = stack.pop()
+            left = best = prev[0] + 1
+            row = [left]
+            for j in range(1, n):
+                left = min(left + 1, prev[j] + 1, prev[j - 1] + (q[j] != ch))
+                if ch == q[j - 1] and pch == q[j] and ch != pch:
+                    left = min(left, (prev2[j - 2] if j > 1 else prev[0]) + 1)
+                row.append(left)
+                if left < best:
+                    best = left
+            if left <= max_dist:
+                for i in node[1]:
+                    if found.get(i, max_dist + 1) > left:
+                        found[i] = left
+            # A longer prefix can still get closer than this one (e.g. 'BTCUSDTX' -> BTCUSDT)
+            if best < left and best <= max_dist:
+                stack.extend((c, child, row, prev, ch) for c, child in node[0].items())
+        return found
+
+    def search(self, query, limit=20):
+        """Ranked matches: exact, then prefix; failing that within MAX_EDITS edits, failing that subsequence"""
+        q = normalize(query)
+        if not q:
+            return self.symbols[:limit]
+        key = (q, limit)
+        hit = self._cache.get(key)
+        if hit is not None:
+            return hit
+
+        out = []
+        exact = self._id.get(q)
+        if exact is not None:
+            out.append(exact)
+        node = self._node(q)
+        if node:
+            out.extend(i for i in node[1] if i != exact)
+        # Fuzzy tiers only when the query is not a prefix of anything (i.e. it has a typo or a gap)
+        if not out and len(q) >= 3:
+            found = self._edits(q, MAX_EDITS)
+            out = sorted(found, key=lambda i: (found[i], i))[:limit]
+        if not out and len(q) >= 2:
+            for i in self._by_first.get(q[0], ()):
+                if _is_subsequence(q, self.symbols[i]):
+                    out.append(i)
+                    if len(out) >= limit:
+                        break
+
+        result = [self.symbols[i] for i in out[:limit]]
+        if len(self._cache) >= CACHE_SIZE:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[key] = result
+        return result
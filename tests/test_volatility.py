@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+
+from volatility import VolatilityEngine
+
+
+def _candles(n, seed, start=0, step=3600):
+    rnd = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rnd.normal(0, 0.01, n)))
+    ohlc = [(c, c * 1.005, c * 0.995, c) for c in closes]
+    return [start + i * step for i in range(n)], ohlc
+
+
+def test_sequential_seed_fills_correlation():
+    vol = VolatilityEngine(corr_window=50)
+    t, btc = _candles(100, 1)
+    _, eth = _candles(100, 2)
+    vol.seed('BTCUSDT', t, btc)
+    vol.seed('ETHUSDT', t, eth)
+
+    assert not vol._pending
+    assert len(vol._rows) == 50
+    rets = [np.diff(np.log([c[3] for c in rows]))[-50:] for rows in (btc, eth)]
+    assert math.isclose(vol.corr('BTCUSDT', 'ETHUSDT'), np.corrcoef(*rets)[0, 1], abs_tol=1e-9)
+
+
+def test_live_updates_after_seed_keep_aligning():
+    vol = VolatilityEngine(corr_window=50)
+    t, btc = _candles(101, 3)
+    _, eth = _candles(101, 4)
+    vol.seed('BTCUSDT', t[:100], btc[:100])
+    vol.seed('ETHUSDT', t[:100], eth[:100])
+    vol.update('BTCUSDT', t[100], *btc[100][1:])
+    vol.update('ETHUSDT', t[100], *eth[100][1:])
+
+    assert len(vol._rows) == 50
+    assert not vol._pending
+
+
+def test_contiguous_top_up_stays_incremental(monkeypatch):
+    vol = VolatilityEngine(corr_window=50)
+    t, btc = _candles(110, 5)
+    _, eth = _candles(110, 6)
+    vol.seed('BTCUSDT', t[:100], btc[:100])
+    vol.seed('ETHUSDT', t[:100], eth[:100])
+
+    def no_rebuild():
+        raise AssertionError("contiguous top-up rebuilt the matrix")
+    monkeypatch.setattr(vol, '_rebuild_matrix', no_rebuild)
+    # Overlapping 5-bar blocks, as the app fetches them
+    for end in (104, 108, 110):
+        vol.seed('BTCUSDT', t[end - 5:end], btc[end - 5:end])
+        vol.seed('ETHUSDT', t[end - 5:end], eth[end - 5:end])
+
+    rets = [np.diff(np.log([c[3] for c in rows]))[-50:] for rows in (btc, eth)]
+    assert math.isclose(vol.corr('BTCUSDT', 'ETHUSDT'), np.corrcoef(*rets)[0, 1], abs_tol=1e-9)
+
+
+def test_gap_realigns_and_untrack_frees_the_window():
+    vol = VolatilityEngine(corr_window=50)
+    t, btc = _candles(120, 7)
+    _, eth = _candles(120, 8)
+    _, sol = _candles(30, 9)
+    vol.seed('BTCUSDT', t[:100], btc[:100])
+    vol.seed('ETHUSDT', t[:100], eth[:100])
+    vol.seed('SOLUSDT', t[:30], sol)           # stale: stops at bar 30
+    vol.seed('BTCUSDT', t[110:], btc[110:])    # gap of ten bars
+    vol.seed('ETHUSDT', t[110:], eth[110:])
+    assert vol._rows and len(vol._rows) < 50
+
+    vol.untrack('SOLUSDT')
+    assert len(vol._rows) == 50
+    assert vol.corr('BTCUSDT', 'ETHUSDT') is not None
@@ -0,0 +1,197 @@
+"""
+Multi-TP ladder optimizer for Crypto Trading Calculator
+
+Given entry, SL and candidate TP levels, searches which levels to use and how
+much of the position to close at each, replaying every historical candle as a
+hypothetical entry. Returns the Pareto front of expectancy vs max drawdown
+(both in R, the amount risked).
+
+Evaluation is vectorized: each candidate TP level gets one outcome row over all
+historical starts, a ladder is a weighted sum of rows, so expectancy for every
+candidate is a single matrix-vector product. Drawdown needs the full equity
+path; a cheap lower bound from block-summed paths prunes candidates that can't
+reach the front before the full evaluation.
+
+    python tp_optimizer.py BTCUSDT 98000 96000 99000 100000 101000 102000 104000 --interval 1h
+"""
+
+import sys
+import argparse
+from itertools import combinations
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def fetch_candles(symbol, interval='1h', limit=1000, api=None, with_times=False):
+    """Binance klines -> float array (N, 4) of open, high, low, close (and int64 open times, ms)"""
+    if api is None:
+        from api_manager import APIManager
+        api = APIManager()
+    url = f"https://api.binance.com/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}"
+    r = api._http_get(url, 'Binance', 'klines')
+    if r.status_code != 200:
+        raise RuntimeError(f"Could not fetch candles (HTTP {r.status_code})")
+    rows = r.json()
+    ohlc = np.array([[float(k[1]), float(k[2]), float(k[3]), float(k[4])] for k in rows])
+    if with_times:
+        return np.array([int(k[0]) for k in rows], dtype=np.int64), ohlc
+    return ohlc
+
+
+def _compositions(total, parts):
+    """All ways to write total as an ordered sum of `parts` positive ints"""
+    if parts == 1:
+        yield (total,)
+        return
+    for first in range(1, total - parts + 2):
+        for rest in _compositions(total - first, parts - 1):
+            yield (first,) + rest
+
+
+def build_candidates(n_levels, max_rungs=3, alloc_step=0.1):
+    """Weight matrix (C, n_levels): every subset of up to max_rungs levels x every allocation split"""
+    units = int(round(1 / alloc_step))
+    rows = []
+    for k in range(1, max_rungs + 1):
+        splits = [np.array(c, dtype=np.float32) / units for c in _compositions(units, k)] if k <= units else []
+        for idx in combinations(range(n_levels), k):
+            for split in splits:
+                w = np.zeros(n_levels, dtype=np.float32)
+                w[list(idx)] = split
+                rows.append(w)
+    return np.vstack(rows) if rows else np.zeros((0, n_levels), dtype=np.float32)
+
+
+def level_outcomes(candles, entry, stop_loss, take_profits, horizon=48, stride=1):
+    """
+    Outcome in R of closing a unit position at each TP level, for every historical start
+    Returns (O with shape (levels, starts), tp_hit_rate per level, sl_hit_rate)
+    """
+    candles = np.asarray(candles, dtype=np.float64)
+    closes, highs, lows = candles[:, 3], candles[:, 1], candles[:, 2]
+    long = stop_loss < entry
+    sl_dist = abs(entry - stop_loss) / entry
+    tp_dist = np.abs(np.asarray(take_profits, dtype=np.float64) - entry) / entry
+
+    n_starts = len(closes) - horizon - 1
+    if n_starts <= 0:
+        raise ValueError("not enough candles for this horizon")
+    starts = np.arange(0, n_starts, stride)
+    base = closes[starts][:, None]
+    hi = sliding_window_view(highs[1:], horizon)[starts] / base - 1
+    lo = sliding_window_view(lows[1:], horizon)[starts] / base - 1
+    fav, adv = (hi, -lo) if long else (-lo, hi)
+    exit_ret = (closes[starts + horizon] / closes[starts] - 1) * (1 if long else -1)
+
+    def first_hit(mask):
+        hit = mask.any(axis=1)
+        return np.where(hit, mask.argmax(axis=1), horizon)
+
+    sl_hit = first_hit(adv >= sl_dist)
+    # Once SL is hit, open size is gone; unhit and still open at the horizon -> market exit
+    at_horizon = np.where(sl_hit < horizon, -1.0, exit_ret / sl_dist)
+    out = np.empty((len(tp_dist), len(starts)), dtype=np.float32)
+    tp_rates = []
+    for j, d in enumerate(tp_dist):
+        tp_hit = first_hit(fav >= d)
+        # Same-candle SL and TP counts as SL (we can't know the intrabar order)
+        won = tp_hit < sl_hit
+        out[j] = np.where(won, d / sl_dist, at_horizon)
+        tp_rates.append(float(won.mean()))
+    return out, tp_rates, float((sl_hit < horizon).mean())
+
+
+def _max_drawdown(paths):
+    """paths (C, T) cumulative equity -> max peak-to-trough drop per row"""
+    peaks = np.maximum.accumulate(np.maximum(paths, 0), axis=1)
+    return (peaks - paths).max(axis=1)
+
+
+def pareto_front(weights, outcomes, chunk=2048, block=32):
+    """
+    Non-dominated candidates (max expectancy, min drawdown)
+    Returns ([(candidate index, expectancy, drawdown)], number fully evaluated)
+    """
+    mu = outcomes.mean(axis=1)
+    expectancy = weights @ mu
+    order = np.argsort(-expectancy, kind='stable')
+
+    cum = np.cumsum(outcomes, axis=1, dtype=np.float64)
+    n = cum.shape[1]
+    cols = np.unique(np.append(np.arange(block - 1, n, block), n - 1))
+    coarse = cum[:, cols]
+
+    front, best_dd, evaluated = [], np.inf, 0
+    for i in range(0, len(order), chunk):
+        idx = order[i:i + chunk]
+        w = weights[idx].astype(np.float64)
+        # Drawdown on a subsampled path never exceeds the true one -> safe lower bound
+        lower = _max_drawdown(w @ coarse)
+        keep = lower < best_dd
+        if not keep.any():
+            continue
+        idx, w = idx[keep], w[keep]
+        dd = _max_drawdown(w @ cum)
+        evaluated += len(idx)
+        for c, d in zip(idx, dd):
+            if d < best_dd:
+                front.append((int(c), float(expectancy[c]), float(d)))
+                best_dd = d
+    return front, evaluated
+
+
+def optimize(candles, entry, stop_loss, take_profits, horizon=48, max_rungs=3, alloc_step=0.1, stride=1):
+    """
+    Search TP ladders over historical candles
+    Returns dict with 'front' (list of ladders, best expectancy first) and search stats
+    """
+    tps = sorted(float(t) for t in take_profits)
+    outcomes, tp_rates, sl_rate = level_outcomes(candles, entry, stop_loss, tps, horizon, stride)
+    weights = build_candidates(len(tps), max_rungs, alloc_step)
+    front, evaluated = pareto_front(weights, outcomes)
+    ladders = []
+    for c, exp, dd in front:
+        w = weights[c]
+        used = np.nonzero(w)[0]
+        ladders.append({
+            'levels': [tps[j] for j in used],
+            'close_percent': [round(float(w[j]) * 100, 1) for j in used],
+            'expectancy_r': exp,
+            'max_drawdown_r': dd,
+        })
+    return {
+        'front': ladders,
+        'candidates': len(weights),
+        'fully_evaluated': evaluated,
+        'starts': outcomes.shape[1],
+        'tp_hit_rate': dict(zip(tps, tp_rates)),
+        'sl_hit_rate': sl_rate,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pareto-optimal take-profit ladders from historical candles")
+    ap.add_argument('symbol')
+    ap.add_argument('entry', type=float)
+    ap.add_argument('sl', type=float)
+    ap.add_argument('tps', type=float, nargs='+', help="candidate TP levels")
+    ap.add_argument('--interval', default='1h')
+    ap.add_argument('--limit', type=int, default=1000)
+    ap.add_argument('--horizon', type=int, default=48, help="candles a trade may stay open")
+    ap.add_argument('--rungs', type=int, default=3)
+    ap.add_argument('--step', type=float, default=0.1, help="allocation granularity")
+    ap.add_argument('--stride', type=int, default=1, help="candles between entries (= horizon for non-overlapping trades)")
+    args = ap.parse_args(argv)
+
+    candles = fetch_candles(args.symbol, args.interval, args.limit)
+    res = optimize(candles, args.entry, args.sl, args.tps, args.horizon, args.rungs, args.step, args.stride)
+    print(f"{res['candidates']} ladders, {res['fully_evaluated']} fully evaluated over {res['starts']} starts")
+    for lad in res['front']:
+        rungs = ', '.join(f"{p:g}@{c:g}%" for p, c in zip(lad['levels'], lad['close_percent']))
+        print(f"E={lad['expectancy_r']:+.3f}R  DD={lad['max_drawdown_r']:.2f}R  {rungs}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
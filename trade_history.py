@@ -2,10 +2,18 @@ import json
 import os
 from datetime import datetime
 
+from history_archive import HistoryArchive
+
 class TradeHistory:
-    def __init__(self):
-        self.history_file = 'trade_history.json'
+    def __init__(self, history_file='trade_history.json'):
+        self.history_file = history_file
+        # Past months are moved to compressed segments; self.trades holds the current month
+        self.archive = HistoryArchive(history_file, 'timestamp', archive_dir=history_file + '.trades.archive')
         self.trades = self.load_history()
+        try:
+            self.trades = self.archive.compact(self.trades, save=self._write)
+        except OSError:
+            pass
     
     def load_history(self):
         if os.path.exists(self.history_file):
@@ -22,26 +30,40 @@ class TradeHistory:
         self.save_history()
     
     def save_history(self):
+        self._write(self.trades)
+
+    def _write(self, trades):
         with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(self.trades, f, ensure_ascii=False, indent=4)
+            json.dump(trades, f, ensure_ascii=False, indent=4)
     
     def get_trades(self, limit=None):
         if limit:
+            if limit > len(self.trades):
+                return self.archive.tail(limit - len(self.trades)) + self.trades
             return self.trades[-limit:]
-        return self.trades
+        return self.get_all_trades()
+
+    def get_all_trades(self):
+        return list(self.archive.iter_trades()) + self.trades
+
+    def get_summary(self):
+        """Count and date range of every trade, archived ones included, without opening segments"""
+        return self.archive.summary(self.trades)
     
     def clear_history(self):
         self.trades = []
+        self.archive.clear()
         self.save_history()
     
     def export_to_csv(self, filename='trades_export.csv'):
         import csv
-        if not self.trades:
+        trades = self.get_all_trades()
+        if not trades:
             return False
         
-        keys = self.trades[0].keys()
+        keys = trades[0].keys()
         with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
             writer = csv.DictWriter(f, fieldnames=keys)
             writer.writeheader()
-            writer.writerows(self.trades)
+            writer.writerows(trades)
         return True
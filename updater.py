@@ -3,27 +3,123 @@ Auto-update system for Crypto Trading Calculator
 
 Important:
 - This updater does NOT depend on GitHub Releases/Tags.
-- It compares local VERSION with VERSION found in remote main.py on GitHub.
-- When updating, it downloads the latest files from the main branch.
+- It reads a small manifest.json (version + sha256 per file) from the main branch.
+- Only files whose hash differs from the local copy are downloaded, in parallel,
+  with ETag/If-None-Match so unchanged resources cost a 304.
+- Downloads are verified and staged into a temp dir, then swapped in together;
+  if any step fails the previous files are restored.
+- If the remote has no manifest yet, VERSION is still read from remote main.py
+  and the legacy file list is downloaded in full (still staged and swapped).
 """
 
 import os
 import re
+import sys
+import json
+import glob
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from packaging import version
 
 REPO_OWNER = "Qfndr"
 REPO_NAME = "crypto-trading-calculator"
 RAW_BASE = f"https://raw.githubusercontent.com/{REPO_OWNER}/{REPO_NAME}/main"
+MANIFEST_NAME = "manifest.json"
+STATE_NAME = ".update_state.json"
+
+# Used when the remote predates manifest.json: full download, no hash check
+LEGACY_FILES = [
+    'main.py',
+    'config.py',
+    'trade_history.py',
+    'api_manager.py',
+    'chart_generator.py',
+    'language.py',
+    'updater.py'
+]
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def make_manifest(app_version, root='.', files=None):
+    """Build the manifest dict for files (default: every *.py in root)"""
+    if files is None:
+        files = sorted(os.path.basename(p) for p in glob.glob(os.path.join(root, '*.py')))
+    entries = {}
+    for name in files:
+        path = os.path.join(root, name)
+        entries[name] = {'sha256': sha256_file(path), 'size': os.path.getsize(path)}
+    return {'version': app_version, 'files': entries}
+
 
 class Updater:
-    def __init__(self, current_version: str):
+    def __init__(self, current_version: str, base_url: str = RAW_BASE, install_dir: str = None, max_workers: int = 4):
         self.current_version = current_version
+        self.base_url = base_url.rstrip('/')
+        self.install_dir = install_dir or os.path.dirname(os.path.abspath(__file__))
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        self.state_path = os.path.join(self.install_dir, STATE_NAME)
+        self.state = self._load_state()
+
+    # ---- state (ETags and last manifest) ----
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {'etags': {}, 'manifest': None}
+
+    def _save_state(self):
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def _conditional_get(self, name, timeout=20, conditional=True):
+        """GET base_url/name with If-None-Match; returns the response (304 allowed)"""
+        headers = {}
+        etag = self.state['etags'].get(name) if conditional else None
+        if etag:
+            headers['If-None-Match'] = etag
+        return self.session.get(f"{self.base_url}/{name}", headers=headers, timeout=timeout)
+
+    # ---- version ----
+    def _get_remote_manifest(self):
+        """Fetch manifest.json (cached via ETag); None if the remote has none"""
+        r = self._conditional_get(MANIFEST_NAME, timeout=10)
+        if r.status_code == 304 and self.state.get('manifest'):
+            return self.state['manifest']
+        if r.status_code == 404:
+            return None
+        if r.status_code != 200:
+            raise RuntimeError(f"Could not fetch manifest (HTTP {r.status_code})")
+        manifest = r.json()
+        if 'version' not in manifest or 'files' not in manifest:
+            raise RuntimeError("Malformed update manifest")
+        self.state['manifest'] = manifest
+        if r.headers.get('ETag'):
+            self.state['etags'][MANIFEST_NAME] = r.headers['ETag']
+        self._save_state()
+        return manifest
 
     def _get_remote_version(self):
-        """Fetch remote main.py and extract VERSION = 'x.y.z' """
-        url = f"{RAW_BASE}/main.py"
-        r = requests.get(url, timeout=10)
+        """Version from the manifest, falling back to VERSION = 'x.y.z' in remote main.py"""
+        manifest = self._get_remote_manifest()
+        if manifest:
+            return manifest['version']
+
+        r = self.session.get(f"{self.base_url}/main.py", timeout=10)
         if r.status_code != 200:
             raise RuntimeError(f"Could not fetch remote main.py (HTTP {r.status_code})")
 
@@ -51,42 +147,106 @@ class Updater:
                 'error': str(e)
             }
 
+    # ---- update ----
+    def _changed_files(self, manifest):
+        changed = []
+        for name, meta in manifest['files'].items():
+            path = os.path.join(self.install_dir, name)
+            if not meta.get('sha256') or not os.path.exists(path) or sha256_file(path) != meta['sha256']:
+                changed.append(name)
+        return changed
+
+    def _fetch_to_stage(self, name, expected_sha, stage_dir):
+        """Download one file into stage_dir and verify it; returns (name, etag)"""
+        r = self._conditional_get(name)
+        if r.status_code == 304:
+            # Our ETag is current but the local file no longer matches it (edited locally)
+            r = self._conditional_get(name, conditional=False)
+        if r.status_code != 200:
+            raise RuntimeError(f"{name}: HTTP {r.status_code}")
+        if expected_sha and hashlib.sha256(r.content).hexdigest() != expected_sha:
+            raise RuntimeError(f"{name}: sha256 mismatch")
+        dest = os.path.join(stage_dir, name)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with open(dest, 'wb') as f:
+            f.write(r.content)
+        return name, r.headers.get('ETag')
+
+    def _swap_in(self, names, stage_dir):
+        """Move staged files over the install; restore everything on failure"""
+        done = []  # (target, backup or None)
+        try:
+            for name in names:
+                target = os.path.join(self.install_dir, name)
+                backup = None
+                if os.path.exists(target):
+                    backup = f"{target}.backup"
+                    shutil.copy2(target, backup)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(os.path.join(stage_dir, name), target)
+                done.append((target, backup))
+        except Exception:
+            for target, backup in reversed(done):
+                try:
+                    if backup:
+                        shutil.copy2(backup, target)
+                    else:
+                        os.remove(target)
+                except OSError:
+                    pass
+            raise
+
     def update_to_latest(self):
         """Update core python files from main branch."""
-        files_to_update = [
-            'main.py',
-            'config.py',
-            'trade_history.py',
-            'api_manager.py',
-            'chart_generator.py',
-            'language.py',
-            'updater.py'
-        ]
-
-        updated, failed = [], []
-        for filename in files_to_update:
+        try:
+            manifest = self._get_remote_manifest()
+        except Exception as e:
+            return {'success': False, 'updated': [], 'failed': [], 'message': str(e)}
+        if not manifest:
+            manifest = {'files': {name: {} for name in LEGACY_FILES}}
+
+        changed = self._changed_files(manifest)
+        if not changed:
+            return {'success': True, 'updated': [], 'failed': [], 'message': 'Already up to date'}
+
+        stage_dir = tempfile.mkdtemp(prefix='.update-', dir=self.install_dir)
+        failed, etags = [], {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(self._fetch_to_stage, name, manifest['files'][name].get('sha256'), stage_dir): name
+                    for name in changed
+                }
+                for fut, name in futures.items():
+                    try:
+                        _, etag = fut.result()
+                        if etag:
+                            etags[name] = etag
+                    except Exception:
+                        failed.append(name)
+
+            if failed:
+                # Nothing is touched unless every changed file arrived intact
+                return {'success': False, 'updated': [], 'failed': failed, 'message': 'Download failed, nothing changed'}
+
             try:
-                url = f"{RAW_BASE}/{filename}"
-                r = requests.get(url, timeout=20)
-                if r.status_code != 200:
-                    failed.append(filename)
-                    continue
-
-                # Backup
-                if os.path.exists(filename):
-                    with open(filename, 'r', encoding='utf-8', errors='ignore') as f:
-                        old = f.read()
-                    with open(f"{filename}.backup", 'w', encoding='utf-8') as f:
-                        f.write(old)
-
-                # Write new
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(r.text)
-
-                updated.append(filename)
-            except Exception:
-                failed.append(filename)
-
-        if updated:
-            return {'success': True, 'updated': updated, 'failed': failed, 'message': f"Updated {len(updated)} files"}
-        return {'success': False, 'updated': [], 'failed': failed, 'message': 'No files updated'}
+                self._swap_in(changed, stage_dir)
+            except Exception as e:
+                return {'success': False, 'updated': [], 'failed': changed, 'message': f"Install failed, rolled back: {e}"}
+
+            self.state['etags'].update(etags)
+            self._save_state()
+            return {'success': True, 'updated': changed, 'failed': [], 'message': f"Updated {len(changed)} files"}
+        finally:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # Release helper: python updater.py [root] -> writes root/manifest.json
+    root = sys.argv[1] if len(sys.argv) > 1 else '.'
+    with open(os.path.join(root, 'main.py'), 'r', encoding='utf-8') as f:
+        m = re.search(r"^VERSION\s*=\s*\"([^\"]+)\"", f.read(), flags=re.MULTILINE)
+    data = make_manifest(m.group(1) if m else '0.0.0', root)
+    with open(os.path.join(root, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    print(f"Wrote {MANIFEST_NAME} for {len(data['files'])} files (v{data['version']})")
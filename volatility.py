@@ -0,0 +1,252 @@
+"""
+Rolling volatility and correlation for Crypto Trading Calculator
+
+Keeps, per tracked symbol, a Wilder ATR and a rolling stdev of close-to-close
+log returns, plus an N x N correlation matrix of those returns across all
+tracked symbols. Everything is updated incrementally as each candle closes:
+running sums (and a running sum of outer products for the matrix) gain the
+new bar and drop the one leaving the window, so a candle costs O(1) per symbol
+and O(N^2) for the matrix instead of a recompute over the whole window. The
+sums are rebuilt from the window now and then to stop floating-point drift.
+
+suggested_risk() turns that into a risk % for the sizing step: scaled down for
+symbols more volatile than the tracked median (up for calmer ones, within
+limits) and further down the more the symbol moves with positions already open.
+"""
+
+import math
+import threading
+from collections import deque
+
+import numpy as np
+
+# Bounds on the volatility scaling of suggested_risk
+MIN_SCALE = 0.25
+MAX_SCALE = 1.5
+
+
+class _SymbolVol:
+    __slots__ = ('last_ts', 'prev_close', 'atr', 'tr_seed', 'rets', 'sum', 'sumsq', 'history', 'updates')
+
+    def __init__(self, window, keep):
+        self.last_ts = None
+        self.prev_close = None
+        self.atr = None
+        self.tr_seed = []            # true ranges until the first ATR can be averaged
+        self.rets = deque(maxlen=window)
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.history = deque(maxlen=keep)   # (ts, return) for rebuilding the matrix
+        self.updates = 0
+
+
+class VolatilityEngine:
+    """
+    window: bars in the rolling return stdev
+    atr_period: Wilder smoothing period
+    corr_window: aligned bars in the correlation matrix
+    Candles are keyed by their open time; bars at or before a symbol's last one are ignored
+    """
+
+    def __init__(self, window=20, atr_period=14, corr_window=100, resync_every=1000):
+        self.window = window
+        self.atr_period = atr_period
+        self.corr_window = corr_window
+        self.resync_every = resync_every
+        self.symbols = []            # matrix order
+        self._col = {}
+        self._state = {}
+        self._pending = {}           # ts -> {symbol: return} until every tracked symbol has the bar
+        self._rows = deque()         # aligned return vectors in the window
+        self._S = np.zeros(0)
+        self._Q = np.zeros((0, 0))
+        self._row_updates = 0
+        self._lock = threading.RLock()
+
+    # ---- updates ----
+
+    def track(self, symbol):
+        """Add a symbol to the matrix (rebuilt from the returns already seen for it)"""
+        with self._lock:
+            if symbol in self._col:
+                return
+            self._state.setdefault(symbol, _SymbolVol(self.window, self.corr_window * 2))
+            self._col[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self._rebuild_matrix()
+
+    def untrack(self, symbol):
+        with self._lock:
+            if symbol not in self._col:
+                return
+            self.symbols.remove(symbol)
+            self._col = {s: i for i, s in enumerate(self.symbols)}
+            self._state.pop(symbol, None)
+            self._rebuild_matrix()
+
+    def update(self, symbol, ts, high, low, close):
+        """One closed candle; returns False if it was not newer than the last one"""
+        with self._lock:
+            if symbol not in self._col:
+                self.track(symbol)
+            st = self._state[symbol]
+            if st.last_ts is not None and ts <= st.last_ts:
+                return False
+            st.last_ts = ts
+            prev = st.prev_close
+            st.prev_close = close
+            tr = high - low if prev is None else max(high - low, abs(high - prev), abs(low - prev))
+            if st.atr is None:
+                st.tr_seed.append(tr)
+                if len(st.tr_seed) == self.atr_period:
+                    st.atr = sum(st.tr_seed) / self.atr_period
+                    st.tr_seed = []
+            else:
+                st.atr += (tr - st.atr) / self.atr_period
+            if prev is None or prev <= 0 or close <= 0:
+                return True
+
+            r = math.log(close / prev)
+            if len(st.rets) == st.rets.maxlen:
+                old = st.rets[0]
+                st.sum -= old
+                st.sumsq -= old * old
+            st.rets.append(r)
+            st.sum += r
+            st.sumsq += r * r
+            st.updates += 1
+            if st.updates % self.resync_every == 0:
+                st.sum = math.fsum(st.rets)
+                st.sumsq = math.fsum(x * x for x in st.rets)
+            st.history.append((ts, r))
+            self._add_return(symbol, ts, r)
+            return True
+
+    def seed(self, symbol, times, ohlc):
+        """
+        Feed a block of candles (open times, rows of open/high/low/close); returns bars applied
+        A block continuing the symbol's last bar goes through the incremental path like single updates;
+        a symbol's first block, or one after a gap, realigns the matrix from the per-symbol histories
+        (the other symbols' returns at those times were already consumed from _pending)
+        """
+        times = [int(t) for t in times]
+        with self._lock:
+            st = self._state.get(symbol)
+            last = st.last_ts if st and symbol in self._col else None
+            new = [t for t in times if last is None or t > last]
+            steps = [b - a for a, b in zip(times, times[1:]) if b > a]
+            if last is not None and st.history and len(st.history) > 1:
+                steps.append(st.history[-1][0] - st.history[-2][0])
+            contiguous = last is not None and (not new or (bool(steps) and new[0] - last <= min(steps)))
+            applied = sum(self.update(symbol, t, float(c[1]), float(c[2]), float(c[3]))
+                          for t, c in zip(times, ohlc))
+            if applied and not contiguous:
+                self._rebuild_matrix()
+            return applied
+
+    def _add_return(self, symbol, ts, r):
+        bar = self._pending.setdefault(ts, {})
+        bar[symbol] = r
+        if len(bar) < len(self.symbols):
+            return
+        del self._pending[ts]
+        self._push_row(np.array([bar[s] for s in self.symbols]))
+        # A bar still incomplete once a later one completed is missing a symbol for good
+        for t in [t for t in self._pending if t < ts]:
+            del self._pending[t]
+
+    def _push_row(self, x):
+        if len(self._rows) == self.corr_window:
+            y = self._rows.popleft()
+            self._S -= y
+            self._Q -= np.outer(y, y)
+        self._rows.append(x)
+        self._S += x
+        self._Q += np.outer(x, x)
+        self._row_updates += 1
+        if self._row_updates % self.resync_every == 0:
+            m = np.array(self._rows)
+            self._S = m.sum(axis=0)
+            self._Q = m.T @ m
+
+    def _rebuild_matrix(self):
+        n = len(self.symbols)
+        self._rows = deque()
+        self._S = np.zeros(n)
+        self._Q = np.zeros((n, n))
+        self._pending = {}
+        if not n:
+            return
+        by_ts = [dict(self._state[s].history) for s in self.symbols]
+        common = sorted(set(by_ts[0]).intersection(*by_ts[1:]))[-self.corr_window:]
+        for ts in common:
+            self._push_row(np.array([h[ts] for h in by_ts]))
+
+    # ---- queries ----
+
+    def atr(self, symbol):
+        st = self._state.get(symbol)
+        return st.atr if st else None
+
+    def atr_pct(self, symbol):
+        """ATR as % of the last close"""
+        st = self._state.get(symbol)
+        return st.atr / st.prev_close * 100 if st and st.atr is not None and st.prev_close else None
+
+    def stdev(self, symbol):
+        """Sample stdev of per-bar log returns over the window (None with fewer than 2)"""
+        st = self._state.get(symbol)
+        if not st or len(st.rets) < 2:
+            return None
+        n = len(st.rets)
+        return math.sqrt(max(st.sumsq - st.sum * st.sum / n, 0.0) / (n - 1))
+
+    def correlation(self):
+        """(symbols, N x N matrix); NaN where a pair has too little data"""
+        with self._lock:
+            n = len(self._rows)
+            k = len(self.symbols)
+            if n < 3:
+                return list(self.symbols), np.full((k, k), np.nan)
+            cov = (self._Q - np.outer(self._S, self._S) / n) / (n - 1)
+            sd = np.sqrt(np.clip(np.diag(cov), 0, None))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr = cov / np.outer(sd, sd)
+            corr = np.clip(corr, -1.0, 1.0)
+            np.fill_diagonal(corr, np.where(sd > 0, 1.0, np.nan))
+            return list(self.symbols), corr
+
+    def corr(self, a, b):
+        symbols, m = self.correlation()
+        if a not in self._col or b not in self._col:
+            return None
+        v = m[self._col[a], self._col[b]]
+        return None if np.isnan(v) else float(v)
+
+    def suggested_risk(self, symbol, base_risk, open_symbols=(), target_vol=None):
+        """
+        Volatility- and correlation-adjusted risk %
+        target_vol: per-bar return stdev that gets base_risk unchanged (default: median of tracked symbols)
+        open_symbols: symbols with positions already on; positive correlation with them shrinks the risk
+        Returns base_risk unchanged while there is not enough data
+        """
+        with self._lock:
+            vol = self.stdev(symbol)
+            if vol is None or vol <= 0:
+                return base_risk
+            if target_vol is None:
+                vols = [v for v in (self.stdev(s) for s in self.symbols) if v]
+                target_vol = float(np.median(vols))
+            scale = min(MAX_SCALE, max(MIN_SCALE, target_vol / vol))
+            others = [s for s in open_symbols if s != symbol and s in self._col]
+            if others:
+                _, m = self.correlation()
+                row = m[self._col[symbol]]
+                overlap = sum(max(0.0, float(row[self._col[s]])) for s in others if not np.isnan(row[self._col[s]]))
+                # Risk of k perfectly correlated positions adds up like one position k times the size
+                scale /= math.sqrt(1.0 + overlap)
+            return base_risk * scale
+
+    def stats(self, symbol):
+        return {'atr': self.atr(symbol), 'atr_pct': self.atr_pct(symbol), 'stdev': self.stdev(symbol),
+                'bars': len(self._state[symbol].rets) if symbol in self._state else 0}